@@ -28,6 +28,7 @@ class Circle(Object):
 
         if self.center == self.point2 or radius == 0:
             raise ValueError(f'Circle cannot have radius of 0: {self.center, self.point2, self.radius, self.name}')
+        self._key = None
 
     def __repr__(self):
         """String repr of the circle"""
@@ -78,6 +79,16 @@ class Circle(Object):
             c.dependencies = self.dependencies
             return c
 
+    def key(self) -> str:
+        """
+        Canonical string key of the circle. Like equality, the key only depends on the center and radius.
+        :return: string encoding the simplified center and radius of the circle
+        """
+        if getattr(self, '_key', None) is None:
+            circle = self.simplify()
+            self._key = f'{circle.center.key()}r{sympify(circle.radius)}'
+        return self._key
+
 
 class FastCircle(Object):
     def __init__(self, center: FastPoint, radius: Expression = None, point2: Point = None, name='', pre_simplified=False):
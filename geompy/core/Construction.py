@@ -1,5 +1,7 @@
+import copy
 import itertools
 import random
+from decimal import Decimal
 from enum import Enum
 from typing import Union
 
@@ -7,7 +9,7 @@ import networkx as nx
 import numpy as np
 from skimage import draw
 
-from geompy.cas import Expr, sqrt, Infinity
+from geompy.cas import Expr, equals, simplify, sqrt, sympify, Infinity
 from geompy.cas import alphabet
 from geompy.core import Circle, Line, Point
 from .Angle import Angle
@@ -27,6 +29,43 @@ class ConstructionMode(Enum):
     CIRCLES_ONLY = 2
 
 
+def is_negative(expression: Expr) -> bool:
+    """
+    Decide whether an expression is negative. Symengine cannot always decide the sign of nested radicals symbolically,
+    so fall back to comparing its numerical value.
+    """
+    try:
+        return bool(expression < 0)
+    except TypeError:
+        return float(expression) < 0
+
+
+# Squared lengths are grouped by their value rounded to this precision, to find equal lengths whose keys differ
+LENGTH_BUCKET_SIZE = 1e-6
+
+
+class LengthIndexEntry:
+    """A squared distance present in a construction, and the pairs of points that distance apart."""
+    __slots__ = ('squared_length', 'witnesses', '_length')
+
+    def __init__(self, squared_length: Expr):
+        self.squared_length = squared_length
+        self.witnesses: [(Point, Point)] = []
+        self._length = None
+
+    def copy(self) -> 'LengthIndexEntry':
+        entry = LengthIndexEntry(self.squared_length)
+        entry.witnesses = list(self.witnesses)
+        entry._length = self._length
+        return entry
+
+    @property
+    def length(self) -> Expr:
+        if self._length is None:
+            self._length = simplify(sqrt(self.squared_length))
+        return self._length
+
+
 class Construction:
     """
     Constructions contain all of the processes necessary to perform a traditional Euclidean Compass-and-Straightedge
@@ -85,6 +124,12 @@ class Construction:
         self._actions: {Union[Line, Circle]} = set()
         self.new_points_since_last_actions_update: {Point} = set()
 
+        # Index of the squared distances between points, keyed canonically, and the pairs of points at each distance.
+        # It is only brought up to date when lengths are queried, since points can be added in many ways.
+        self._length_index: {str: LengthIndexEntry} = {}
+        self._length_index_buckets: {int: {str}} = {}
+        self._length_index_points: {str: Point} = {}
+
         # Enum specifying what type of mode this self should be.
         self.construction_mode = construction_mode
 
@@ -144,7 +189,7 @@ class Construction:
                 y = line1(x)
             return {Point(x, y)}
         else:
-            return {}
+            return set()
 
     # @lru_cache()
     @staticmethod
@@ -171,6 +216,10 @@ class Construction:
             # Use the equation of a circle in the plane, and solve for y, using the x-coordinate of the line as x
             x = line.point1.x
             inside_sqrt = r ** 2 - (x - x0) ** 2
+            if is_negative(inside_sqrt):  # The line passes beside the circle
+                return set()
+            elif inside_sqrt == 0:  # The line is tangent
+                return {Point(x, y0)}
             return {Point(x, y0 + sqrt(inside_sqrt)), Point(x, y0 - sqrt(inside_sqrt))}
 
         diff = b - y0  # This subtraction shows up frequently. This is just so we do not need to repeat it.
@@ -187,8 +236,8 @@ class Construction:
         # Again, the discriminant should be $b^2-4ac$, but we can simplify the quadratic equation in this case by
         # factoring out the aforementioned 2
         discriminant = coefficient_b ** 2 - coefficient_a * coefficient_c
-        if discriminant < 0:  # There are no real solutions, so the line and circle do not intersect on the plane
-            return {}
+        if is_negative(discriminant):  # There are no real solutions, so the line and circle do not intersect on the plane
+            return set()
         elif discriminant == 0:  # The line is tangent and there is one real solution
             x = -coefficient_b / coefficient_a
             y = line(x)
@@ -310,18 +359,104 @@ class Construction:
         # Return our result
         return intersections
 
+    @staticmethod
+    def _length_key(squared_length: Expr) -> str:
+        """
+        :param squared_length: square of a length
+        :return: string key of the expanded squared length. Expanding is much cheaper than simplifying, and makes the
+        keys of most equal lengths equal; the rest are matched by their buckets.
+        """
+        return str(sympify(squared_length).expand())
+
+    @staticmethod
+    def _length_bucket(squared_length: Expr) -> int:
+        """
+        :param squared_length: square of a length
+        :return: the squared length, rounded, for finding equal lengths whose keys differ
+        """
+        return round(float(squared_length) / LENGTH_BUCKET_SIZE)
+
+    def _reset_length_index(self) -> None:
+        self._length_index = {}
+        self._length_index_buckets = {}
+        self._length_index_points = {}
+
+    def _update_length_index(self) -> None:
+        """
+        Bring the length index up to date with the points in the construction. Each new point adds the distances to
+        every point indexed before it, so it costs O(n), and no distance is computed twice. If points were removed
+        (e.g. by assigning a new set of points), the index is rebuilt.
+        """
+        points = {point.key(): point for point in self.points}
+        if not points.keys() >= self._length_index_points.keys():
+            self._reset_length_index()
+        for key, point in points.items():
+            if key in self._length_index_points:
+                continue
+            for other_point in self._length_index_points.values():
+                # Subtracting the coordinates directly skips the simplification done by Point.__sub__
+                dx, dy = point.x - other_point.x, point.y - other_point.y
+                squared_length = dx * dx + dy * dy
+                length_key = self._length_key(squared_length)
+                entry = self._length_index.get(length_key)
+                if entry is None:
+                    # Keys of equal lengths share one entry, so its witnesses are complete whichever key is looked up
+                    entry = self._find_equal_length(squared_length) or LengthIndexEntry(squared_length)
+                    self._length_index[length_key] = entry
+                    self._length_index_buckets.setdefault(self._length_bucket(squared_length), set()).add(length_key)
+                entry.witnesses.append((other_point, point))
+            self._length_index_points[key] = point
+
+    def _find_equal_length(self, squared_length: Expr) -> Union[LengthIndexEntry, None]:
+        """
+        :param squared_length: square of a length
+        :return: the indexed entry of an equal squared length, found by its bucket, or None if there is none
+        """
+        bucket = self._length_bucket(squared_length)
+        compared = set()
+        for neighbor in (bucket - 1, bucket, bucket + 1):
+            for length_key in self._length_index_buckets.get(neighbor, ()):
+                entry = self._length_index[length_key]
+                if id(entry) not in compared:
+                    compared.add(id(entry))
+                    if equals(entry.squared_length, squared_length):
+                        return entry
+        return None
+
+    def find_length(self, length: Expr) -> [(Point, Point)]:
+        """
+        Find the pairs of points in the construction that are a given distance apart. The lookup is by the canonical
+        key of the squared length, so it takes constant time once the index is up to date. Lengths whose keys differ
+        (because simplification did not reach the same form) are matched by their numerical value, and compared
+        exactly.
+        :param length: the desired length to find in the construction.
+        :return: list of the pairs of points that are length apart, in the order they were indexed. Empty if there are
+        none.
+        :raises TypeError: if length is a float or Decimal, which cannot be compared exactly
+        """
+        if isinstance(length, (float, Decimal)):
+            raise TypeError(f'Lengths must be exact expressions (e.g. sqrt(sympify(2))), not {type(length).__name__} '
+                            f'{length}')
+        self._update_length_index()
+        length = sympify(length)
+        squared_length = length * length
+        entry = self._length_index.get(self._length_key(squared_length))
+        if entry is None:
+            entry = self._find_equal_length(squared_length)
+        return entry.witnesses if entry is not None else []
+
     def check_lengths(self, length: Expr) -> bool:
         """
-        Check every length in a self and compare against the given length
+        Check whether the given length is present in the construction.
 
         :param length: the desired length to find in a self.
-        :return: string containing the two points and length
+        :return: true if two points are length apart
         """
-        for point1 in self.points:
-            for point2 in self.points - {point1}:
-                if abs(point2 - point1) == length:
-                    print(f'Length {length} found between points: {point1} and {point2}')
-                    return True
+        witnesses = self.find_length(length)
+        if witnesses:
+            point1, point2 = witnesses[0]
+            print(f'Length {length} found between points: {point1} and {point2}')
+            return True
         return False
 
     def get_present_lengths(self) -> {Expr: (Point, Point)}:
@@ -329,11 +464,8 @@ class Construction:
         Get a dictionary with keys all of the present length and values the pair of points that make that length.
         :return: dictionary with keys all of the present length and values the pair of points that make that length.
         """
-        lengths_dict = {}
-        for point1 in self.points:
-            for point2 in self.points - {point1}:
-                lengths_dict[abs(point2 - point1)] = (point1, point2)
-        return lengths_dict
+        self._update_length_index()
+        return {entry.length: entry.witnesses[0] for entry in self._length_index.values()}
 
     def add_circle(self, center: Point, point2: Point,
                    counts_as_step: bool = True, interesting: bool = False) -> Circle:
@@ -415,26 +547,66 @@ class Construction:
         self.add_points_to_actions_update_queue({point})
         return point
 
-    def add_random_construction(self, number_of_steps=1, interesting=True):
+    def add_random_construction(self, number_of_steps=1, interesting=True, rng: random.Random = None):
         """
         Add a number of random steps to the self.
         :param interesting: bool representing whether new intersection points should be considered "interesting"
         :param number_of_steps: number of random steps to add
+        :param rng: random number generator to draw the steps with. Defaults to the random module. The same seed gives
+        the same steps in every process, whatever its hash seed.
         :return: the last self added to the diagram
         """
+        rng = rng if rng is not None else random
         construction = None
         for _ in range(number_of_steps):
-            prebuilt_steps = self.steps[:]
-            construction_is_new = False
-            while not construction_is_new:
-                action = random.choice([self.add_circle, self.add_line])
-                point1 = random.choice(tuple(self.points))
-                point2 = random.choice(tuple(self.points - {point1}))
-                construction = action(point1, point2, interesting)
-                construction_is_new = construction not in prebuilt_steps
+            # Pick points by index from a tuple built once per step, rather than rebuilding it for every draw. The
+            # points are in canonical order, since the order of the set depends on the interpreter's hash seed. Points
+            # with the same key are ordered by their representation.
+            points = tuple(sorted(self.points, key=lambda point: (point.key(), str(point.x), str(point.y))))
+            number_of_steps_before = len(self.steps)
+            while len(self.steps) == number_of_steps_before:
+                action = rng.choice((self.add_circle, self.add_line))
+                index1 = rng.randrange(len(points))
+                index2 = rng.randrange(len(points) - 1)
+                if index2 >= index1:
+                    index2 += 1
+                point1, point2 = points[index1], points[index2]
+                # The set can hold the same point under different representations
+                if point1 == point2:
+                    continue
+                construction = action(point1, point2, interesting=interesting)
 
         return construction
 
+    def copy(self) -> 'Construction':
+        """
+        Copy the construction, sharing its points, lines and circles with the original. They are never modified once
+        they are part of a construction, so unlike copy.deepcopy, there is no need to copy them (and their expressions).
+        Adding steps to the copy does not change the original, and vice versa.
+        :return: the copy
+        """
+        construction = copy.copy(self)
+        construction.points = set(self.points)
+        construction.lines = set(self.lines)
+        construction.circles = set(self.circles)
+        construction.steps = list(self.steps)
+        construction.steps_set = set(self.steps_set)
+        construction.interesting_points = set(self.interesting_points)
+        construction.interesting_lines = set(self.interesting_lines)
+        construction.interesting_circles = set(self.interesting_circles)
+        construction._actions = set(self._actions)
+        construction.new_points_since_last_actions_update = set(self.new_points_since_last_actions_update)
+        # Keys of equal lengths share an entry, and so do their copies
+        entry_copies = {}
+        construction._length_index = {}
+        for key, entry in self._length_index.items():
+            if id(entry) not in entry_copies:
+                entry_copies[id(entry)] = entry.copy()
+            construction._length_index[key] = entry_copies[id(entry)]
+        construction._length_index_buckets = {bucket: set(keys) for bucket, keys in self._length_index_buckets.items()}
+        construction._length_index_points = dict(self._length_index_points)
+        return construction
+
     @staticmethod
     def _point_to_image_space(point: Union[Point, np.array], boundary_radius: int, resolution: int) -> np.array:
         """
@@ -556,6 +728,122 @@ class Construction:
         else:
             self.add_circle(point1, point2)
 
+    @staticmethod
+    def _action_number(point1_pixel: np.array, point2_pixel: np.array, is_line: bool, resolution: int) -> int:
+        """
+        Encode an action as an integer. This is the inverse of _interpret_action, so the pixels are those it reads.
+        :param point1_pixel: pixel (x, y) of the first point (the center of a circle). Pixels off the image are moved
+        to its edge.
+        :param point2_pixel: pixel (x, y) of the second point
+        :param is_line: True for a line, False for a circle
+        :param resolution: int representing how many pixels are in the image space lengthwise
+        :return: the action number, in range(resolution**4 * 2)
+        """
+        point1x, point1y = (int(coordinate) for coordinate in np.clip(point1_pixel, 0, resolution - 1))
+        point2x, point2y = (int(coordinate) for coordinate in np.clip(point2_pixel, 0, resolution - 1))
+        action = ((point2x * resolution + point2y) * resolution + point1x) * resolution + point1y
+        return (action << 1) + int(is_line)
+
+    def _unique_points(self) -> [Point]:
+        """
+        :return: the first point with each key, in the order of self.points. get_nearest_point also returns the first
+        of equally near points, so it only ever returns these.
+        """
+        points = {}
+        for point in self.points:
+            points.setdefault(point.key(), point)
+        return list(points.values())
+
+    def _valid_step_table(self, points: [Point]) -> np.array:
+        """
+        Find which steps between the given points are in self.actions, i.e. are permitted and not yet drawn.
+        Candidates are found numerically (in the single precision of Point.numpy, so with a loose tolerance), and
+        confirmed exactly.
+        :param points: distinct points of the construction
+        :return: boolean array of shape (2, len(points), len(points)). [0, i, j] is true if the circle centered at point
+        i through point j is valid, and [1, i, j] if the line through points i and j is.
+        """
+        table = np.zeros((2, len(points), len(points)), dtype=bool)
+        indices = {point.key(): index for index, point in enumerate(points)}
+        coordinates = np.array([point.numpy() for point in points], dtype=np.float64)
+        for action in self.actions:
+            if isinstance(action, Line):
+                # Every pair of points on the line draws it
+                first, second = coordinates[indices[action.point1.key()]], coordinates[indices[action.point2.key()]]
+                direction = (second - first) / np.linalg.norm(second - first)
+                offsets = coordinates - first
+                distances = np.abs(offsets[:, 0] * direction[1] - offsets[:, 1] * direction[0])
+                on_line = [index for index in np.flatnonzero(distances < 1e-4) if points[index] in action]
+                table[1][np.ix_(on_line, on_line)] = True
+            else:
+                # Every point at the radius from the center draws the circle
+                center = indices[action.center.key()]
+                distances = np.linalg.norm(coordinates - coordinates[center], axis=1)
+                for index in np.flatnonzero(np.abs(distances - float(action.radius)) < 1e-4):
+                    offset_x = points[index].x - action.center.x
+                    offset_y = points[index].y - action.center.y
+                    if equals(offset_x * offset_x + offset_y * offset_y, action.radius * action.radius):
+                        table[0, center, index] = True
+        table[:, np.arange(len(points)), np.arange(len(points))] = False
+        return table
+
+    def _action_steps(self, boundary_radius: int, resolution: int) -> (np.array, [Point]):
+        """
+        Decode every action number at once, like _interpret_action, and find which are valid.
+        :param boundary_radius: how far from the origin in point space the image reaches
+        :param resolution: int representing how many pixels are in the image space lengthwise
+        :return: int array of shape (resolution**4 * 2,) holding, for each action number, the step it performs encoded
+        as (point1 * len(points) + point2) * 2 + is_line (with point1 < point2 for lines), or -1 if the step is not in
+        self.actions. Also the points the steps are encoded with.
+        """
+        points = self._unique_points()
+        num_pixels = resolution * resolution
+        if len(points) < 2:
+            return np.full(num_pixels * num_pixels * 2, -1, dtype=np.int32), points
+        table = self._valid_step_table(points)
+
+        # Nearest and second nearest point to each pixel, where pixel (x, y) is number x * resolution + y
+        pixels = np.stack(np.meshgrid(np.arange(resolution), np.arange(resolution), indexing='ij'), axis=-1)
+        pixels = self._image_to_point_space(pixels.reshape(-1, 2), boundary_radius, resolution)
+        coordinates = np.array([point.numpy() for point in points], dtype=np.float64)
+        distances = np.linalg.norm(coordinates[np.newaxis, :, :] - pixels[:, np.newaxis, :], axis=-1)
+        nearest = np.argmin(distances, axis=1)
+        distances[np.arange(num_pixels), nearest] = np.inf
+        second_nearest = np.argmin(distances, axis=1)
+
+        # Action numbers are ((point2 pixel * resolution**2 + point1 pixel) << 1) + is_line. Point2 is the nearest
+        # point to its pixel other than point1.
+        point1 = nearest[np.newaxis, :]
+        point2 = np.where(nearest[:, np.newaxis] != point1, nearest[:, np.newaxis], second_nearest[:, np.newaxis])
+        steps = np.empty((num_pixels, num_pixels, 2), dtype=np.int32)
+        circles = point1 * len(points) + point2
+        # The line through point1 and point2 is the same step as the line through point2 and point1
+        lines = np.minimum(point1, point2) * len(points) + np.maximum(point1, point2)
+        steps[..., 0] = np.where(table[0, point1, point2], circles * 2, -1)
+        steps[..., 1] = np.where(table[1, point1, point2], lines * 2 + 1, -1)
+        return steps.reshape(-1), points
+
+    def action_mask(self, boundary_radius: int, resolution: int) -> np.array:
+        """
+        Find the discrete actions (see perform_action) that perform a valid action, i.e. one in self.actions.
+        :param boundary_radius: how far from the origin in point space the image reaches
+        :param resolution: int representing how many pixels are in the image space lengthwise
+        :return: boolean array of shape (resolution**4 * 2,), true for the valid action numbers
+        """
+        return self._action_steps(boundary_radius, resolution)[0] >= 0
+
+    def legal_action_numbers(self, boundary_radius: int, resolution: int) -> np.array:
+        """
+        Find one discrete action for each valid line or circle through a pair of points that some action number
+        performs. The line through point1 and point2 counts once for both orders.
+        :param boundary_radius: how far from the origin in point space the image reaches
+        :param resolution: int representing how many pixels are in the image space lengthwise
+        :return: sorted array of the smallest action number performing each of them
+        """
+        steps, _ = self._action_steps(boundary_radius, resolution)
+        _, first_actions = np.unique(steps, return_index=True)
+        return np.sort(first_actions[steps[first_actions] >= 0])
+
     def update_valid_actions(self, force_calculate=False) -> {Union[Line, Circle]}:
         """
         Finds all the valid actions (lines/circles) that can be drawn on a given self.
@@ -686,12 +974,14 @@ class Construction:
             return (Construction._point_to_image_space(left_point, boundary_radius, resolution),
                     Construction._point_to_image_space(right_point, boundary_radius, resolution))
 
-    def numpy(self, boundary_radius: int, resolution: int, interesting=False) -> np.array:
+    def numpy(self, boundary_radius: int, resolution: int, interesting=False, out: np.array = None) -> np.array:
         """
         Generate a numpy array that encodes the diagram of this self.
         :param boundary_radius: int representing how far from the origin we should generate in both x and y directions
         :param resolution: int representing how many pixels we can use in both the x and y directions
         :param interesting: bool specifying if we only include interesting features in the numpy representation
+        :param out: optional array of shape (3, resolution, resolution) to draw into (after clearing it), instead of
+        allocating a new one
         :return: np.array encoding the self as multiple images. The layers represent the points, lines, circles
         """
 
@@ -705,6 +995,12 @@ class Construction:
             line_set = self.lines
             circle_set = self.circles
 
+        if out is not None:
+            self._numpy_points(boundary_radius, resolution, point_set, out=out[0])
+            self._numpy_lines(boundary_radius, resolution, line_set, out=out[1])
+            self._numpy_circles(boundary_radius, resolution, circle_set, out=out[2])
+            return out
+
         # 1st layer is a grid representing the space. Pixels containing an intersection point has value 1, otherwise 0
         points_array = self._numpy_points(boundary_radius, resolution, point_set)
         # 2nd layer is a grid representing the space. Each pixel has a value equal to number of lines passing through
@@ -715,35 +1011,70 @@ class Construction:
         # Return the layers stacked together
         return np.stack([points_array, lines_array, circles_array])
 
-    def _numpy_points(self, boundary_radius: int, resolution: int, point_set: {Point}) -> np.array:
+    def draw(self, boundary_radius: int, resolution: int, out: np.array, points: {Point} = (), lines: {Line} = (),
+             circles: {Circle} = ()) -> np.array:
+        """
+        Add objects to an array made by numpy, without clearing it. Drawing is additive, so drawing the objects added
+        by a step onto the array from before the step gives the array after it.
+        :param boundary_radius: int representing how far from the origin we should generate in both x and y directions
+        :param resolution: int representing how many pixels we can use in both the x and y directions
+        :param out: array of shape (3, resolution, resolution) to draw into
+        :param points: points to add to the first layer
+        :param lines: lines to add to the second layer
+        :param circles: circles to add to the third layer
+        :return: out
+        """
+        self._numpy_points(boundary_radius, resolution, points, out=out[0], clear=False)
+        self._numpy_lines(boundary_radius, resolution, lines, out=out[1], clear=False)
+        self._numpy_circles(boundary_radius, resolution, circles, out=out[2], clear=False)
+        return out
+
+    @staticmethod
+    def _layer(resolution: int, out: np.array = None, clear: bool = True) -> np.array:
+        """
+        :return: out, cleared unless clear is False, or a new (resolution, resolution) layer if out is None
+        """
+        if out is None:
+            return np.zeros((resolution, resolution), dtype=np.int16)
+        if clear:
+            out.fill(0)
+        return out
+
+    def _numpy_points(self, boundary_radius: int, resolution: int, point_set: {Point},
+                      out: np.array = None, clear: bool = True) -> np.array:
         """
         Generate a numpy array that has only the points in image space.
         :param boundary_radius: int representing how far from the origin we should generate in both x and y directions
         :param resolution: int representing how many pixels we can use in both the x and y directions
         :param point_set: the set of points
+        :param out: optional layer to draw into (after clearing it), instead of allocating a new one
+        :param clear: if False, draw onto out without clearing it first
         :return: numpy array that encodes the points in image space
         """
-        points_array = np.zeros((resolution, resolution), dtype=np.int16)  # Encodes all the intersection points
+        points_array = self._layer(resolution, out, clear)  # Encodes all the intersection points
 
         # 1st layer is a grid representing the space. Pixels containing an intersection point has value 1, otherwise 0
         for point in point_set:
             point_np = self._point_to_image_space(point, boundary_radius, resolution)
             # Check each coordinate. If it's off the screen (i.e. the coordinate is bigger than the resolution), omit
             if point_np[0] >= resolution or point_np[1] >= resolution:
-                break
+                continue
             # Mark the point on the array
             points_array[point_np[0]][point_np[1]] += 1
         return points_array
 
-    def _numpy_lines(self, boundary_radius: int, resolution: int, line_set: {Line}) -> np.array:
+    def _numpy_lines(self, boundary_radius: int, resolution: int, line_set: {Line}, out: np.array = None,
+                     clear: bool = True) -> np.array:
         """
         Generate a numpy array that has only the lines in image space.
         :param boundary_radius: int representing how far from the origin we should generate in both x and y directions
         :param resolution: int representing how many pixels we can use in both the x and y directions
         :param line_set: the set of lines to encode in our image
+        :param out: optional layer to draw into (after clearing it), instead of allocating a new one
+        :param clear: if False, draw onto out without clearing it first
         :return: numpy array that encodes the lines in image space
         """
-        lines_array = np.zeros((resolution, resolution), dtype=np.int16)  # Encodes all the line pixels
+        lines_array = self._layer(resolution, out, clear)  # Encodes all the line pixels
         # 2nd layer is a grid representing the space. Each pixel has a value equal to number of lines passing through
         for line in line_set:
             # point1 = self._point_to_image_space(line.point1, boundary_radius, resolution)
@@ -760,19 +1091,22 @@ class Construction:
             lines_array[rr, cc] += 1
         return lines_array
 
-    def _numpy_circles(self, boundary_radius: int, resolution: int, circle_set: {Circle}) -> np.array:
+    def _numpy_circles(self, boundary_radius: int, resolution: int, circle_set: {Circle},
+                       out: np.array = None, clear: bool = True) -> np.array:
         """
         Generate a numpy array that has only the circles in image space.
         :param boundary_radius: int representing how far from the origin we should generate in both x and y directions
         :param resolution: int representing how many pixels we can use in both the x and y directions
         :param circle_set: the set of circles to encode in our image
+        :param out: optional layer to draw into (after clearing it), instead of allocating a new one
+        :param clear: if False, draw onto out without clearing it first
         :return: numpy array that encodes the circles in image space
         """
-        circles_array = np.zeros((resolution, resolution), dtype=np.int16)  # Encode all circles' pixels
+        circles_array = self._layer(resolution, out, clear)  # Encode all circles' pixels
         for circle in circle_set:
             center = self._point_to_image_space(circle.center, boundary_radius, resolution)
-            radius = round(
-                circle.radius * resolution / (2 * boundary_radius))  # Convert radius to pixel space by scaling
+            # Convert radius to pixel space by scaling. Exact integers from the CAS cannot be rounded directly.
+            radius = round(float(circle.radius) * resolution / (2 * boundary_radius))
             rr, cc = draw.circle_perimeter(center[0], center[1], radius, shape=circles_array.shape)
             circles_array[rr, cc] += 1
         return circles_array
@@ -40,6 +40,7 @@ class Line(Object):
         # self.name = name if name else u'\u0305'.join(f'{point1.name}{point2.name} ')
         self.name = name if name else f'{point1.name}{point2.name}'
         self._simplified = pre_simplified
+        self._key = None
 
     @lru_cache(maxsize=None)
     @staticmethod
@@ -186,6 +187,20 @@ class Line(Object):
             l.dependencies = self.dependencies
             return l
 
+    def key(self) -> str:
+        """
+        Canonical string key of the line. Like equality, the key only depends on the slope and intercept (or the
+        x-coordinate for vertical lines), not on the generating points.
+        :return: string encoding the simplified equation of the line
+        """
+        if getattr(self, '_key', None) is None:
+            line = self.simplify()
+            if line.slope == Infinity:
+                self._key = f'x={sympify(line.point1.simplify().x)}'
+            else:
+                self._key = f'y={sympify(line.slope)}*x+{sympify(line.intercept)}'
+        return self._key
+
     def calculate_value_at_x(self, x) -> Expression:
         if self.slope is not Infinity:
             return self.slope * x + self.intercept
@@ -21,6 +21,7 @@ class Point(Object):
         self.y = simplify(sympify(y))
         self.name = name
         self._simplified = pre_simplified
+        self._key = None
 
     def __eq__(self, other):
         if isinstance(other, Point):
@@ -87,6 +88,36 @@ class Point(Object):
             p.dependencies = self.dependencies
             return p
 
+    def key(self) -> str:
+        """
+        Canonical string key of the point. Unlike the hash, the key is stable across processes and does not depend on
+        whether the coordinates came from sympy or symengine, so it can be sorted, digested, or written to disk. Names
+        and dependencies do not affect the key.
+        :return: string encoding the simplified coordinates of the point
+        """
+        if getattr(self, '_key', None) is None:
+            point = self.simplify()
+            self._key = f'({sympify(point.x)}, {sympify(point.y)})'
+        return self._key
+
+    @classmethod
+    def from_key(cls, key: str, name: str = '') -> 'Point':
+        """
+        Inverse of key.
+        :param key: string returned by Point.key
+        :param name: name of the new point
+        :return: point with the coordinates encoded in the key
+        """
+        depth = 0
+        for index, character in enumerate(key):
+            if character == '(':
+                depth += 1
+            elif character == ')':
+                depth -= 1
+            elif character == ',' and depth == 1:
+                return cls(sympify(key[1:index]), sympify(key[index + 1:-1]), name=name)
+        raise ValueError(f'Not a point key: {key}')
+
 
 class FastPoint(Object):
     def __init__(self, x: Expression = None, y: Expression = None, array: np.ndarray = None, name: str = ''):
@@ -147,6 +178,28 @@ class FastPoint(Object):
         array = np.array(self.array, dtype=np.float16)
         return hash(array.data.tobytes())
 
+    def key(self) -> str:
+        """
+        String key of the point. Like the hash, it rounds the coordinates, so that nearly equal points share a key.
+        :return: string encoding the rounded coordinates of the point
+        """
+        array = np.array(self.array, dtype=np.float16)
+        return f'({array[0]}, {array[1]})'
+
+    @classmethod
+    def from_key(cls, key: str, name: str = '') -> 'FastPoint':
+        """
+        Inverse of key, up to its rounding.
+        :param key: string returned by FastPoint.key
+        :param name: name of the new point
+        :return: point with the rounded coordinates encoded in the key
+        """
+        try:
+            x, y = key[1:-1].split(',')
+            return cls(array=np.array([float(x), float(y)], dtype=np.float32), name=name)
+        except ValueError:
+            raise ValueError(f'Not a point key: {key}')
+
     def numpy(self) -> np.array:
         return self.array
 
@@ -26,8 +26,9 @@ def EquilateralUnitTriangle():
     return construction
 
 
-def RandomConstruction(length, construction_mode=ConstructionMode.DEFAULT):
-    """Generates a random construction of given length. Not included in Euclid, but sometimes useful, nonetheless."""
+def RandomConstruction(length, construction_mode=ConstructionMode.DEFAULT, rng=None):
+    """Generates a random construction of given length. Not included in Euclid, but sometimes useful, nonetheless.
+    The steps are drawn with rng (a random.Random) if given, and the random module otherwise."""
     construction = BaseConstruction(name=f'RandomConstruction_{length}', construction_mode=construction_mode)
-    construction.add_random_construction(length)
+    construction.add_random_construction(length, rng=rng)
     return construction
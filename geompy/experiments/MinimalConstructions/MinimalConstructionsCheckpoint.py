@@ -0,0 +1,168 @@
+"""
+Checkpoints for long-running minimal construction searches.
+
+A checkpoint is a directory holding:
+
+    visited.log      An append-only stream of pickled batches of visited records (constructions or fingerprints). Each
+                     save appends only the records visited since the previous save.
+    state-<n>.pkl    The state of generation n: a pickled dictionary (the point_minimal table, counts, etc.), followed by
+                     the frontier items, pickled one at a time so that neither writing nor reading needs them all as
+                     one object.
+    checkpoint.json  The manifest: for each committed generation, its state file and the length of visited.log when it
+                     was saved.
+
+A save appends to visited.log and writes the new state file under a temporary name, flushing both to disk, then
+atomically replaces the manifest. A crash at any point leaves the previous generation intact: the manifest still points
+at it, and the unreferenced tail of visited.log is truncated when the checkpoint is loaded.
+"""
+import json
+import os
+import pickle
+import time
+from typing import Iterable, List, Optional, Tuple
+
+# Default number of seconds between checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 10 * 60
+# Number of generations to keep. Keeping more than one lets a group of processes that checkpoint separately always
+# agree on a generation that all of them have committed.
+KEEP_GENERATIONS = 2
+
+MANIFEST_NAME = 'checkpoint.json'
+VISITED_LOG_NAME = 'visited.log'
+
+
+def write_json_atomically(path: str, obj) -> None:
+    """
+    Write obj as json to path, so that path holds either the old or the new contents, even after a crash.
+    """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump(obj, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def read_json(path: str, default=None):
+    """
+    :return: the json object stored at path, or default if there is none
+    """
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+
+
+class SearchCheckpoint:
+    """
+    Periodic, incremental checkpoints of a search, stored in a directory.
+    """
+
+    def __init__(self, directory: str, interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        :param directory: directory to store the checkpoint in. It is created if it does not exist.
+        :param interval: number of seconds between checkpoints, as reported by due
+        """
+        self.directory = directory
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = read_json(self._path(MANIFEST_NAME), {'generations': []})
+        self.last_save_time = time.time()
+        # Number of visited records in the generation this checkpoint continues from
+        self.num_visited_saved = self.manifest['generations'][-1]['num_visited'] if self.exists() else 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def exists(self) -> bool:
+        """:return: true if a generation has been committed"""
+        return bool(self.manifest['generations'])
+
+    def due(self) -> bool:
+        """:return: true if at least interval seconds have passed since the last save"""
+        return time.time() - self.last_save_time >= self.interval
+
+    def _committed_visited_length(self) -> int:
+        return self.manifest['generations'][-1]['visited_length'] if self.exists() else 0
+
+    def save(self, frontier: Iterable, new_visited: Iterable, state: dict, generation: int = None) -> None:
+        """
+        Commit a new generation.
+        :param frontier: items that still have to be expanded
+        :param new_visited: visited records added since the last save
+        :param state: any other (picklable) state of the search, e.g. the point_minimal table
+        :param generation: number of the new generation. Defaults to one more than the last one.
+        :return: None
+        """
+        if generation is None:
+            generation = self.manifest['generations'][-1]['generation'] + 1 if self.exists() else 0
+        new_visited = list(new_visited)
+
+        with open(self._path(VISITED_LOG_NAME), 'ab') as visited_log:
+            # Discard anything a crashed save left past the last committed generation
+            visited_log.truncate(self._committed_visited_length())
+            visited_log.seek(0, os.SEEK_END)
+            pickle.dump(new_visited, visited_log)
+            visited_log.flush()
+            os.fsync(visited_log.fileno())
+            visited_length = visited_log.tell()
+
+        state_name = f'state-{generation}.pkl'
+        temporary_path = self._path(state_name + '.tmp')
+        with open(temporary_path, 'wb') as state_file:
+            pickle.dump(state, state_file)
+            for item in frontier:
+                pickle.dump(item, state_file)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+        os.replace(temporary_path, self._path(state_name))
+
+        self.num_visited_saved += len(new_visited)
+        generations = [entry for entry in self.manifest['generations'] if entry['generation'] != generation]
+        generations.append({'generation': generation, 'state_file': state_name, 'visited_length': visited_length,
+                            'num_visited': self.num_visited_saved})
+        self.manifest = {'generations': generations[-KEEP_GENERATIONS:]}
+        write_json_atomically(self._path(MANIFEST_NAME), self.manifest)
+        for entry in generations[:-KEEP_GENERATIONS]:
+            try:
+                os.remove(self._path(entry['state_file']))
+            except FileNotFoundError:
+                pass
+        self.last_save_time = time.time()
+
+    def load(self, generation: int = None) -> Optional[Tuple[List, List, dict]]:
+        """
+        Load a committed generation. Later generations are discarded, so that the search continues from this one.
+        :param generation: generation to load. Defaults to the latest one.
+        :return: the frontier, every visited record, and the state, or None if nothing has been committed
+        """
+        if not self.exists():
+            return None
+        entries = self.manifest['generations']
+        if generation is not None:
+            matching = [position for position, entry in enumerate(entries) if entry['generation'] == generation]
+            if not matching:
+                raise ValueError(f'Generation {generation} is not in the checkpoint at {self.directory}.')
+            entries = entries[:matching[0] + 1]
+        entry = entries[-1]
+
+        visited = []
+        with open(self._path(VISITED_LOG_NAME), 'r+b') as visited_log:
+            visited_log.truncate(entry['visited_length'])
+            while visited_log.tell() < entry['visited_length']:
+                visited.extend(pickle.load(visited_log))
+
+        frontier = []
+        with open(self._path(entry['state_file']), 'rb') as state_file:
+            state = pickle.load(state_file)
+            while True:
+                try:
+                    frontier.append(pickle.load(state_file))
+                except EOFError:
+                    break
+
+        self.manifest = {'generations': entries}
+        write_json_atomically(self._path(MANIFEST_NAME), self.manifest)
+        self.num_visited_saved = entry['num_visited']
+        return frontier, visited, state
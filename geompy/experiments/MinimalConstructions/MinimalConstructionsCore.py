@@ -6,11 +6,17 @@ from geompy import Point
 from geompy.core.Line import Line
 from geompy import Object
 from geompy.core.Construction import ConstructionMode
+from .MinimalConstructionsSymmetry import (symmetric_points, symmetry_orbit, construction_fingerprint,
+                                           SYMMETRY_GROUP)
+from .MinimalConstructionsOrderly import generate_constructions_orderly
+from .MinimalConstructionsCheckpoint import SearchCheckpoint, DEFAULT_CHECKPOINT_INTERVAL
+from geompy.experiments.construction_database import ConstructionDatabase
 
 import copy
+import itertools
 import time
 from queue import Queue
-from typing import List
+from typing import Iterator, List, Sized, Tuple
 
 # Declare some constants
 #point_minimal_construction_length: {Point: int} = {}  # Contain the minimal construction length of each new point
@@ -25,11 +31,13 @@ from typing import List
 results_dir = '../../../results/'
 
 
-def count_unique_constructions(constructions_set, simplify=True):
+def count_unique_constructions(constructions_set, simplify=True, weights: {Construction: int} = None):
     """
     Counts the number of unique constructions of every length in the given constructions set.
     :param simplify:
     :param constructions_set: set containing all of the visited constructions
+    :param weights: optional dictionary whose values are the number of constructions each key stands for (e.g. the
+    orbit sizes from a symmetry-reduced search). If not given, every construction counts once.
     :return:
     """
     if simplify:
@@ -39,10 +47,11 @@ def count_unique_constructions(constructions_set, simplify=True):
 
     for construction in constructions_set:
         length = len(construction)
+        count = weights[construction] if weights is not None else 1
         if length in length_num_unique_dict.keys():
-            length_num_unique_dict[length] += 1
+            length_num_unique_dict[length] += count
         else:
-            length_num_unique_dict[length] = 1
+            length_num_unique_dict[length] = count
 
     return length_num_unique_dict
 
@@ -52,20 +61,37 @@ def simplify_all_constructions_in_set(constructions_set: {Construction}):
 
 
 def check_for_minimal_points(construction: Construction, most_recent_object: Object,
-                             point_minimal_construction_dict: {Point, int}, verbose=False) -> None:
+                             point_minimal_construction_dict: {Point, int}, verbose=False,
+                             reduce_symmetry=False, database: ConstructionDatabase = None) -> None:
     """
     Check the given construction's new points. If the construction is a faster way of generating any point than what is
     stored in point_minimal_construction_dict, then record this one as a faster construction.
 
+    In a symmetry-reduced search, only one construction of each orbit is checked, so every image of a new point under
+    the symmetry group of the base construction is recorded as well.
+
 
     :param construction: the current construction to analyze
     :param most_recent_object: most recent line or circle added to the construction, so we don't have to check all
     points--just the new ones
     :param point_minimal_construction_dict: dictionary to store all the data (as a side effect)
     :param verbose: Bool representing whether diagnostic information should be printed to console
+    :param reduce_symmetry: Bool representing whether the images of the new points should be recorded too
+    :param database: if given, the new points, and their distances to the other points, are recorded in it along with
+    this construction (and, if reduce_symmetry is true, the images of the points along with the images of this
+    construction)
     :return: None
     """
-    for point in construction.update_intersections_with_object(most_recent_object):
+    new_points = construction.update_intersections_with_object(most_recent_object)
+    if database is not None and new_points:
+        database.record_construction(construction, new_points)
+        if reduce_symmetry:
+            # Symmetries preserve distances, so only the points of the images are new
+            for transform in SYMMETRY_GROUP[1:]:
+                database.record_construction(construction, new_points, distances=False, transform=transform)
+    if reduce_symmetry:
+        new_points = {image for point in new_points for image in symmetric_points(point)}
+    for point in new_points:
         if point not in point_minimal_construction_dict.keys():
             point_minimal_construction_dict[point] = len(construction)
             if verbose:
@@ -163,7 +189,7 @@ def construct_helper_dfs(construction: Construction, point_minimal_construction_
 
 
 def print_report(point_minimal_length_dict: {Point: int}, unique_constructions_dict: {int: int},
-                 generated_constructions: List[Construction]):
+                 generated_constructions: Sized):
     # Perform our final report
     print(f'\033[32mMinimal Construction of Points at {time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.localtime())}')
     print(f'\tDiscovered {len(point_minimal_length_dict)} constructed points\033[0m')
@@ -185,12 +211,29 @@ def print_report(point_minimal_length_dict: {Point: int}, unique_constructions_d
     print('\033[0m')
 
 
+def save_bfs_checkpoint(checkpoint: SearchCheckpoint, queue: Queue, generated_constructions_dict: {Construction: int},
+                        point_minimal_construction_length_dict: {Point: int}) -> None:
+    """
+    Save the state of a serial breadth-first search. Only the constructions generated since the last save are written,
+    which works because dictionaries remember their insertion order.
+    """
+    new_constructions = itertools.islice(generated_constructions_dict.items(), checkpoint.num_visited_saved, None)
+    checkpoint.save(list(queue.queue), new_constructions,
+                    {'point_minimal': dict(point_minimal_construction_length_dict)})
+
+
 def generate_constructions_breadth_first_search(queue: Queue, generated_constructions_dict: {Construction: int},
                                                 point_minimal_construction_length_dict: {Point: int},
                                                 max_search_depth: int,
-                                                interesting=True, verbose=False):
+                                                interesting=True, verbose=False, reduce_symmetry=False,
+                                                checkpoint: SearchCheckpoint = None, visited_set=None,
+                                                database: ConstructionDatabase = None) -> {int: int}:
     """
     Runs a breadth-first-search for new points and constructions from the base construction.
+
+    If reduce_symmetry is true, constructions that are mirror images of each other (across line AB or across the
+    perpendicular bisector of AB) are considered the same, and only one representative of each orbit is expanded. The
+    values of generated_constructions_dict are then the sizes of the orbits, so the full counts can be recovered.
     :param queue: Queue that holds the constructions that we need to build off of.
     :param generated_constructions_dict: Dictionary whose keys are previously generated constructions and
     values are ints. This should logically be a set, but since multiprocess does not have a shared set, we can make due
@@ -200,9 +243,23 @@ def generate_constructions_breadth_first_search(queue: Queue, generated_construc
     :param max_search_depth: Maximum depth to search. If a construction is deeper than this, skip.
     :param interesting: Bool representing whether or not constructed objects should be marked interesting
     :param verbose: Bool representing whether or not to include diagnostic information
-    :return:
+    :param reduce_symmetry: Bool representing whether to expand only one construction per symmetry orbit
+    :param checkpoint: if given, the state of the search is saved to it whenever it is due. The queue must then be a
+    queue.Queue, rather than a multiprocessing proxy.
+    :param visited_set: if given, the generated constructions are remembered by adding their fingerprints to this set
+    (see MinimalConstructionsVisited) instead of keeping them in generated_constructions_dict, which is left alone. A
+    probabilistic set, such as a BloomVisitedSet, may cause some constructions to be skipped.
+    :param database: if given, the minimal constructions of points and distances are recorded in it
+    :return: dictionary of the number of constructions of each length that were generated (weighted by orbit size when
+    reducing by symmetry)
     """
+    # Canonical fingerprints of the orbits we have already generated, when searching up to symmetry
+    visited_orbits = {symmetry_orbit(construction)[0] for construction in generated_constructions_dict.keys()} \
+        if reduce_symmetry and visited_set is None else None
+    num_generated: {int: int} = {}
     while not queue.empty():
+        if checkpoint is not None and checkpoint.due():
+            save_bfs_checkpoint(checkpoint, queue, generated_constructions_dict, point_minimal_construction_length_dict)
         queue_construction, new_object = queue.get()
         if verbose:
             print('\033[34m Dequeued:', len(queue_construction), new_object, '\033[0m')
@@ -210,7 +267,8 @@ def generate_constructions_breadth_first_search(queue: Queue, generated_construc
             # If we are too deep, skip this one and move to the next one in queue
             continue
         # Check to see if we have any faster constructions
-        check_for_minimal_points(queue_construction, new_object, point_minimal_construction_length_dict, verbose=False)
+        check_for_minimal_points(queue_construction, new_object, point_minimal_construction_length_dict, verbose=False,
+                                 reduce_symmetry=reduce_symmetry, database=database)
 
         # Generate the new child constructions for the current construction and enqueue them for later checking
         for action in queue_construction.actions:
@@ -222,22 +280,44 @@ def generate_constructions_breadth_first_search(queue: Queue, generated_construc
                       f'Number of actions {len(queue_construction.actions)}',
                       f'Checking {new_object}',
                       '\033[0m')
-            if new_construction not in generated_constructions_dict.keys():
+            if visited_set is not None:
+                fingerprint, weight = symmetry_orbit(new_construction) if reduce_symmetry \
+                    else (construction_fingerprint(new_construction), 1)
+                if fingerprint not in visited_set:
+                    visited_set.add(fingerprint)
+                    num_generated[len(new_construction)] = num_generated.get(len(new_construction), 0) + weight
+                    queue.put((new_construction, new_object))
+            elif reduce_symmetry:
+                orbit, orbit_size = symmetry_orbit(new_construction)
+                if orbit not in visited_orbits:
+                    if verbose:
+                        print(f'\t\033[36mAdding {new_object} to discovery queue (orbit of size {orbit_size})\033[0m')
+                    visited_orbits.add(orbit)
+                    generated_constructions_dict[new_construction] = orbit_size
+                    num_generated[len(new_construction)] = num_generated.get(len(new_construction), 0) + orbit_size
+                    queue.put((new_construction, new_object))
+            elif new_construction not in generated_constructions_dict.keys():
                 if verbose:
                     print(f'\t\033[36mAdding {new_object} to discovery queue\033[0m')
                 generated_constructions_dict[new_construction] = 1
+                num_generated[len(new_construction)] = num_generated.get(len(new_construction), 0) + 1
                 queue.put((new_construction, new_object))
+    return num_generated
 
 
 def run_bfs_in_series(queue: Queue, previously_generated_constructions_dict: {Construction: int},
                       point_minimal_construction_dict: {Point, int}, max_search_depth: int, verbose=False,
-                      report=True, construction_mode=ConstructionMode.DEFAULT) -> None:
+                      report=True, construction_mode=ConstructionMode.DEFAULT, reduce_symmetry=False,
+                      checkpoint_directory: str = None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+                      visited_set=None, database_path: str = None) -> None:
     """
     Runs a breadth-first-search for new points and constructions from the base construction.
     NOTE: This is a serial Breadth-first search. A parallelized version of this search exists in the server file.
 
     :param construction_mode:
     :param report:
+    :param reduce_symmetry: Bool representing whether to expand only one construction per symmetry orbit. The reported
+    counts still include every construction in each orbit.
     :param queue: Queue that holds the constructions that we need to build off of.
     :param previously_generated_constructions_dict: Dictionary whose keys are previously generated constructions and
     values are ints. This should logically be a set, but since multiprocess does not have a shared set, we can make due
@@ -246,31 +326,84 @@ def run_bfs_in_series(queue: Queue, previously_generated_constructions_dict: {Co
     minimal constructions (found so far)
     :param max_search_depth: maximum number of steps to permit in a generated construction
     :param verbose: Bool representing whether or not we should print reports
+    :param checkpoint_directory: if given, the search is checkpointed to this directory every checkpoint_interval
+    seconds, and resumes from the last checkpoint there, if there is one
+    :param checkpoint_interval: number of seconds between checkpoints
+    :param visited_set: if given, the generated constructions are remembered by their fingerprints in this set (e.g. a
+    DiskVisitedSet for searches larger than memory, or a BloomVisitedSet for exploratory searches), rather than in
+    previously_generated_constructions_dict, which then only holds the base construction. Cannot be combined with
+    checkpointing, since the set is not part of a checkpoint.
+    :param database_path: if given, the minimal constructions of every point and distance found are recorded in the
+    ConstructionDatabase at this path
     :return: None
     """
-
-    base_construction = BaseConstruction(construction_mode=construction_mode)
-    previously_generated_constructions_dict[base_construction] = 0  # Put the base construction in our visited_dict
-    queue.put((base_construction, tuple(base_construction.points)[0]))
-    generate_constructions_breadth_first_search(queue, previously_generated_constructions_dict,
-                                                point_minimal_construction_dict,
-                                                max_search_depth, verbose=verbose)
+    if visited_set is not None and checkpoint_directory:
+        raise ValueError('A search with a visited set cannot be checkpointed.')
+    checkpoint = SearchCheckpoint(checkpoint_directory, checkpoint_interval) if checkpoint_directory else None
+    if checkpoint is not None and checkpoint.exists():
+        # Resume where the last checkpoint left off
+        frontier, generated_constructions, state = checkpoint.load()
+        previously_generated_constructions_dict.update(generated_constructions)
+        point_minimal_construction_dict.update(state['point_minimal'])
+        for item in frontier:
+            queue.put(item)
+    else:
+        base_construction = BaseConstruction(construction_mode=construction_mode)
+        # Put the base construction in our visited_dict. When reducing by symmetry, the values are the orbit sizes.
+        previously_generated_constructions_dict[base_construction] = 1 if reduce_symmetry else 0
+        queue.put((base_construction, tuple(base_construction.points)[0]))
+        if visited_set is not None:
+            visited_set.add(symmetry_orbit(base_construction)[0] if reduce_symmetry
+                            else construction_fingerprint(base_construction))
+    database = ConstructionDatabase(database_path, BaseConstruction(construction_mode=construction_mode)) \
+        if database_path else None
+    num_generated = generate_constructions_breadth_first_search(queue, previously_generated_constructions_dict,
+                                                                point_minimal_construction_dict,
+                                                                max_search_depth, verbose=verbose,
+                                                                reduce_symmetry=reduce_symmetry,
+                                                                checkpoint=checkpoint, visited_set=visited_set,
+                                                                database=database)
+    if database is not None:
+        database.close()
+    if checkpoint is not None:
+        save_bfs_checkpoint(checkpoint, queue, previously_generated_constructions_dict, point_minimal_construction_dict)
     # Perform our final report
     # Minimal Construction Length for each point
     point_minimal_construction_dict = dict(point_minimal_construction_dict)
 
-    # Number of unique constructions of each length (categorized)
-    unique_constructions = count_unique_constructions(previously_generated_constructions_dict.keys())
+    if visited_set is not None:
+        # Only the counts are known, since the constructions themselves were not kept
+        unique_constructions = {0: 1, **num_generated}
+        generated_construction_list = range(len(visited_set))
+    else:
+        # Number of unique constructions of each length (categorized)
+        unique_constructions = count_unique_constructions(previously_generated_constructions_dict.keys(),
+                                                          weights=previously_generated_constructions_dict
+                                                          if reduce_symmetry else None)
 
-    # Total number of unique constructions generated (not necessarily categorized by length)
-    generated_construction_list = list(previously_generated_constructions_dict.keys())
+        # Total number of unique constructions generated (not necessarily categorized by length)
+        generated_construction_list = list(previously_generated_constructions_dict.keys())
 
     if report:
         print_report(point_minimal_construction_dict, unique_constructions, generated_construction_list)
+        expected_missed = getattr(visited_set, 'expected_missed', None)
+        if expected_missed is not None:
+            print(f'\033[31mThe visited set is probabilistic: about {expected_missed:.1f} constructions are expected to '
+                  f'have been skipped\033[0m')
 
 
 def find_all_constructions_of_length(max_depth: int, verbose=False, report=True,
-                                     construction_mode=ConstructionMode.DEFAULT):
+                                     construction_mode=ConstructionMode.DEFAULT, reduce_symmetry=False):
+    """
+    Find every unique construction reachable from the base construction, along with the minimal construction length of
+    every point.
+    :param max_depth: maximum number of steps to permit in an expanded construction
+    :param verbose: Bool representing whether or not we should print diagnostic information
+    :param report: Bool representing whether or not we should print the final report
+    :param construction_mode: which tools are permitted
+    :param reduce_symmetry: if true, only one representative of each symmetry orbit is returned
+    :return: set of the unique (simplified) constructions
+    """
     # Declare some constants
     # Contain the minimal construction length of each new point
     point_minimal_construction_length_dict: {Point: int} = {}
@@ -280,11 +413,44 @@ def find_all_constructions_of_length(max_depth: int, verbose=False, report=True,
     # values are dummy, since multiprocessing managers only work with dicts
     generated_constructions_dict: {Construction: int} = {}
     run_bfs_in_series(construction_queue, generated_constructions_dict, point_minimal_construction_length_dict,
-                      max_depth, verbose, report, construction_mode=construction_mode)
+                      max_depth, verbose, report, construction_mode=construction_mode, reduce_symmetry=reduce_symmetry)
     unique_constructions = simplify_all_constructions_in_set(generated_constructions_dict.keys())
     return unique_constructions
 
 
+def stream_unique_construction_counts(max_depth: int, construction_mode=ConstructionMode.DEFAULT,
+                                      verbose=False) -> Iterator[Tuple[int, int, int]]:
+    """
+    Count-only enumeration. Counts the unique constructions of every length, and the points that are first reached at
+    every length, without keeping any of the constructions in memory. Only the keys of the points reached so far are
+    stored, so this can be pushed to depths where storing the set of constructions is impossible.
+
+    The search is an iterative deepening of the orderly enumerator: the pass for each length re-walks the shorter
+    constructions (a small fraction of the work, since the tree grows so quickly) and counts the leaves. This lets us
+    emit exact counts as soon as each length completes.
+
+    :param max_depth: maximum number of steps in a counted construction
+    :param construction_mode: which tools are permitted
+    :param verbose: Bool representing whether or not to print each count as it completes
+    :return: generator of (length, number of unique constructions of that length, number of points whose minimal
+    construction has that length) tuples, in increasing order of length
+    """
+    reached_points: {str} = set()
+    start_time = time.time()
+    for depth in range(max_depth + 1):
+        num_constructions = 0
+        new_points: {str} = set()
+        for construction, _, points in generate_constructions_orderly(depth, construction_mode, interesting=False):
+            if len(construction) == depth:
+                num_constructions += 1
+                new_points.update(key for key in map(Point.key, points) if key not in reached_points)
+        reached_points |= new_points
+        if verbose:
+            print(f'\033[33mSteps: {depth}\tNum Unique Constructions: {num_constructions}\t'
+                  f'New Points: {len(new_points)}\t({time.time() - start_time:.1f}s elapsed)\033[0m')
+        yield depth, num_constructions, len(new_points)
+
+
 if __name__ == '__main__':
     # run_bfs_in_series(construction_job_queue, generated_constructions, point_minimal_construction_length, maximum_depth)
     # find_all_constructions_of_length(maximum_depth)
@@ -0,0 +1,167 @@
+"""
+Orderly generation of constructions.
+
+Many step orderings yield the same construction (see Construction.get_conjugate_constructions, which finds them as the
+topological sorts of the dependency DAG). The breadth-first search generates all of them and relies on its visited dict
+to discard the duplicates. Instead, we can pick one canonical ordering for each construction and only ever generate that
+one, so that every unique construction is produced exactly once, without any global visited set.
+
+The canonical ordering of a set of steps is the greedy topological sort of its dependency DAG: at each position, draw the
+step with the smallest key among the steps whose defining points already exist. Every prefix of a canonical ordering is
+itself canonical, so a child is accepted if and only if its new step is the canonical last step. That is the case when
+the new step's key is larger than the key of every step drawn since the new step first became drawable.
+
+The recorded dependencies of points depend on which intersection happened to produce them first, so rather than reading
+the DAG off of Object.dependencies, we find the earliest position a step could have been drawn from the points
+themselves: a line needs any two of its points, and a circle needs its center and any one of its points.
+"""
+from geompy import Point
+from geompy.cas import equals
+from geompy.core.Line import Line
+from geompy.core.Circle import Circle
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.PrebuiltConstructions import BaseConstruction
+
+import copy
+import math
+from typing import Iterator, Set, Tuple, Union
+
+# Tolerance used to pre-filter incidences numerically before confirming them exactly
+FLOAT_TOLERANCE = 1e-9
+
+
+class OrderlyNode:
+    """
+    A construction whose steps are in canonical order, along with the bookkeeping needed to test its children.
+    births maps the key of every point to the number of steps that had been drawn when the point first appeared.
+    """
+    __slots__ = ('construction', 'step_keys', 'births', 'points', 'coordinates')
+
+    def __init__(self, construction: Construction):
+        self.construction = construction
+        self.step_keys: [str] = [step.key() for step in construction.steps]
+        self.births: {str: int} = {}
+        self.points: {str: Point} = {}
+        self.coordinates: {str: (float, float)} = {}
+        self.add_points(construction.points, 0)
+
+    def add_points(self, points: {Point}, birth: int) -> {Point}:
+        """
+        Record the points that appeared when the birth-th step was drawn.
+        :return: the points that had not been seen before
+        """
+        new_points = set()
+        for point in points:
+            key = point.key()
+            if key not in self.births:
+                self.births[key] = birth
+                self.points[key] = point
+                self.coordinates[key] = (float(point.x), float(point.y))
+                new_points.add(point)
+        return new_points
+
+    def child(self, step: Union[Line, Circle], interesting=True) -> ('OrderlyNode', Union[Line, Circle], {Point}):
+        """
+        Draw step on a copy of this node.
+        :return: the child node and the points that first appeared with step
+        """
+        node = copy.copy(self)
+        node.construction = copy.deepcopy(self.construction)
+        node.step_keys = self.step_keys + [step.key()]
+        node.births = dict(self.births)
+        node.points = dict(self.points)
+        node.coordinates = dict(self.coordinates)
+        new_object = node.construction.add_step_premade(step, interesting=interesting)
+        new_points = node.add_points(node.construction.points, len(node.step_keys))
+        return node, new_object, new_points
+
+    def _earliest_line_position(self, line: Line) -> int:
+        """Number of steps after which two points of line exist."""
+        (x1, y1), (x2, y2) = self.coordinates[line.point1.key()], self.coordinates[line.point2.key()]
+        length = math.hypot(x2 - x1, y2 - y1)
+        births = []
+        for key, (x, y) in self.coordinates.items():
+            distance = abs((x - x1) * (y2 - y1) - (y - y1) * (x2 - x1)) / length
+            if distance < FLOAT_TOLERANCE and self.points[key] in line:
+                births.append(self.births[key])
+        return sorted(births)[1]
+
+    def _earliest_circle_position(self, circle: Circle) -> int:
+        """Number of steps after which the center of circle and a point on circle exist."""
+        center_key = circle.center.key()
+        x0, y0 = self.coordinates[center_key]
+        radius = float(circle.radius)
+        candidates = []
+        for key, (x, y) in self.coordinates.items():
+            if abs(math.hypot(x - x0, y - y0) - radius) < FLOAT_TOLERANCE:
+                candidates.append((self.births[key], key))
+        for birth, key in sorted(candidates):
+            if equals(abs(self.points[key] - circle.center), circle.radius):
+                return max(birth, self.births[center_key])
+        raise ValueError(f'No point of the construction is on {circle}.')
+
+    def earliest_position(self, step: Union[Line, Circle]) -> int:
+        """
+        :param step: a valid action of this node's construction
+        :return: the number of steps after which step could first have been drawn
+        """
+        if isinstance(step, Line):
+            return self._earliest_line_position(step)
+        elif isinstance(step, Circle):
+            return self._earliest_circle_position(step)
+        raise TypeError(f'Cannot find the position of step {step} of type {type(step)}.')
+
+    def is_canonical_last_step(self, step: Union[Line, Circle]) -> bool:
+        """
+        Check whether appending step to this node's canonical ordering gives the canonical ordering of the child.
+        :param step: a valid action of this node's construction
+        :return: true if the child construction should be generated from this node
+        """
+        step_key = step.key()
+        return all(step_key > key for key in self.step_keys[self.earliest_position(step):])
+
+    def canonical_actions(self) -> [Union[Line, Circle]]:
+        """
+        :return: the actions of this node's construction whose children are accepted, one per distinct step
+        """
+        actions = {}
+        for action in self.construction.actions:
+            actions.setdefault(action.key(), action)
+        for step_key in self.step_keys:
+            actions.pop(step_key, None)
+        return [action for key, action in sorted(actions.items()) if self.is_canonical_last_step(action)]
+
+
+def generate_constructions_orderly(max_search_depth: int, construction_mode=ConstructionMode.DEFAULT,
+                                   interesting=True, base: Construction = None) -> \
+        Iterator[Tuple[Construction, Union[Line, Circle, None], Set[Point]]]:
+    """
+    Depth-first, orderly enumeration of constructions. Every unique construction with at most max_search_depth steps
+    is generated exactly once, so no visited set is needed and memory only grows with the depth of the search.
+
+    :param max_search_depth: maximum number of steps to permit in a generated construction
+    :param construction_mode: which tools are permitted, when base is not given
+    :param interesting: Bool representing whether or not constructed objects should be marked interesting
+    :param base: construction to start from. Defaults to the base construction.
+    :return: generator of (construction, most recent step, points that first appeared with that step) tuples. The base
+    construction is generated first, with None as its step.
+    """
+    if base is None:
+        base = BaseConstruction(construction_mode=construction_mode)
+    root = OrderlyNode(base)
+    yield root.construction, None, set(base.points)
+
+    stack = [iter((root,))]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            continue
+        if len(node.step_keys) >= max_search_depth:
+            continue
+        children = []
+        for action in node.canonical_actions():
+            child, new_object, new_points = node.child(action, interesting=interesting)
+            yield child.construction, new_object, new_points
+            children.append(child)
+        stack.append(iter(children))
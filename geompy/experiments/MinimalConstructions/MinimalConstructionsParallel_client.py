@@ -1,18 +1,83 @@
 from geompy import Point, Construction
-from .MinimalConstructionsCore import BaseConstruction, Queue, generate_constructions_breadth_first_search
-from .MinimalConstructionsParallel_server import QueueManager
+from geompy.core.Construction import ConstructionMode
+from .MinimalConstructionsCore import check_for_minimal_points
+from .MinimalConstructionsParallel_server import QueueManager, DEFAULT_LEASE_SIZE
+from .MinimalConstructionsSymmetry import construction_fingerprint, symmetry_orbit
 
+import copy
 from multiprocessing import Process, cpu_count
 
+# Number of leased items to expand between submissions to the server
+SUBMIT_EVERY = 8
+# Seconds to wait for work in a single lease request, when the server has none available
+LEASE_TIMEOUT = 10
 
-def construct_bfs_parallel_processes(job_queue: Queue, initialized_construction_dict: {Construction: int},
-                                     point_minimal_construction_dict: {Point, int}, max_depth: int) -> [Process]:
-    # Initialize processes. Each process will do construct_bfs_parallel.
-    num_processes = cpu_count()  # We want to maximize the process count of each client in our cluster. Use every CPU!
-    processes = [Process(target=generate_constructions_breadth_first_search,
-                         args=(job_queue, initialized_construction_dict,
-                               point_minimal_construction_dict, max_depth,))
-                 for _ in range(num_processes)]
+
+def expand_item(item: (Construction, object), max_search_depth: int, reduce_symmetry: bool,
+                seen_fingerprints: {bytes}, children: [tuple], point_updates: {Point: int},
+                interesting=True) -> None:
+    """
+    Check a frontier item for minimal points and generate its children, skipping any child this client has already
+    generated.
+    :param item: (construction, most recent object) tuple leased from the server
+    :param max_search_depth: maximum depth of the search. Children longer than this are only sent as fingerprints.
+    :param reduce_symmetry: Bool representing whether to fingerprint children by their symmetry orbits
+    :param seen_fingerprints: fingerprints of every child this client has generated (updated as a side effect)
+    :param children: list to append (fingerprint, weight, length, item) tuples to (as a side effect)
+    :param point_updates: dictionary to store minimal construction lengths in (as a side effect)
+    :param interesting: Bool representing whether or not constructed objects should be marked interesting
+    :return: None
+    """
+    construction, most_recent_object = item
+    check_for_minimal_points(construction, most_recent_object, point_updates, reduce_symmetry=reduce_symmetry)
+    for action in construction.actions:
+        new_construction = copy.deepcopy(construction)
+        new_object = new_construction.add_step_premade(action, interesting=interesting)
+        if reduce_symmetry:
+            fingerprint, weight = symmetry_orbit(new_construction)
+        else:
+            fingerprint, weight = construction_fingerprint(new_construction), 1
+        if fingerprint in seen_fingerprints:
+            continue
+        seen_fingerprints.add(fingerprint)
+        length = len(new_construction)
+        new_item = (new_construction, new_object) if length <= max_search_depth else None
+        children.append((fingerprint, weight, length, new_item))
+
+
+def run_client_worker(ip: str, port: int, authkey: bytes, lease_size=DEFAULT_LEASE_SIZE) -> None:
+    """
+    Lease, expand, and submit batches of work until the server's search is finished.
+    """
+    client_manager = make_client_manager(ip, port, authkey)
+    coordinator = client_manager.get_coordinator()
+    max_search_depth, _, reduce_symmetry = coordinator.get_search_parameters()
+    seen_fingerprints: {bytes} = set()
+
+    while True:
+        lease = coordinator.lease(lease_size, LEASE_TIMEOUT)
+        if lease is None:
+            break
+        lease_id, items = lease
+        if not items:
+            continue
+
+        num_done = 0
+        num_items = len(items)
+        while num_done < num_items:
+            children, point_updates = [], {}
+            for item in items[num_done:min(num_done + SUBMIT_EVERY, num_items)]:
+                expand_item(item, max_search_depth, reduce_symmetry, seen_fingerprints, children, point_updates)
+                num_done += 1
+            # The server may have stolen the end of our lease for an idle client
+            num_items = coordinator.submit(lease_id, num_done, children, point_updates)
+
+
+def construct_bfs_parallel_processes(ip: str, port: int, authkey: bytes, num_processes: int = None) -> [Process]:
+    # Initialize processes. Each process connects to the server and runs its own lease loop.
+    # We want to maximize the process count of each client in our cluster. Use every CPU!
+    num_processes = num_processes or cpu_count()
+    processes = [Process(target=run_client_worker, args=(ip, port, authkey)) for _ in range(num_processes)]
     # Start each process
     for process in processes:
         process.start()
@@ -21,13 +86,6 @@ def construct_bfs_parallel_processes(job_queue: Queue, initialized_construction_
 
 def make_client_manager(ip, port, authkey):
     """Create a manager for a client"""
-    # Register the getter functions for queue, max depth, visited, etc...
-    # We need to register these functions so that our client managers can use the shared state data.
-    QueueManager.register('get_queue')
-    QueueManager.register('get_maximum_depth')
-    QueueManager.register('get_visited_dict')
-    # QueueManager.register('get_unique_constructions')
-    QueueManager.register('get_point_minimal')
     client_manager = QueueManager(address=(ip, port), authkey=authkey)
     client_manager.connect()
 
@@ -35,20 +93,10 @@ def make_client_manager(ip, port, authkey):
     return client_manager
 
 
-def run_client() -> [Process]:
-    # Initialize and start the manager
-    # client_manager = make_client_manager('192.168.254.19', 12349, b'1234')
-    client_manager = make_client_manager('localhost', 12349, b'1234')
-
-    # Get our shared data structures
-    job_queue = client_manager.get_queue()
-    point_minimal_construction_dict = client_manager.get_point_minimal()
-    initialized_constructions_dict = client_manager.get_visited_dict()
-    max_depth = client_manager.get_maximum_depth()._getvalue()
-
-    # Initialize the procsesses and start running analysis
-    processes = construct_bfs_parallel_processes(job_queue, initialized_constructions_dict,
-                                                 point_minimal_construction_dict, max_depth)
+def run_client(ip='localhost', port=12349, authkey=b'1234', num_processes: int = None) -> [Process]:
+    # Initialize the processes and start running analysis
+    # run_client('192.168.254.19')
+    processes = construct_bfs_parallel_processes(ip, port, authkey, num_processes)
     return processes
 
 
@@ -0,0 +1,242 @@
+"""
+Level-synchronous, parallel breadth-first search on the cores of a single machine.
+
+The server/client search shares its queue and visited dict through SyncManager proxies, which costs an IPC round trip
+for every get, put, and lookup. Here, nothing is shared. Every worker process owns one shard of the visited set (the
+fingerprints whose hash is congruent to the worker's index), along with the part of the frontier that it discovered.
+Each depth is searched in two phases:
+
+    1. Every worker expands its own frontier, and sends each child to the worker that owns the child's fingerprint, in
+       batches.
+    2. Every worker checks the children it received against its shard of the visited set. The new ones become its
+       frontier for the next depth.
+
+The only messages are the batches of children, so the work is split evenly (by hash) and the workers never wait on
+each other except at the end of each depth, where a barrier keeps the batches of consecutive depths apart.
+
+When checkpointing, every worker saves its shard at the end of every depth, as one generation of its own checkpoint.
+Once all of them have, the first worker records that depth as the one to resume from.
+"""
+from geompy import Point
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from .MinimalConstructionsCore import check_for_minimal_points, print_report
+from .MinimalConstructionsSymmetry import construction_fingerprint, symmetry_orbit
+from .MinimalConstructionsCheckpoint import SearchCheckpoint, read_json, write_json_atomically
+from geompy.experiments.construction_database import ConstructionDatabase
+
+import copy
+import multiprocessing
+import os
+import time
+from typing import Dict, Tuple
+
+# Number of children to accumulate for one worker before sending them
+BATCH_SIZE = 256
+# Name of the file, in the checkpoint directory, that records the last depth every shard has saved
+PROGRESS_NAME = 'progress.json'
+
+
+def fingerprint_owner(fingerprint: bytes, num_workers: int) -> int:
+    """
+    :param fingerprint: fingerprint of a construction
+    :param num_workers: number of shards of the visited set
+    :return: index of the worker whose shard holds fingerprint
+    """
+    return int.from_bytes(fingerprint[:8], 'little') % num_workers
+
+
+def fingerprint_and_weight(construction: Construction, reduce_symmetry: bool) -> (bytes, int):
+    """
+    :return: the fingerprint used to deduplicate construction, and the number of constructions it stands for
+    """
+    if reduce_symmetry:
+        return symmetry_orbit(construction)
+    return construction_fingerprint(construction), 1
+
+
+def bfs_worker(index: int, inboxes: [multiprocessing.Queue], results: multiprocessing.Queue,
+               barrier: multiprocessing.Barrier, max_search_depth: int, construction_mode: ConstructionMode,
+               interesting: bool, reduce_symmetry: bool, checkpoint_directory: str = None,
+               database_path: str = None) -> None:
+    """
+    Search loop of one worker process.
+
+    :param index: index of this worker, which is also the index of its shard and its inbox
+    :param inboxes: one queue per worker, on which the other workers send it batches of children
+    :param results: queue on which the per-depth counts, and finally the minimal points, are reported
+    :param barrier: barrier shared by all of the workers, passed at the end of each depth
+    :param max_search_depth: maximum depth to expand
+    :param construction_mode: which tools are permitted
+    :param interesting: Bool representing whether or not constructed objects should be marked interesting
+    :param reduce_symmetry: Bool representing whether to expand only one construction per symmetry orbit
+    :param checkpoint_directory: if given, the worker saves its shard to a subdirectory of this directory at the end of
+    every depth, and resumes from the last depth that every worker saved
+    :param database_path: if given, the minimal constructions this worker finds are recorded in the ConstructionDatabase
+    at this path, which is committed at the end of every depth
+    :return: None
+    """
+    num_workers = len(inboxes)
+    visited: {bytes} = set()
+    frontier: [(Construction, object)] = []
+    point_minimal_construction_dict: {Point: int} = {}
+    # Everything this worker has reported, so that it can be reported again after resuming: {length: (frontier size,
+    # number of new constructions)}
+    reported: {int: (int, int)} = {}
+
+    checkpoint = SearchCheckpoint(os.path.join(checkpoint_directory, f'shard{index}')) if checkpoint_directory else None
+    progress = read_json(os.path.join(checkpoint_directory, PROGRESS_NAME)) if checkpoint_directory else None
+    if progress is not None:
+        if progress['num_workers'] != num_workers:
+            raise ValueError(f'The checkpoint at {checkpoint_directory} was made by {progress["num_workers"]} '
+                             f'workers, and cannot be resumed by {num_workers}.')
+        start_depth = progress['depth']
+        frontier, visited_fingerprints, state = checkpoint.load(generation=start_depth)
+        visited.update(visited_fingerprints)
+        point_minimal_construction_dict = state['point_minimal']
+        reported = state['reported']
+        for length, (frontier_size, num_new_constructions) in reported.items():
+            results.put((index, length, frontier_size, num_new_constructions))
+    else:
+        start_depth = 0
+        base_construction = BaseConstruction(construction_mode=construction_mode)
+        fingerprint, weight = fingerprint_and_weight(base_construction, reduce_symmetry)
+        if fingerprint_owner(fingerprint, num_workers) == index:
+            visited.add(fingerprint)
+            frontier.append((base_construction, tuple(base_construction.points)[0]))
+            reported[0] = (1, weight)
+            results.put((index, 0, 1, weight))
+
+    database = ConstructionDatabase(database_path, BaseConstruction(construction_mode=construction_mode)) \
+        if database_path else None
+
+    for depth in range(start_depth, max_search_depth + 1):
+        # Phase 1: expand our frontier and route the children to their owners
+        outboxes = [[] for _ in range(num_workers)]
+        for construction, most_recent_object in frontier:
+            check_for_minimal_points(construction, most_recent_object, point_minimal_construction_dict,
+                                     reduce_symmetry=reduce_symmetry, database=database)
+            for action in construction.actions:
+                new_construction = copy.deepcopy(construction)
+                new_object = new_construction.add_step_premade(action, interesting=interesting)
+                fingerprint, weight = fingerprint_and_weight(new_construction, reduce_symmetry)
+                owner = fingerprint_owner(fingerprint, num_workers)
+                outboxes[owner].append((fingerprint, weight, new_construction, new_object))
+                if len(outboxes[owner]) >= BATCH_SIZE:
+                    inboxes[owner].put(outboxes[owner])
+                    outboxes[owner] = []
+        for owner, batch in enumerate(outboxes):
+            if batch:
+                inboxes[owner].put(batch)
+            # An empty batch marks the end of this depth from this worker
+            inboxes[owner].put([])
+        if database is not None:
+            database.commit()
+
+        # Phase 2: deduplicate the children sent to us by every worker (including ourselves)
+        frontier = []
+        new_fingerprints = []
+        num_new_constructions = 0
+        finished_workers = 0
+        while finished_workers < num_workers:
+            batch = inboxes[index].get()
+            if not batch:
+                finished_workers += 1
+                continue
+            for fingerprint, weight, new_construction, new_object in batch:
+                if fingerprint not in visited:
+                    visited.add(fingerprint)
+                    new_fingerprints.append(fingerprint)
+                    frontier.append((new_construction, new_object))
+                    num_new_constructions += weight
+        reported[depth + 1] = (len(frontier), num_new_constructions)
+        results.put((index, depth + 1, len(frontier), num_new_constructions))
+        if checkpoint is not None:
+            checkpoint.save(frontier, new_fingerprints,
+                            {'point_minimal': point_minimal_construction_dict, 'reported': reported},
+                            generation=depth + 1)
+        # Nobody may send children of the next depth until everybody has received all children of this depth
+        barrier.wait()
+        if checkpoint is not None and index == 0:
+            # Every shard has saved this depth. This is written before our children of the next depth are sent, so no
+            # shard can save the next depth (and discard the previous one) before it is written.
+            write_json_atomically(os.path.join(checkpoint_directory, PROGRESS_NAME),
+                                  {'depth': depth + 1, 'num_workers': num_workers})
+
+    if database is not None:
+        database.close()
+    results.put((index, None, point_minimal_construction_dict, None))
+
+
+def run_bfs_in_parallel_locally(max_search_depth: int, num_processes: int = None, verbose=False, report=True,
+                                construction_mode=ConstructionMode.DEFAULT, interesting=True,
+                                reduce_symmetry=False,
+                                checkpoint_directory: str = None,
+                                database_path: str = None) -> Tuple[Dict[Point, int], Dict[int, int]]:
+    """
+    Runs a level-synchronous breadth-first-search for new points and constructions from the base construction, using
+    every core of this machine. This finds the same minimal points and unique construction counts as run_bfs_in_series.
+    As in run_bfs_in_series, the constructions of length max_search_depth + 1 are generated and counted, but not checked.
+
+    :param max_search_depth: maximum number of steps to permit in an expanded construction
+    :param num_processes: number of worker processes. Defaults to the number of CPUs.
+    :param verbose: Bool representing whether or not to print progress after every depth
+    :param report: Bool representing whether or not we should print the final report
+    :param construction_mode: which tools are permitted
+    :param interesting: Bool representing whether or not constructed objects should be marked interesting
+    :param reduce_symmetry: Bool representing whether to expand only one construction per symmetry orbit. The counts
+    still include every construction in each orbit.
+    :param checkpoint_directory: if given, the search is checkpointed to this directory at the end of every depth, and
+    resumes from the last checkpoint there, if there is one. It must be resumed with the same number of processes.
+    :param database_path: if given, every worker records the minimal constructions it finds in the
+    ConstructionDatabase at this path
+    :return: dictionary of the minimal construction length of every point found
+    :return: dictionary of the number of unique constructions of each length
+    """
+    num_processes = num_processes or multiprocessing.cpu_count()
+    inboxes = [multiprocessing.Queue() for _ in range(num_processes)]
+    results = multiprocessing.Queue()
+    barrier = multiprocessing.Barrier(num_processes)
+    processes = [multiprocessing.Process(target=bfs_worker,
+                                         args=(index, inboxes, results, barrier, max_search_depth,
+                                               construction_mode, interesting, reduce_symmetry, checkpoint_directory,
+                                               database_path))
+                 for index in range(num_processes)]
+    for process in processes:
+        process.start()
+
+    start_time = time.time()
+    point_minimal_construction_dict: {Point: int} = {}
+    unique_constructions: {int: int} = {}
+    frontier_sizes: {int: int} = {}
+    reported_workers: {int: int} = {}
+    num_generated = 0
+    finished_workers = 0
+    while finished_workers < num_processes:
+        index, depth, frontier_size, num_new_constructions = results.get()
+        if depth is None:
+            # The worker is done, and frontier_size holds its minimal points
+            for point, length in frontier_size.items():
+                if length < point_minimal_construction_dict.get(point, length + 1):
+                    point_minimal_construction_dict[point] = length
+            finished_workers += 1
+            continue
+        if num_new_constructions:
+            unique_constructions[depth] = unique_constructions.get(depth, 0) + num_new_constructions
+        num_generated += frontier_size
+        frontier_sizes[depth] = frontier_sizes.get(depth, 0) + frontier_size
+        reported_workers[depth] = reported_workers.get(depth, 0) + 1
+        if verbose and depth and reported_workers[depth] == num_processes:
+            print(f'\033[33mSteps: {depth}\tNum Unique Constructions: {unique_constructions.get(depth, 0)}\t'
+                  f'Frontier: {frontier_sizes[depth]}\t({time.time() - start_time:.1f}s elapsed)\033[0m')
+
+    for process in processes:
+        process.join()
+
+    if report:
+        print_report(point_minimal_construction_dict, unique_constructions, range(num_generated))
+    return point_minimal_construction_dict, unique_constructions
+
+
+if __name__ == '__main__':
+    run_bfs_in_parallel_locally(3, verbose=True)
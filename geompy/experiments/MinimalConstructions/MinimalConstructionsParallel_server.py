@@ -1,24 +1,246 @@
-from .MinimalConstructionsCore import (construction_job_queue, point_minimal_construction_length, maximum_depth,
-                                       generated_constructions, Queue, BaseConstruction, results_dir,
-                                       count_unique_constructions, print_report)
+"""
+Server for the distributed breadth-first search.
+
+The server holds a single Coordinator, which owns the frontier, the visited fingerprints, and the results. Clients talk
+to it through a multiprocessing manager, but only a few times per batch of work, rather than once per construction:
+
+    1. A client leases a batch of frontier items.
+    2. It expands them locally, deduplicating the children it generates itself.
+    3. Every few items, it submits the children and point-minimal updates found so far, and learns how many items of the
+       lease it should still expand. If other clients are idle, the coordinator steals the back half of the remaining
+       items and puts them back at the front of the frontier, so that a large lease cannot hold up the search.
+
+The coordinator counts the outstanding work: the items in the frontier plus the leased items that have not been expanded
+yet. The search is finished exactly when that count reaches zero, and anyone waiting on it (idle clients, and the
+server's main loop) is woken up by a condition variable rather than by polling.
+
+If the server is given a checkpoint directory, the coordinator saves the frontier (including every leased item that has
+not been expanded yet), the fingerprints visited since the last checkpoint, and the results, every so often and when the
+server stops. A new server resumes from the last checkpoint in that directory.
+"""
+from geompy import Point
+from geompy.core.Construction import ConstructionMode
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from .MinimalConstructionsCore import results_dir, print_report
+from .MinimalConstructionsSymmetry import construction_fingerprint, symmetry_orbit
+from .MinimalConstructionsCheckpoint import SearchCheckpoint, DEFAULT_CHECKPOINT_INTERVAL
+
+from collections import deque
 from multiprocessing.managers import SyncManager
-import multiprocessing.managers as managers
-from queue import Empty
+import threading
 import time
 import pickle
+from typing import Dict, List, Optional, Tuple
 
+# Number of frontier items that a client leases at once
+DEFAULT_LEASE_SIZE = 64
+# Seconds between progress reports from the server
+REPORT_INTERVAL = 2
 
-# Helper functions for our multiprocessing servers. These are not lambdas, since those are not pickle-able.
-def return_queue(): return construction_job_queue
 
+class Coordinator:
+    """
+    Owns the state of a distributed breadth-first search. Every method is called from the manager's server threads, so
+    the state is guarded by a lock, whose condition is notified whenever the frontier grows or the search finishes.
+
+    Frontier items are (construction, most recent object) tuples. Submitted children are
+    (fingerprint, weight, length, item) tuples, where weight is the number of constructions the child stands for (its
+    orbit size when reducing by symmetry), and item is None for children that are too long to be expanded.
+    """
+
+    def __init__(self, max_search_depth: int, construction_mode=ConstructionMode.DEFAULT, reduce_symmetry=False,
+                 checkpoint_directory: str = None):
+        self.max_search_depth = max_search_depth
+        self.construction_mode = construction_mode
+        self.reduce_symmetry = reduce_symmetry
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+
+        self.frontier = deque()
+        self.visited: {bytes} = set()
+        self.leases: {int: list} = {}
+        self.lease_num_done: {int: int} = {}
+        self.next_lease_id = 0
+        # Number of clients blocked in lease, waiting for work
+        self.num_waiting = 0
+
+        # Items in the frontier plus leased items that have not been expanded. The search is finished when this is 0.
+        self.num_outstanding = 0
+        self.num_expanded = 0
+        self.start_time = time.time()
+
+        self.point_minimal_construction_dict: {str: (Point, int)} = {}
+        self.unique_constructions: {int: int} = {}
+
+        self.checkpoint = SearchCheckpoint(checkpoint_directory) if checkpoint_directory else None
+        # Fingerprints visited since the last checkpoint
+        self.unsaved_fingerprints: [bytes] = []
+        if self.checkpoint is not None and self.checkpoint.exists():
+            frontier, visited, state = self.checkpoint.load()
+            self.frontier.extend(frontier)
+            self.visited.update(visited)
+            self.num_outstanding = len(self.frontier)
+            self.num_expanded = state['expanded']
+            self.point_minimal_construction_dict = state['point_minimal']
+            self.unique_constructions = state['unique_constructions']
+        else:
+            base_construction = BaseConstruction(construction_mode=construction_mode)
+            if reduce_symmetry:
+                fingerprint, weight = symmetry_orbit(base_construction)
+            else:
+                fingerprint, weight = construction_fingerprint(base_construction), 1
+            self._add_child(fingerprint, weight, 0, (base_construction, tuple(base_construction.points)[0]))
+
+    def _add_child(self, fingerprint: bytes, weight: int, length: int, item) -> None:
+        if fingerprint in self.visited:
+            return
+        self.visited.add(fingerprint)
+        if self.checkpoint is not None:
+            self.unsaved_fingerprints.append(fingerprint)
+        self.unique_constructions[length] = self.unique_constructions.get(length, 0) + weight
+        if item is not None and length <= self.max_search_depth:
+            self.frontier.append(item)
+            self.num_outstanding += 1
+
+    def get_search_parameters(self) -> (int, ConstructionMode, bool):
+        """:return: the maximum search depth, construction mode, and whether the search is reduced by symmetry"""
+        return self.max_search_depth, self.construction_mode, self.reduce_symmetry
+
+    def lease(self, max_items: int = DEFAULT_LEASE_SIZE, timeout: float = None) -> Optional[Tuple[int, list]]:
+        """
+        Lease a batch of frontier items from the front of the frontier, waiting for work if there is none. While a
+        client waits, the clients holding leases are asked to give some of their items back.
+        :param max_items: maximum number of items to lease
+        :param timeout: maximum number of seconds to wait for work. None waits until there is work or the search is over.
+        :return: the lease id and the items, with no items if the wait timed out, or None if the search is finished
+        """
+        with self.condition:
+            self.num_waiting += 1
+            try:
+                self.condition.wait_for(lambda: self.frontier or not self.num_outstanding, timeout)
+            finally:
+                self.num_waiting -= 1
+            if not self.num_outstanding:
+                return None
+            if not self.frontier:
+                return -1, []
+            items = [self.frontier.popleft() for _ in range(min(max_items, len(self.frontier)))]
+            lease_id = self.next_lease_id
+            self.next_lease_id += 1
+            self.leases[lease_id] = items
+            self.lease_num_done[lease_id] = 0
+            return lease_id, items
+
+    def submit(self, lease_id: int, num_done: int, children: List[tuple], point_updates: Dict[Point, int]) -> int:
+        """
+        Record the results of expanding the first num_done items of a lease. The lease is closed once every item that
+        the client still holds has been expanded.
+        :param lease_id: id returned by lease
+        :param num_done: number of items of the lease that have been expanded so far
+        :param children: (fingerprint, weight, length, item) tuples of the children generated since the last submit
+        :param point_updates: minimal construction lengths of the points found since the last submit
+        :return: number of items of the lease that the client should expand in total. Any items past this were stolen.
+        """
+        with self.condition:
+            for fingerprint, weight, length, item in children:
+                self._add_child(fingerprint, weight, length, item)
+            for point, length in point_updates.items():
+                key = point.key()
+                if key not in self.point_minimal_construction_dict \
+                        or self.point_minimal_construction_dict[key][1] > length:
+                    self.point_minimal_construction_dict[key] = (point, length)
+
+            items = self.leases[lease_id]
+            num_newly_done = num_done - self.lease_num_done[lease_id]
+            self.lease_num_done[lease_id] = num_done
+            self.num_expanded += num_newly_done
+            self.num_outstanding -= num_newly_done
+
+            remaining = len(items) - num_done
+            if remaining > 1 and self.num_waiting and not self.frontier:
+                # Give the back half of the remaining items to the idle clients
+                keep = num_done + (remaining + 1) // 2
+                self.frontier.extendleft(reversed(items[keep:]))
+                del items[keep:]
+            if num_done >= len(items):
+                del self.leases[lease_id]
+                del self.lease_num_done[lease_id]
+            if self.frontier or not self.num_outstanding:
+                self.condition.notify_all()
+            return len(items)
 
-def return_point_minimal(): return point_minimal_construction_length
+    def is_finished(self) -> bool:
+        """:return: true if there is no outstanding work"""
+        with self.lock:
+            return not self.num_outstanding
 
+    def wait_until_finished(self, timeout: float = None) -> bool:
+        """
+        Block until the search is finished.
+        :param timeout: maximum number of seconds to wait. None waits forever.
+        :return: true if the search is finished
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.num_outstanding, timeout)
 
-def return_maximum_depth(): return maximum_depth
+    def get_progress(self) -> dict:
+        """
+        Snapshot of the search's progress. This only reads counters, so it is cheap no matter how large the search is.
+        :return: dictionary with the number of unique constructions of each length, the number of expanded
+        constructions, the sizes of the frontier and of the outstanding work, the number of open leases, and the number
+        of seconds since the search started
+        """
+        with self.lock:
+            return {'unique_constructions': dict(self.unique_constructions),
+                    'expanded': self.num_expanded,
+                    'frontier': len(self.frontier),
+                    'outstanding': self.num_outstanding,
+                    'leases': len(self.leases),
+                    'elapsed': time.time() - self.start_time}
 
+    def save_checkpoint(self) -> None:
+        """
+        Save the state of the search to the checkpoint directory. Leased items that have not been expanded are saved as
+        part of the frontier, so that they are expanded again if the search is resumed.
+        """
+        with self.lock:
+            frontier = list(self.frontier)
+            for lease_id, items in self.leases.items():
+                frontier.extend(items[self.lease_num_done[lease_id]:])
+            self.checkpoint.save(frontier, self.unsaved_fingerprints,
+                                 {'expanded': self.num_expanded,
+                                  'point_minimal': self.point_minimal_construction_dict,
+                                  'unique_constructions': self.unique_constructions})
+            self.unsaved_fingerprints = []
 
-def return_visited_dict(): return generated_constructions
+    def get_point_minimal(self) -> Dict[Point, int]:
+        """:return: dictionary of the minimal construction length of every point found so far"""
+        with self.lock:
+            return {point: length for point, length in self.point_minimal_construction_dict.values()}
+
+    def get_unique_constructions(self) -> Dict[int, int]:
+        """:return: dictionary of the number of unique constructions of each length found so far"""
+        with self.lock:
+            return dict(self.unique_constructions)
+
+    def get_num_generated(self) -> int:
+        """:return: total number of unique constructions found so far"""
+        with self.lock:
+            return len(self.visited)
+
+
+# The coordinator of the server process. It is created in the manager's process by initialize_coordinator.
+coordinator: Coordinator = None
+
+
+def initialize_coordinator(max_search_depth: int, construction_mode: ConstructionMode, reduce_symmetry: bool,
+                           checkpoint_directory: str = None) -> None:
+    global coordinator
+    coordinator = Coordinator(max_search_depth, construction_mode, reduce_symmetry, checkpoint_directory)
+
+
+# Helper functions for our multiprocessing servers. These are not lambdas, since those are not pickle-able.
+def return_coordinator(): return coordinator
 
 
 class QueueManager(SyncManager):
@@ -27,91 +249,83 @@ class QueueManager(SyncManager):
     pass
 
 
-def make_server_manager(port, authkey):
-    """Create a manager for the server, listening on the given port."""
-    # Register the getter functions for queue, max depth, visited, etc...
-    # We need to register these functions so that our client managers can use the shared state data.
-    QueueManager.register('get_queue', return_queue)
-    QueueManager.register('get_maximum_depth', return_maximum_depth)
-    QueueManager.register('get_visited_dict', return_visited_dict, managers.DictProxy)
-    QueueManager.register('get_point_minimal', return_point_minimal, managers.DictProxy)
+# Register the getter for the coordinator, so that our client managers can use the shared state.
+QueueManager.register('get_coordinator', return_coordinator)
 
+
+def make_server_manager(port, authkey, max_search_depth: int, construction_mode=ConstructionMode.DEFAULT,
+                        reduce_symmetry=False, checkpoint_directory: str = None):
+    """Create a manager for the server, listening on the given port."""
     # Create the server manager and start
     # Bind to all addresses, so address is empty string
     server_manager = QueueManager(address=('', port), authkey=authkey)
-    server_manager.start()
-    print(f'Server started at port {port}')
+    server_manager.start(initialize_coordinator,
+                         (max_search_depth, construction_mode, reduce_symmetry, checkpoint_directory))
+    print(f'Server started at port {server_manager.address[1]}')
     return server_manager
 
 
-def run_bfs_in_parallel():
-    manager = make_server_manager(12349, b'1234')
-    # Reference the shared queues and dicts.
-    check_construction_job_queue = manager.get_queue()
-    dict_point_minimal_construction_length = manager.get_point_minimal()
-    generated_constructions_dict = manager.get_visited_dict()
-    maximum_search_depth = manager.get_maximum_depth()
+def print_progress(progress: dict, last_progress: dict) -> None:
+    """
+    Print one line of progress from two snapshots of Coordinator.get_progress.
+    """
+    elapsed = progress['elapsed'] - last_progress['elapsed']
+    nodes_per_second = (progress['expanded'] - last_progress['expanded']) / elapsed if elapsed else 0
+    counts = ' '.join(f'{length}:{count}' for length, count in sorted(progress['unique_constructions'].items()))
+    print(f'\033[33m[{progress["elapsed"]:.0f}s] Unique constructions by length {counts}\t'
+          f'Expanded: {progress["expanded"]} ({nodes_per_second:.1f}/s)\tFrontier: {progress["frontier"]}\t'
+          f'Outstanding: {progress["outstanding"]}\tLeases: {progress["leases"]}\033[0m')
 
-    # Define Construction
-    base_construction = BaseConstruction()
-    check_construction_job_queue.put((base_construction, tuple(base_construction.points)[0]))
 
-    # run_client()
+def run_bfs_in_parallel(max_search_depth: int = 3, port=12349, authkey=b'1234',
+                        construction_mode=ConstructionMode.DEFAULT, reduce_symmetry=False, report=True,
+                        save=True, checkpoint_directory: str = None,
+                        checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL) -> Tuple[Dict[Point, int], Dict[int, int]]:
+    """
+    Serve a distributed breadth-first search until the clients have finished it.
+    :param checkpoint_directory: if given, the search is checkpointed to this directory every checkpoint_interval
+    seconds and when the server stops, and resumes from the last checkpoint there, if there is one
+    :param checkpoint_interval: number of seconds between checkpoints
+    :return: dictionary of the minimal construction length of every point found
+    :return: dictionary of the number of unique constructions of each length
+    """
+    manager = make_server_manager(port, authkey, max_search_depth, construction_mode, reduce_symmetry,
+                                  checkpoint_directory)
+    search_coordinator = manager.get_coordinator()
 
-    # Set up the loop that will wait and print progress until completed
+    # Wait until completed, printing progress every so often
     start_time = time.time()
-    most_recent_time = time.time()
-    last_print_time = time.time()
-    empty = check_construction_job_queue.empty()
-
     cut_off_time = 5 * 60 * 60  # 5 hr = 5 * 60 min/hr * 60 sec/min
-
-    while most_recent_time - start_time <= cut_off_time:
-        if most_recent_time - last_print_time > 2:
-            unique_constructions = count_unique_constructions(generated_constructions_dict.keys())
-            print_report(dict_point_minimal_construction_length, unique_constructions,
-                         generated_constructions_dict.keys())
-            if empty and check_construction_job_queue.empty():
-                # If the queue is empty and has been for 2 seconds, go ahead and cancel it, since I can't find a
-                # cleaner way of stopping.
-                break
-            else:
-                empty = check_construction_job_queue.empty()
-
-            last_print_time = time.time()
-        most_recent_time = time.time()
+    last_checkpoint_time = start_time
+    last_progress = search_coordinator.get_progress()
+    while not search_coordinator.wait_until_finished(REPORT_INTERVAL):
+        progress = search_coordinator.get_progress()
+        if report:
+            print_progress(progress, last_progress)
+        last_progress = progress
+        if checkpoint_directory and time.time() - last_checkpoint_time >= checkpoint_interval:
+            search_coordinator.save_checkpoint()
+            last_checkpoint_time = time.time()
+        if time.time() - start_time > cut_off_time:
+            break
+    # Whether or not the search finished, keep its state, so that it can be resumed or extended
+    if checkpoint_directory:
+        search_coordinator.save_checkpoint()
 
     # Perform our final report
-    # Minimal Construction Length for each point
-    dict_point_minimal_construction_length = dict(dict_point_minimal_construction_length)
-    # Number of unique constructions of each length (categorized)
-    unique_constructions = count_unique_constructions(generated_constructions_dict.keys())
-    # Total number of unique constructions generated (not necessarily categorized by length)
-    generated_construction_list = list(generated_constructions_dict.keys())
-
-    print_report(dict_point_minimal_construction_length, unique_constructions, generated_construction_list)
-
-    # Save the generated list to disc.
-    with open(results_dir + 'visited_constructions.pkl', 'wb') as visited_constructions_file:
-        pickle.dump(generated_construction_list, visited_constructions_file)
-
-    # Save the job queue (for future analysis)
-    try:
-        with open(results_dir + 'queue.pkl', 'wb') as construction_queue_file:
-            pickle.dump(check_construction_job_queue._getvalue(), construction_queue_file)
-    except:
-        pass
-
-    # Empty the job queue
-    item = True
-    while item:
-        try:
-            item = check_construction_job_queue.get(block=False)
-        except Empty:
-            break
+    point_minimal_construction_dict = search_coordinator.get_point_minimal()
+    unique_constructions = search_coordinator.get_unique_constructions()
+    if report:
+        print_report(point_minimal_construction_dict, unique_constructions,
+                     range(search_coordinator.get_num_generated()))
+
+    # Save the results to disc.
+    if save:
+        with open(results_dir + 'point_minimal_constructions.pkl', 'wb') as point_minimal_file:
+            pickle.dump((point_minimal_construction_dict, unique_constructions), point_minimal_file)
 
-    time.sleep(2)
     manager.shutdown()
+    return point_minimal_construction_dict, unique_constructions
 
 
 if __name__ == '__main__':
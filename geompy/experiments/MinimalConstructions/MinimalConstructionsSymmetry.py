@@ -0,0 +1,112 @@
+"""
+Fingerprints and symmetry reduction for the minimal constructions search.
+
+The base construction places A=(0, 0) and B=(1, 0). Its symmetry group is the Klein four-group generated by the
+reflection across line AB and the reflection across the perpendicular bisector of AB (which swaps A and B). Their
+composition is the half turn about the midpoint of AB. Constructions in the same orbit of this group are equivalent for
+counting and minimal-length purposes, so a search only needs to expand one representative of each orbit.
+"""
+from geompy import Point
+from geompy.core.Line import Line
+from geompy.core.Circle import Circle
+from geompy.core.Construction import Construction
+
+from hashlib import blake2b
+from typing import Callable, Union
+
+# Number of bytes in a construction fingerprint. 16 bytes makes accidental collisions astronomically unlikely, while
+# still being small enough to store millions of them.
+FINGERPRINT_SIZE = 16
+
+
+def identity(point: Point) -> Point:
+    return point
+
+
+def reflect_across_ab(point: Point) -> Point:
+    """Reflect a point across line AB (the x-axis)."""
+    return Point(point.x, -point.y, name=point.name)
+
+
+def reflect_across_perpendicular_bisector(point: Point) -> Point:
+    """Reflect a point across the perpendicular bisector of AB (the line x=1/2). This swaps A and B."""
+    return Point(1 - point.x, point.y, name=point.name)
+
+
+def rotate_half_turn(point: Point) -> Point:
+    """Rotate a point a half turn about the midpoint of AB. This is the composition of both reflections."""
+    return Point(1 - point.x, -point.y, name=point.name)
+
+
+# The symmetry group of the base construction. The identity comes first.
+SYMMETRY_GROUP = (identity, reflect_across_ab, reflect_across_perpendicular_bisector, rotate_half_turn)
+
+
+def transform_step(step: Union[Line, Circle], transform: Callable[[Point], Point]) -> Union[Line, Circle]:
+    """
+    Apply a transformation of the plane to a line or circle.
+    :param step: line or circle to transform
+    :param transform: an element of SYMMETRY_GROUP
+    :return: the image of step under transform
+    """
+    if transform is identity:
+        return step
+    if isinstance(step, Line):
+        return Line(transform(step.point1), transform(step.point2))
+    elif isinstance(step, Circle):
+        return Circle(center=transform(step.center), radius=step.radius)
+    raise TypeError(f'Cannot transform step {step} of type {type(step)}.')
+
+
+def symmetric_points(point: Point) -> {Point}:
+    """
+    :param point: any point
+    :return: the orbit of point under the symmetry group of the base construction
+    """
+    return {transform(point) for transform in SYMMETRY_GROUP}
+
+
+def fingerprint_from_keys(step_keys) -> bytes:
+    """
+    Digest a collection of step keys into a fixed-size fingerprint. The order of the keys does not matter.
+    :param step_keys: iterable of strings from Line.key/Circle.key
+    :return: FINGERPRINT_SIZE bytes
+    """
+    digest = blake2b(digest_size=FINGERPRINT_SIZE)
+    digest.update('\n'.join(sorted(step_keys)).encode())
+    return digest.digest()
+
+
+def construction_fingerprint(construction: Construction) -> bytes:
+    """
+    Fixed-size fingerprint of a construction. Like equality of constructions, it only depends on the set of steps, so
+    conjugate constructions share a fingerprint. Unlike the hash, it is stable across processes.
+    :param construction: construction to fingerprint
+    :return: FINGERPRINT_SIZE bytes
+    """
+    return fingerprint_from_keys(step.key() for step in construction.steps_set)
+
+
+def symmetry_orbit(construction: Construction) -> (bytes, int):
+    """
+    Find the canonical fingerprint of a construction's orbit under the symmetry group, along with the orbit's size.
+    The canonical fingerprint is the smallest fingerprint of any construction in the orbit, so every member of the
+    orbit gets the same one.
+    :param construction: construction built on the base construction
+    :return: canonical fingerprint of the orbit
+    :return: number of distinct constructions in the orbit
+    """
+    fingerprints = {fingerprint_from_keys(transform_step(step, transform).key() for step in construction.steps_set)
+                    for transform in SYMMETRY_GROUP}
+    return min(fingerprints), len(fingerprints)
+
+
+def canonical_fingerprint(construction: Construction, reduce_symmetry=True) -> bytes:
+    """
+    :param construction: construction to fingerprint
+    :param reduce_symmetry: if true, all constructions in the same orbit under the symmetry group share a fingerprint
+    :return: FINGERPRINT_SIZE bytes
+    """
+    if reduce_symmetry:
+        return symmetry_orbit(construction)[0]
+    return construction_fingerprint(construction)
@@ -0,0 +1,278 @@
+"""
+Visited sets for searches too large to keep every Construction in memory.
+
+The breadth-first search normally remembers the constructions it has generated as the keys of a dict. A visited set
+remembers only their fingerprints (see MinimalConstructionsSymmetry), and supports the two operations the search needs:
+`fingerprint in visited_set` and `visited_set.add(fingerprint)`. A plain python set of fingerprints is the in-memory
+version.
+
+A BloomVisitedSet is much smaller than either, at the price of occasionally claiming that a new construction was
+visited already. That construction (and everything only reachable through it) is then skipped, so it is meant for
+exploratory searches, and it estimates how many constructions were missed.
+"""
+from .MinimalConstructionsSymmetry import FINGERPRINT_SIZE
+
+from hashlib import blake2b
+import math
+import mmap
+import os
+import struct
+import time
+
+# Header of a DiskVisitedSet file: magic, fingerprint size, capacity (in slots), number of fingerprints
+HEADER = struct.Struct('<8sQQQ')
+MAGIC = b'GEOVSET1'
+# The table is doubled when it is fuller than this
+MAX_LOAD_FACTOR = 0.5
+
+
+class DiskVisitedSet:
+    """
+    Set of fixed-size fingerprints stored in a memory-mapped file, as an open-addressing hash table with linear probing.
+    The slots are the fingerprints themselves, and an all-zero slot is empty, so the all-zero fingerprint cannot be
+    stored. Since fingerprints are already uniformly distributed, their first bytes serve as the hash.
+
+    Siblings in a search share most of their children, so most repeated lookups are of recently seen fingerprints. Those
+    are answered from an in-memory front cache, which is simply cleared whenever it fills up.
+
+    The operating system pages the table in and out, so the set can be much larger than memory, and it persists between
+    runs: opening an existing file continues with its contents.
+    """
+
+    def __init__(self, path: str, initial_capacity: int = 1 << 20, cache_size: int = 1 << 16,
+                 fingerprint_size: int = FINGERPRINT_SIZE):
+        """
+        :param path: file to store the table in. If it exists, its fingerprints are kept.
+        :param initial_capacity: number of slots of a new table. Rounded up to a power of two.
+        :param cache_size: maximum number of fingerprints in the front cache
+        :param fingerprint_size: number of bytes in each fingerprint
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.cache: {bytes} = set()
+        self.empty_slot = bytes(fingerprint_size)
+        if os.path.exists(path):
+            self._open()
+            if self.fingerprint_size != fingerprint_size:
+                raise ValueError(f'{path} holds fingerprints of {self.fingerprint_size} bytes, not {fingerprint_size}.')
+        else:
+            capacity = 1
+            while capacity < initial_capacity:
+                capacity *= 2
+            self._create(path, capacity, fingerprint_size)
+            self._open()
+
+    @staticmethod
+    def _create(path: str, capacity: int, fingerprint_size: int) -> None:
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, fingerprint_size, capacity, 0))
+            file.truncate(HEADER.size + capacity * fingerprint_size)
+
+    def _open(self) -> None:
+        self.file = open(self.path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, self.fingerprint_size, self.capacity, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{self.path} is not a visited set.')
+        self.mask = self.capacity - 1
+
+    def _find_slot(self, fingerprint: bytes) -> (int, bool):
+        """
+        :return: offset of the slot holding fingerprint, or of the empty slot where it belongs
+        :return: true if the fingerprint is in the table
+        """
+        size = self.fingerprint_size
+        index = int.from_bytes(fingerprint[:8], 'little') & self.mask
+        while True:
+            offset = HEADER.size + index * size
+            slot = self.map[offset:offset + size]
+            if slot == fingerprint:
+                return offset, True
+            if slot == self.empty_slot:
+                return offset, False
+            index = (index + 1) & self.mask
+
+    def _remember(self, fingerprint: bytes) -> None:
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache.add(fingerprint)
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        if fingerprint in self.cache:
+            return True
+        if self._find_slot(fingerprint)[1]:
+            self._remember(fingerprint)
+            return True
+        return False
+
+    def add(self, fingerprint: bytes) -> bool:
+        """
+        :param fingerprint: fingerprint to add
+        :return: true if the fingerprint was not in the set before
+        """
+        if fingerprint in self.cache:
+            return False
+        if fingerprint == self.empty_slot:
+            raise ValueError('The all-zero fingerprint marks empty slots, and cannot be stored.')
+        if (self.count + 1) > self.capacity * MAX_LOAD_FACTOR:
+            self._grow()
+        offset, found = self._find_slot(fingerprint)
+        self._remember(fingerprint)
+        if found:
+            return False
+        self.map[offset:offset + self.fingerprint_size] = fingerprint
+        self.count += 1
+        HEADER.pack_into(self.map, 0, MAGIC, self.fingerprint_size, self.capacity, self.count)
+        return True
+
+    def _grow(self) -> None:
+        """Rehash into a table twice the size, then swap it in for the current one."""
+        size = self.fingerprint_size
+        new_path = self.path + '.tmp'
+        self._create(new_path, self.capacity * 2, size)
+        old_map, old_file, old_capacity = self.map, self.file, self.capacity
+        self.path, path = new_path, self.path
+        self._open()
+        for index in range(old_capacity):
+            offset = HEADER.size + index * size
+            fingerprint = old_map[offset:offset + size]
+            if fingerprint != self.empty_slot:
+                new_offset = self._find_slot(fingerprint)[0]
+                self.map[new_offset:new_offset + size] = fingerprint
+                self.count += 1
+        HEADER.pack_into(self.map, 0, MAGIC, size, self.capacity, self.count)
+        old_map.close()
+        old_file.close()
+        self.flush()
+        os.replace(new_path, path)
+        self.path = path
+
+    def __len__(self) -> int:
+        return self.count
+
+    def flush(self) -> None:
+        """Write the table to disk."""
+        self.map.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class BloomVisitedSet:
+    """
+    Bloom filter of fingerprints. Each fingerprint sets num_hashes bits of a bit array, and is considered visited if all
+    of its bits are set. Since fingerprints are already uniformly distributed, the bit positions are derived from the
+    fingerprint itself by double hashing.
+
+    At a 1% false-positive rate this takes under 10 bits per fingerprint, compared to around 100 bytes for a fingerprint
+    in a python set.
+    """
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01):
+        """
+        :param expected_items: number of fingerprints the filter is sized for. The false-positive rate is only reached if
+        no more than this many are added.
+        :param false_positive_rate: probability that a new fingerprint is considered visited, once the filter is full
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f'The false-positive rate must be between 0 and 1, not {false_positive_rate}.')
+        self.expected_items = max(expected_items, 1)
+        self.false_positive_rate = false_positive_rate
+        self.num_bits = math.ceil(-self.expected_items * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / self.expected_items * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        # Expected number of new fingerprints that were wrongly considered visited so far
+        self.expected_missed = 0.0
+
+    def _bit_positions(self, fingerprint: bytes):
+        first = int.from_bytes(fingerprint[:8], 'little')
+        second = int.from_bytes(fingerprint[8:16], 'little') | 1
+        return ((first + i * second) % self.num_bits for i in range(self.num_hashes))
+
+    def current_false_positive_rate(self) -> float:
+        """:return: the probability that a new fingerprint is considered visited, given how full the filter is"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._bit_positions(fingerprint))
+
+    def add(self, fingerprint: bytes) -> bool:
+        """
+        :param fingerprint: fingerprint to add
+        :return: true if the fingerprint was not considered visited before
+        """
+        # Each fingerprint that gets added had to survive a lookup that a new fingerprint fails with the current
+        # false-positive rate, so for every one added, rate / (1 - rate) others are expected to have been missed.
+        rate = self.current_false_positive_rate()
+        added = False
+        for position in self._bit_positions(fingerprint):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+            self.expected_missed += rate / (1 - rate)
+        return added
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self.bits.__sizeof__()
+
+
+def benchmark_lookups(visited_sets: dict, num_fingerprints: int = 100000, num_lookups: int = 100000) -> {str: dict}:
+    """
+    Measure the insertion and lookup throughput of several visited sets. Half of the lookups are of fingerprints in the
+    set, in random order, so that the front cache of a DiskVisitedSet only helps as much as it would in a search with
+    poor locality.
+    :param visited_sets: dictionary of name: empty visited set. A dict is filled with fingerprints as its keys.
+    :param num_fingerprints: number of fingerprints to insert
+    :param num_lookups: number of lookups to time
+    :return: dictionary of name: {'inserts/s': ..., 'lookups/s': ..., 'found': number of lookups that were in the set}
+    """
+    def fingerprint(number: int) -> bytes:
+        return blake2b(number.to_bytes(8, 'little'), digest_size=FINGERPRINT_SIZE).digest()
+
+    inserted = [fingerprint(number) for number in range(num_fingerprints)]
+    # Every other lookup is of a fingerprint that was never inserted
+    lookups = [fingerprint(number * 7919 % num_fingerprints if number % 2 else num_fingerprints + number)
+               for number in range(num_lookups)]
+    results = {}
+    for name, visited_set in visited_sets.items():
+        start_time = time.perf_counter()
+        for item in inserted:
+            if isinstance(visited_set, dict):
+                visited_set[item] = 1
+            else:
+                visited_set.add(item)
+        insert_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        num_found = sum(item in visited_set for item in lookups)
+        lookup_time = time.perf_counter() - start_time
+        results[name] = {'inserts/s': num_fingerprints / insert_time, 'lookups/s': num_lookups / lookup_time,
+                         'found': num_found}
+    return results
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        disk_visited_set = DiskVisitedSet(os.path.join(directory, 'visited.bin'), initial_capacity=1 << 10)
+        benchmark = benchmark_lookups({'dict': {}, 'set': set(), 'disk': disk_visited_set,
+                                       'bloom': BloomVisitedSet(100000)})
+        disk_visited_set.close()
+    for name, throughput in benchmark.items():
+        print(f'{name:>6}: {throughput["inserts/s"]:12,.0f} inserts/s {throughput["lookups/s"]:12,.0f} lookups/s')
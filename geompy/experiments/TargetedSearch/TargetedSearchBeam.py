@@ -0,0 +1,179 @@
+"""
+Beam search for constructions of given targets that are too deep to search exhaustively.
+
+At each depth, only the beam_width best scoring constructions are kept and expanded. Scores are the estimates of a
+Heuristic from TargetedSearchBestFirst, so lower is better. To keep the beam from filling up with near copies of one
+construction, children are filtered for diversity: no two members of the beam (at any depth) may share a fingerprint,
+and optionally each parent may only contribute a few children.
+
+Scoring the children of the beam is the expensive part, so the beam is split over a pool of processes. Each process
+receives a beam member, and returns the score, fingerprint and action of each of its children; only the children that
+make it into the next beam are built.
+
+Beam search is not exhaustive, so a construction it finds is not necessarily a shortest one, and it may miss targets
+that are reachable. In exchange, its cost only grows linearly with depth.
+"""
+from geompy.cas import sqrt
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.sqrt_finder import sqrt_base_construction
+from .TargetedSearchCore import ConstructionTargets, INFINITY
+from .TargetedSearchBestFirst import BestFirstSearch, Heuristic, MaxHeuristic, NearestPointHeuristic, \
+    NestingHeuristic
+
+from collections import Counter
+import copy
+from multiprocessing import Pool, cpu_count
+from typing import Optional
+
+# The search used by score_children in each process of the pool
+worker_search: BestFirstSearch = None
+
+
+def initialize_beam_worker(targets: ConstructionTargets, base: Construction, heuristic: Heuristic) -> None:
+    """Set up the search used by score_children in this process."""
+    global worker_search
+    worker_search = BestFirstSearch(targets, base, heuristic=heuristic)
+
+
+def score_children(construction: Construction) -> [(float, bytes, object, bool)]:
+    """
+    :param construction: member of the beam
+    :return: (score, fingerprint, action, true if it satisfies the targets) of every child of construction
+    """
+    search = worker_search
+    node = search.node_from_construction(construction)
+    children = []
+    for action in construction.actions:
+        child = search.child(node, action)
+        children.append((search.heuristic.estimate(search, child, child.heuristic_state), child.fingerprint, action,
+                         search.is_goal(child)))
+    return children
+
+
+class BeamSearch:
+    """
+    Beam search for a construction that satisfies some targets. The counters record how much work the last search did.
+    """
+
+    def __init__(self, targets: ConstructionTargets, base: Construction = None,
+                 construction_mode=ConstructionMode.DEFAULT, heuristic: Heuristic = None, beam_width: int = 100,
+                 max_children_per_parent: int = None, num_processes: int = None):
+        """
+        :param targets: points, lengths and lines to construct
+        :param base: construction to start from. Defaults to the base construction.
+        :param construction_mode: which tools are permitted, when base is not given
+        :param heuristic: scoring function. Defaults to the larger of the nesting and nearest point heuristics.
+        :param beam_width: number of constructions kept at each depth
+        :param max_children_per_parent: maximum number of children of any one construction kept in the next beam.
+        Unlimited by default.
+        :param num_processes: number of processes to score the beam with. Defaults to the number of CPUs. With one
+        process, everything runs in this process.
+        """
+        self.targets = targets
+        self.base = base if base is not None else BaseConstruction(construction_mode=construction_mode)
+        self.heuristic = heuristic if heuristic is not None else MaxHeuristic(NestingHeuristic(),
+                                                                              NearestPointHeuristic())
+        self.beam_width = beam_width
+        self.max_children_per_parent = max_children_per_parent
+        self.num_processes = num_processes or cpu_count()
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+
+    def select(self, scored_children: [[(float, bytes, object, bool)]], seen_fingerprints: {bytes}) -> [(int, object)]:
+        """
+        Choose the next beam from the scored children of the current one.
+        :param scored_children: score_children of each member of the beam
+        :param seen_fingerprints: fingerprints of every construction that was in a beam (updated as a side effect)
+        :return: (index of the parent in the beam, action) of each member of the next beam, best first
+        """
+        # Ties are broken by fingerprint rather than the order of the actions, which varies between processes, so that
+        # searches are reproducible
+        candidates = sorted(((score, fingerprint, parent_index, action)
+                             for parent_index, children in enumerate(scored_children)
+                             for score, fingerprint, action, _ in children if score != INFINITY),
+                            key=lambda candidate: candidate[:3])
+        selected = []
+        num_children = Counter()
+        for _, fingerprint, parent_index, action in candidates:
+            if fingerprint in seen_fingerprints:
+                continue
+            if self.max_children_per_parent is not None and \
+                    num_children[parent_index] >= self.max_children_per_parent:
+                continue
+            seen_fingerprints.add(fingerprint)
+            num_children[parent_index] += 1
+            selected.append((parent_index, action))
+            if len(selected) >= self.beam_width:
+                break
+        return selected
+
+    @staticmethod
+    def build(parent: Construction, action) -> Construction:
+        construction = copy.deepcopy(parent)
+        construction.add_step_premade(action, interesting=True)
+        return construction
+
+    def search(self, max_depth: int) -> Optional[Construction]:
+        """
+        :param max_depth: maximum number of steps to add to the base
+        :return: a construction that satisfies the targets, or None if none was found
+        """
+        self.nodes_expanded = self.nodes_generated = 0
+        initialize_beam_worker(self.targets, self.base, self.heuristic)
+        root = worker_search.root()
+        if worker_search.is_goal(root):
+            return root.construction
+        seen_fingerprints = {root.fingerprint}
+        beam = [root.construction]
+
+        pool = Pool(self.num_processes, initializer=initialize_beam_worker,
+                    initargs=(self.targets, self.base, self.heuristic)) if self.num_processes > 1 else None
+        try:
+            for _ in range(max_depth):
+                if pool is not None:
+                    chunk_size = max(1, len(beam) // (4 * self.num_processes))
+                    scored_children = pool.map(score_children, beam, chunksize=chunk_size)
+                else:
+                    scored_children = [score_children(construction) for construction in beam]
+                self.nodes_expanded += len(beam)
+                for parent_index, children in enumerate(scored_children):
+                    self.nodes_generated += len(children)
+                    for _, _, action, is_goal in children:
+                        if is_goal:
+                            return self.build(beam[parent_index], action)
+                beam = [self.build(beam[parent_index], action)
+                        for parent_index, action in self.select(scored_children, seen_fingerprints)]
+                if not beam:
+                    break
+        finally:
+            if pool is not None:
+                pool.terminate()
+        return None
+
+
+def find_sqrt_construction(num_sqrt: int, beam_width: int = 100, max_depth: int = 12,
+                           max_children_per_parent: int = None, num_processes: int = None) -> Optional[Construction]:
+    """
+    Beam search for a segment of length sqrt(num_sqrt), from the same base construction as sqrt_finder.construct.
+    :param num_sqrt: number whose square root to construct
+    :param beam_width: number of constructions kept at each depth
+    :param max_depth: maximum number of steps
+    :param max_children_per_parent: maximum number of children of any one construction kept in the next beam
+    :param num_processes: number of processes to score the beam with
+    :return: the construction, or None if none was found
+    """
+    search = BeamSearch(ConstructionTargets(target_lengths=[sqrt(num_sqrt)]), sqrt_base_construction(num_sqrt),
+                        beam_width=beam_width, max_children_per_parent=max_children_per_parent,
+                        num_processes=num_processes)
+    return search.search(max_depth)
+
+
+if __name__ == '__main__':
+    import time
+
+    for n in range(2, 8):
+        start_time = time.perf_counter()
+        construction = find_sqrt_construction(n, beam_width=50, max_children_per_parent=5)
+        print(f'sqrt({n}): {len(construction) if construction is not None else None} steps in '
+              f'{time.perf_counter() - start_time:.1f}s')
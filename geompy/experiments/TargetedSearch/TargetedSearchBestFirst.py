@@ -0,0 +1,384 @@
+"""
+Best-first (A*) search for constructions of given targets.
+
+The frontier is a priority queue ordered by f = g + weight * h, where g is the number of steps and h is a heuristic
+estimate of the number of steps still needed. With an admissible heuristic (one that never overestimates) and a weight
+of 1 this is A*, and the first construction found is a shortest one. Inadmissible heuristics, or larger weights, trade
+that guarantee for expanding far fewer nodes.
+
+Generating a child only costs the new step: its intersections with the parent's objects are computed directly, the
+targets and the heuristic are updated from the new points alone, and its fingerprint comes from the parent's step keys.
+The Construction itself is only built (copied from the parent and extended by the step) if the child is ever expanded,
+which most children never are.
+"""
+from geompy import Point
+from geompy.core.Circle import Circle
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.Line import Line
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.MinimalConstructions.MinimalConstructionsSymmetry import fingerprint_from_keys
+from .TargetedSearchCore import ConstructionTargets, point_nesting_depth, INFINITY
+
+import copy
+import heapq
+import itertools
+import math
+import time
+from typing import Iterable, Optional, Union
+
+
+def step_intersections(construction: Construction, step: Union[Line, Circle]) -> {Point}:
+    """
+    :param construction: a construction
+    :param step: a line or circle that is not yet in construction
+    :return: the intersections of step with every line and circle of construction. The construction is not modified.
+    """
+    intersections: {Point} = set()
+    for line in construction.lines:
+        if isinstance(step, Line):
+            intersections.update(Construction.find_intersections_line_line(step, line))
+        else:
+            intersections.update(Construction.find_intersections_line_circle(line, step))
+    for circle in construction.circles:
+        if isinstance(step, Line):
+            intersections.update(Construction.find_intersections_line_circle(step, circle))
+        else:
+            intersections.update(Construction.find_intersections_circle_circle(step, circle))
+    return intersections
+
+
+class BestFirstNode:
+    """A search node whose construction is only built when it is expanded."""
+    __slots__ = ('parent', 'action', 'depth', 'construction', 'points', 'coordinates', 'new_points', 'line_keys',
+                 'step_keys', 'fingerprint', 'satisfied', 'nesting_depth', 'heuristic_state')
+
+    def get_construction(self, interesting=True) -> Construction:
+        """
+        Build the construction of this node from its parent's, if it has not been built yet.
+        :param interesting: Bool representing whether or not constructed objects should be marked interesting
+        :return: the construction
+        """
+        if self.construction is None:
+            self.construction = copy.deepcopy(self.parent.get_construction(interesting))
+            self.construction.add_step_premade(self.action, interesting=interesting)
+            # The parent is no longer needed, so let it go once its other children are expanded too
+            self.parent = None
+        return self.construction
+
+
+class Heuristic:
+    """
+    Estimates the number of steps a node still needs to satisfy the targets. The base class always estimates zero,
+    which makes the search a uniform-cost search: with unit steps, it expands nodes in breadth-first order.
+
+    A heuristic may keep incremental state for each node. update is called once when a node is generated, with the
+    state of its parent (None for the root) and the points the node's last step added. estimate is called with the
+    state update returned.
+    """
+
+    def update(self, search: 'BestFirstSearch', node: BestFirstNode, parent_state, new_points: Iterable[Point]):
+        """:return: the state of node"""
+        return None
+
+    def estimate(self, search: 'BestFirstSearch', node: BestFirstNode, state) -> float:
+        """:return: estimated number of steps needed to satisfy every target from node"""
+        return 0
+
+
+class NestingHeuristic(Heuristic):
+    """
+    The admissible lower bound from the nesting depth of square roots in the targets (see TargetedSearchCore). Each
+    step adds at most one level of nesting, so this is also consistent, and A* with it finds shortest constructions.
+    """
+
+    def estimate(self, search: 'BestFirstSearch', node: BestFirstNode, state) -> float:
+        return search.targets.lower_bound(node.satisfied, node.nesting_depth, search.construction_mode)
+
+
+class NearestPointHeuristic(Heuristic):
+    """
+    Estimates steps from how far the construction is from each unsatisfied target: the distance from the nearest point
+    to a target point, the difference between the nearest distance between two points and a target length, or the
+    distance of the second nearest point from a target line (a line needs two points). The largest of these, scaled
+    by steps_per_unit, is the estimate. Distance says little about the number of steps, so this is not admissible, but
+    it steers the search towards the targets.
+    """
+
+    def __init__(self, steps_per_unit: float = 1.0):
+        """
+        :param steps_per_unit: number of steps each unit of distance is estimated to take
+        """
+        self.steps_per_unit = steps_per_unit
+
+    @staticmethod
+    def _line_coefficients(line: Line) -> (float, float, float):
+        x1, y1, x2, y2 = float(line.point1.x), float(line.point1.y), float(line.point2.x), float(line.point2.y)
+        a, b = y2 - y1, x1 - x2
+        norm = math.hypot(a, b)
+        return a / norm, b / norm, -(a * x1 + b * y1) / norm
+
+    def update(self, search: 'BestFirstSearch', node: BestFirstNode, parent_state, new_points: Iterable[Point]):
+        targets = search.targets
+        if parent_state is None:
+            point_gaps = [INFINITY] * len(targets.points)
+            length_gaps = [INFINITY] * len(targets.lengths)
+            line_gaps = [(INFINITY, INFINITY)] * len(targets.lines)
+        else:
+            point_gaps, length_gaps, line_gaps = map(list, parent_state)
+        new_coordinates = [node.coordinates[point.key()] for point in new_points]
+        for index, target in enumerate(targets.points):
+            x0, y0 = float(target.x), float(target.y)
+            for x, y in new_coordinates:
+                point_gaps[index] = min(point_gaps[index], math.hypot(x - x0, y - y0))
+        for index, value in enumerate(targets.length_values):
+            for x0, y0 in new_coordinates:
+                for x, y in node.coordinates.values():
+                    distance = math.hypot(x - x0, y - y0)
+                    if distance:
+                        length_gaps[index] = min(length_gaps[index], abs(distance - value))
+        for index, line in enumerate(targets.lines):
+            a, b, c = self._line_coefficients(line)
+            for x, y in new_coordinates:
+                nearest, second = line_gaps[index]
+                distance = abs(a * x + b * y + c)
+                if distance < nearest:
+                    nearest, second = distance, nearest
+                elif distance < second:
+                    second = distance
+                line_gaps[index] = (nearest, second)
+        return tuple(point_gaps), tuple(length_gaps), tuple(line_gaps)
+
+    def estimate(self, search: 'BestFirstSearch', node: BestFirstNode, state) -> float:
+        point_gaps, length_gaps, line_gaps = state
+        gaps = list(point_gaps) + list(length_gaps) + [second for _, second in line_gaps]
+        return max((gap * self.steps_per_unit for index, gap in enumerate(gaps) if index not in node.satisfied),
+                   default=0)
+
+
+class MaxHeuristic(Heuristic):
+    """The largest estimate of several heuristics. It is admissible if all of them are."""
+
+    def __init__(self, *heuristics: Heuristic):
+        self.heuristics = heuristics
+
+    def update(self, search: 'BestFirstSearch', node: BestFirstNode, parent_state, new_points: Iterable[Point]):
+        parent_states = parent_state if parent_state is not None else (None,) * len(self.heuristics)
+        return tuple(heuristic.update(search, node, state, new_points)
+                     for heuristic, state in zip(self.heuristics, parent_states))
+
+    def estimate(self, search: 'BestFirstSearch', node: BestFirstNode, state) -> float:
+        return max(heuristic.estimate(search, node, substate) for heuristic, substate in zip(self.heuristics, state))
+
+
+class BestFirstSearch:
+    """
+    Best-first search for a construction that satisfies some targets. The counters record how much work the last
+    search did.
+    """
+
+    def __init__(self, targets: ConstructionTargets, base: Construction = None,
+                 construction_mode=ConstructionMode.DEFAULT, heuristic: Heuristic = None, weight: float = 1.0):
+        """
+        :param targets: points, lengths and lines to construct
+        :param base: construction to start from. Defaults to the base construction.
+        :param construction_mode: which tools are permitted, when base is not given
+        :param heuristic: estimate of the number of steps still needed. Defaults to the admissible NestingHeuristic.
+        :param weight: factor applied to the heuristic. Larger weights search greedily.
+        """
+        self.targets = targets
+        self.base = base if base is not None else BaseConstruction(construction_mode=construction_mode)
+        self.construction_mode = self.base.construction_mode
+        self.heuristic = heuristic if heuristic is not None else NestingHeuristic()
+        self.weight = weight
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+
+    def root(self) -> BestFirstNode:
+        return self.node_from_construction(copy.deepcopy(self.base))
+
+    def node_from_construction(self, construction: Construction) -> BestFirstNode:
+        """
+        :param construction: construction built on this search's base. It becomes part of the node, so it should not
+        be modified afterwards.
+        :return: an expanded node of the construction, computed from scratch
+        """
+        node = BestFirstNode()
+        node.parent = node.action = None
+        node.depth = len(construction) - len(self.base)
+        node.construction = construction
+        node.points = {point.key(): point for point in construction.points}
+        node.coordinates = {key: (float(point.x), float(point.y)) for key, point in node.points.items()}
+        node.new_points = list(node.points.values())
+        node.line_keys = frozenset(line.key() for line in construction.lines)
+        node.step_keys = frozenset(step.key() for step in construction.steps_set)
+        node.fingerprint = fingerprint_from_keys(node.step_keys)
+        node.nesting_depth = max((point_nesting_depth(point) for point in node.points.values()), default=0)
+        node.satisfied = self.targets.satisfied_by(node.points, node.coordinates, node.new_points, frozenset(),
+                                                   node.line_keys)
+        node.heuristic_state = self.heuristic.update(self, node, None, node.new_points)
+        return node
+
+    def child(self, parent: BestFirstNode, action: Union[Line, Circle]) -> BestFirstNode:
+        """
+        :param parent: an expanded node
+        :param action: a valid action of parent's construction
+        :return: the (unbuilt) node of parent's construction with action drawn
+        """
+        node = BestFirstNode()
+        node.parent, node.action, node.depth, node.construction = parent, action, parent.depth + 1, None
+        node.points = dict(parent.points)
+        node.coordinates = dict(parent.coordinates)
+        node.nesting_depth = parent.nesting_depth
+        node.new_points = []
+        for point in step_intersections(parent.construction, action):
+            key = point.key()
+            if key not in node.points:
+                node.points[key] = point
+                node.coordinates[key] = (float(point.x), float(point.y))
+                node.nesting_depth = max(node.nesting_depth, point_nesting_depth(point))
+                node.new_points.append(point)
+        action_key = action.key()
+        node.line_keys = parent.line_keys | {action_key} if isinstance(action, Line) else parent.line_keys
+        node.step_keys = parent.step_keys | {action_key}
+        node.fingerprint = fingerprint_from_keys(node.step_keys)
+        node.satisfied = self.targets.satisfied_by(node.points, node.coordinates, node.new_points, parent.satisfied,
+                                                   node.line_keys)
+        node.heuristic_state = self.heuristic.update(self, node, parent.heuristic_state, node.new_points)
+        return node
+
+    def is_goal(self, node: BestFirstNode) -> bool:
+        return len(node.satisfied) == len(self.targets)
+
+    def search(self, max_depth: int = None, max_expansions: int = None) -> Optional[Construction]:
+        """
+        :param max_depth: maximum number of steps to add to the base. Unlimited by default.
+        :param max_expansions: give up after expanding this many nodes. Unlimited by default.
+        :return: a construction that satisfies the targets (a shortest one, if the heuristic is admissible and the
+        weight is 1), or None if none was found
+        """
+        self.nodes_expanded = self.nodes_generated = 0
+        root = self.root()
+        if self.is_goal(root):
+            return root.construction
+        # Fewest steps any node with a given fingerprint was reached in
+        best_depths: {bytes: int} = {root.fingerprint: 0}
+        # Ties are broken towards deeper nodes, then first come first served
+        counter = itertools.count()
+        frontier = [(0, 0, next(counter), root)]
+        while frontier:
+            _, _, _, node = heapq.heappop(frontier)
+            if best_depths[node.fingerprint] < node.depth:
+                # Reached in fewer steps since this was queued
+                continue
+            if max_expansions is not None and self.nodes_expanded >= max_expansions:
+                break
+            self.nodes_expanded += 1
+            for action in node.get_construction().actions:
+                child = self.child(node, action)
+                self.nodes_generated += 1
+                if self.is_goal(child):
+                    return child.get_construction()
+                if max_depth is not None and child.depth >= max_depth:
+                    continue
+                if best_depths.get(child.fingerprint, INFINITY) <= child.depth:
+                    continue
+                best_depths[child.fingerprint] = child.depth
+                estimate = self.heuristic.estimate(self, child, child.heuristic_state)
+                if estimate == INFINITY or max_depth is not None and child.depth + estimate > max_depth:
+                    continue
+                heapq.heappush(frontier, (child.depth + self.weight * estimate, -child.depth, next(counter), child))
+        return None
+
+
+def find_construction_best_first(target_points: Iterable[Point] = (), target_lengths: Iterable = (),
+                                 target_lines: Iterable[Line] = (), base: Construction = None,
+                                 heuristic: Heuristic = None, weight: float = 1.0, max_depth: int = None,
+                                 max_expansions: int = None,
+                                 construction_mode=ConstructionMode.DEFAULT) -> Optional[Construction]:
+    """
+    Find a construction that contains every target point, a segment of every target length, and every target line.
+    :param target_points: points to construct
+    :param target_lengths: exact lengths to construct, as expressions or strings
+    :param target_lines: lines to construct
+    :param base: construction to start from. Defaults to the base construction.
+    :param heuristic: estimate of the number of steps still needed. Defaults to the admissible NestingHeuristic.
+    :param weight: factor applied to the heuristic. Larger weights search greedily.
+    :param max_depth: maximum number of steps to add to the base. Unlimited by default.
+    :param max_expansions: give up after expanding this many nodes. Unlimited by default.
+    :param construction_mode: which tools are permitted, when base is not given
+    :return: the construction, or None if none was found
+    """
+    search = BestFirstSearch(ConstructionTargets(target_points, target_lengths, target_lines), base, construction_mode,
+                             heuristic, weight)
+    return search.search(max_depth, max_expansions)
+
+
+def euclid_targets() -> {str: (Construction, ConstructionTargets)}:
+    """
+    Targets taken from the Euclid macros of Construction, each on the base construction with segment AB drawn:
+        EuclidI1: the equilateral triangle on AB (its apex and its two other sides)
+        EuclidI10: the midpoint of AB
+        EuclidI31: the parallel to AB through (0, 1), which is also given
+    :return: dictionary of name: (base, targets)
+    """
+    def base_with_segment(*extra_points: Point) -> Construction:
+        construction = BaseConstruction()
+        a, b = sorted(construction.points, key=lambda point: float(point.x))
+        construction.ab = construction.add_line(a, b, counts_as_step=False)
+        for point in extra_points:
+            construction.add_point(point)
+        return construction
+
+    targets = {}
+    base = base_with_segment()
+    scratch = copy.deepcopy(base)
+    a, b = scratch.ab.point1, scratch.ab.point2
+    c = scratch.EuclidI1(scratch.ab, Point(1, 1))
+    targets['EuclidI1'] = (base, ConstructionTargets([c], target_lines=[Line(a, c), Line(b, c)]))
+
+    scratch = copy.deepcopy(base)
+    targets['EuclidI10'] = (base, ConstructionTargets([scratch.EuclidI10(scratch.ab)]))
+
+    given = Point(0, 1)
+    base = base_with_segment(given)
+    scratch = copy.deepcopy(base)
+    targets['EuclidI31'] = (base, ConstructionTargets(target_lines=[scratch.EuclidI31(scratch.ab, given)]))
+    return targets
+
+
+def benchmark_against_breadth_first(heuristics: {str: (Heuristic, float)} = None,
+                                    targets: {str: (Construction, ConstructionTargets)} = None,
+                                    max_depth: int = 6) -> {str: {str: dict}}:
+    """
+    Search each target with each heuristic, and with the zero heuristic, which expands in breadth-first order.
+    :param heuristics: dictionary of name: (heuristic, weight). Defaults to the heuristics in this module.
+    :param targets: dictionary of name: (base, targets). Defaults to euclid_targets().
+    :param max_depth: maximum number of steps to add to each base
+    :return: dictionary of target name: heuristic name: {'length': ..., 'expanded': ..., 'generated': ...,
+    'seconds': ...}. The length is None if nothing was found.
+    """
+    if heuristics is None:
+        heuristics = {'nesting': (NestingHeuristic(), 1.0),
+                      'nearest': (NearestPointHeuristic(), 1.0),
+                      'nesting+nearest': (MaxHeuristic(NestingHeuristic(), NearestPointHeuristic(2.0)), 1.5)}
+    heuristics = {'breadth-first': (Heuristic(), 1.0), **heuristics}
+    targets = targets if targets is not None else euclid_targets()
+    results = {}
+    for target_name, (base, construction_targets) in targets.items():
+        results[target_name] = {}
+        for heuristic_name, (heuristic, weight) in heuristics.items():
+            search = BestFirstSearch(construction_targets, base, heuristic=heuristic, weight=weight)
+            start_time = time.perf_counter()
+            construction = search.search(max_depth)
+            results[target_name][heuristic_name] = {
+                'length': len(construction) if construction is not None else None,
+                'expanded': search.nodes_expanded, 'generated': search.nodes_generated,
+                'seconds': time.perf_counter() - start_time}
+    return results
+
+
+if __name__ == '__main__':
+    for target_name, target_results in benchmark_against_breadth_first().items():
+        for heuristic_name, result in target_results.items():
+            print(f'{target_name:>10} {heuristic_name:>16}: length {result["length"]} '
+                  f'{result["expanded"]:7} expanded {result["generated"]:8} generated {result["seconds"]:8.2f}s')
@@ -0,0 +1,266 @@
+"""
+Search for the shortest construction of given target points, lengths and lines.
+
+The minimal constructions search enumerates everything up to some depth. When we only care about a few targets, we can
+stop at the first construction that contains all of them, and skip the branches that cannot reach them in time.
+
+The lower bounds come from the nesting depth of square roots. Call the layer of a number the fewest nested square roots
+it can be written with. The coordinates of the intersection of two objects drawn through points of layer at most H
+solve a quadratic equation whose coefficients have layer at most H, so they have layer at most H + 1. Hence every step
+raises the largest layer of the points in a construction by at most one, a target point of layer m needs at least
+m - H more steps, and a target length needs at least m - H - 1 (the distance between two points of layer H can already
+have layer H + 1). Lines alone never raise the layer at all, and a root that is not a square root (of a square root...)
+is never constructible. The layers are read off of the expressions, which is exact as long as the targets are given
+fully denested.
+"""
+from geompy import Point
+from geompy.core.Line import Line
+from geompy.cas import equals, simplify, sympify
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.MinimalConstructions.MinimalConstructionsSymmetry import construction_fingerprint
+
+import copy
+import math
+from typing import Iterable, Optional
+
+from symengine import Pow
+
+INFINITY = math.inf
+# Tolerance used to pre-filter lengths numerically before confirming them exactly
+FLOAT_TOLERANCE = 1e-9
+
+
+def sqrt_nesting_depth(expression) -> float:
+    """
+    :param expression: exact expression
+    :return: number of nested square roots in expression, or infinity if it contains any other kind of root, since
+    then it is not constructible
+    """
+    expression = sympify(expression)
+    depth = max((sqrt_nesting_depth(argument) for argument in expression.args), default=0)
+    if isinstance(expression, Pow):
+        exponent = expression.args[1]
+        if exponent.is_Rational and not exponent.is_integer:
+            _, denominator = exponent.get_num_den()
+            denominator = int(denominator)
+            if denominator & (denominator - 1):
+                return INFINITY
+            return sqrt_nesting_depth(expression.args[0]) + denominator.bit_length() - 1
+    return depth
+
+
+def point_nesting_depth(point: Point) -> float:
+    """:return: the number of nested square roots in the coordinates of point"""
+    return max(sqrt_nesting_depth(point.x), sqrt_nesting_depth(point.y))
+
+
+class ConstructionTargets:
+    """
+    The points, lengths and lines that a construction should contain. Targets are numbered: first the points, then the
+    lengths, then the lines.
+    """
+
+    def __init__(self, target_points: Iterable[Point] = (), target_lengths: Iterable = (),
+                 target_lines: Iterable[Line] = ()):
+        self.points = list(target_points)
+        self.point_keys = [point.key() for point in self.points]
+        self.lengths = [simplify(sympify(length)) for length in target_lengths]
+        self.length_values = [float(length) for length in self.lengths]
+        self.lines = list(target_lines)
+        self.line_keys = [line.key() for line in self.lines]
+        # A line only needs one more step once two of its points are constructed, so it gets no bound beyond that
+        self.depths = [point_nesting_depth(point) for point in self.points] + \
+                      [sqrt_nesting_depth(length) - 1 for length in self.lengths] + [0] * len(self.lines)
+
+    def __len__(self) -> int:
+        return len(self.points) + len(self.lengths) + len(self.lines)
+
+    def satisfied_by(self, points: {str: Point}, coordinates: {str: (float, float)}, new_points: Iterable[Point],
+                     satisfied: frozenset, line_keys: {str} = frozenset()) -> frozenset:
+        """
+        :param points: every point of the construction, by key
+        :param coordinates: float coordinates of every point of the construction, by key
+        :param new_points: the points that the last step added
+        :param satisfied: the targets satisfied before the last step
+        :param line_keys: keys of every line of the construction
+        :return: the targets satisfied after the last step
+        """
+        newly_satisfied = {index for index, key in enumerate(self.point_keys)
+                           if index not in satisfied and key in points}
+        newly_satisfied.update(index for index, key in enumerate(self.line_keys,
+                                                                 start=len(self.points) + len(self.lengths))
+                               if index not in satisfied and key in line_keys)
+        for index, (length, value) in enumerate(zip(self.lengths, self.length_values), start=len(self.points)):
+            if index in satisfied:
+                continue
+            for new_point in new_points:
+                x0, y0 = coordinates[new_point.key()]
+                if any(abs(math.hypot(x - x0, y - y0) - value) < FLOAT_TOLERANCE
+                       and equals(abs(points[key] - new_point), length)
+                       for key, (x, y) in coordinates.items()):
+                    newly_satisfied.add(index)
+                    break
+        return satisfied | newly_satisfied if newly_satisfied else satisfied
+
+    def lower_bound(self, satisfied: frozenset, nesting_depth: float, construction_mode: ConstructionMode) -> float:
+        """
+        :param satisfied: the targets that the construction already satisfies
+        :param nesting_depth: the largest number of nested square roots in the coordinates of the construction's points
+        :param construction_mode: which tools are permitted
+        :return: a lower bound on the number of steps needed to satisfy every target
+        """
+        bound = 0
+        for index, depth in enumerate(self.depths):
+            if index in satisfied:
+                continue
+            needed = depth - nesting_depth
+            if needed > 0 and construction_mode == ConstructionMode.LINES_ONLY:
+                # Lines never raise the nesting depth
+                return INFINITY
+            bound = max(bound, 1, needed)
+        return bound
+
+
+class SearchNode:
+    """A construction, along with the bookkeeping needed to check targets incrementally."""
+    __slots__ = ('construction', 'points', 'coordinates', 'line_keys', 'satisfied', 'nesting_depth')
+
+    def __init__(self, construction: Construction, targets: ConstructionTargets):
+        self.construction = construction
+        self.points: {str: Point} = {point.key(): point for point in construction.points}
+        self.coordinates: {str: (float, float)} = {key: (float(point.x), float(point.y))
+                                                    for key, point in self.points.items()}
+        self.line_keys = frozenset(line.key() for line in construction.lines)
+        self.nesting_depth = max((point_nesting_depth(point) for point in self.points.values()), default=0)
+        self.satisfied = targets.satisfied_by(self.points, self.coordinates, self.points.values(), frozenset(),
+                                              self.line_keys)
+
+    def child(self, action, targets: ConstructionTargets, interesting=True) -> 'SearchNode':
+        """
+        :param action: a valid action of this node's construction
+        :param targets: the targets of the search
+        :param interesting: Bool representing whether or not constructed objects should be marked interesting
+        :return: the node of the construction with action drawn
+        """
+        node = copy.copy(self)
+        node.construction = copy.deepcopy(self.construction)
+        node.construction.add_step_premade(action, interesting=interesting)
+        if isinstance(action, Line):
+            node.line_keys = self.line_keys | {action.key()}
+        node.points = dict(self.points)
+        node.coordinates = dict(self.coordinates)
+        new_points = []
+        for point in node.construction.points:
+            key = point.key()
+            if key not in node.points:
+                node.points[key] = point
+                node.coordinates[key] = (float(point.x), float(point.y))
+                node.nesting_depth = max(node.nesting_depth, point_nesting_depth(point))
+                new_points.append(point)
+        node.satisfied = targets.satisfied_by(node.points, node.coordinates, new_points, self.satisfied,
+                                              node.line_keys)
+        return node
+
+
+class TargetedSearch:
+    """
+    Searches for the shortest construction that satisfies some targets. The counters record how much work the last
+    search did.
+    """
+
+    def __init__(self, targets: ConstructionTargets, base: Construction = None,
+                 construction_mode=ConstructionMode.DEFAULT, use_bounds=True):
+        """
+        :param targets: points and lengths to construct
+        :param base: construction to start from. Defaults to the base construction.
+        :param construction_mode: which tools are permitted, when base is not given
+        :param use_bounds: Bool representing whether to prune branches using lower bounds
+        """
+        self.targets = targets
+        self.base = base if base is not None else BaseConstruction(construction_mode=construction_mode)
+        self.construction_mode = self.base.construction_mode
+        self.use_bounds = use_bounds
+        self.nodes_expanded = 0
+        self.nodes_pruned = 0
+        # Fingerprints of the constructions searched so far, with the number of steps they were searched beyond
+        self.transposition_table: {bytes: int} = {}
+
+    def root(self) -> SearchNode:
+        return SearchNode(copy.deepcopy(self.base), self.targets)
+
+    def is_goal(self, node: SearchNode) -> bool:
+        return len(node.satisfied) == len(self.targets)
+
+    def lower_bound(self, node: SearchNode) -> float:
+        """:return: lower bound on the number of steps needed to satisfy the targets from node"""
+        if not self.use_bounds:
+            return 1 if not self.is_goal(node) else 0
+        return self.targets.lower_bound(node.satisfied, node.nesting_depth, self.construction_mode)
+
+    def iterative_deepening(self, max_depth: int) -> Optional[Construction]:
+        """
+        Depth-first searches with increasing depth limits, so that the first construction found is a shortest one. A
+        transposition table skips constructions that were already searched at least as deep, whether in this iteration
+        (in another order of the same steps) or in an earlier one.
+        :param max_depth: maximum number of steps to add to the base
+        :return: a shortest construction that satisfies the targets, or None if there is none within max_depth steps
+        """
+        self.nodes_expanded = self.nodes_pruned = 0
+        self.transposition_table = {}
+        root = self.root()
+        if self.is_goal(root):
+            return root.construction
+        bound = self.lower_bound(root)
+        if bound > max_depth:
+            self.nodes_pruned += 1
+            return None
+        for depth_limit in range(max(1, int(bound)), max_depth + 1):
+            found = self._depth_limited_search(root, depth_limit)
+            if found is not None:
+                return found.construction
+        return None
+
+    def _depth_limited_search(self, node: SearchNode, remaining: int) -> Optional[SearchNode]:
+        self.nodes_expanded += 1
+        for action in node.construction.actions:
+            child = self.child(node, action)
+            if self.is_goal(child):
+                return child
+            if remaining <= 1:
+                continue
+            if self.lower_bound(child) > remaining - 1:
+                self.nodes_pruned += 1
+                continue
+            fingerprint = construction_fingerprint(child.construction)
+            if self.transposition_table.get(fingerprint, 0) >= remaining - 1:
+                continue
+            self.transposition_table[fingerprint] = remaining - 1
+            found = self._depth_limited_search(child, remaining - 1)
+            if found is not None:
+                return found
+        return None
+
+    def child(self, node: SearchNode, action) -> SearchNode:
+        return node.child(action, self.targets)
+
+
+def find_shortest_construction(target_points: Iterable[Point] = (), target_lengths: Iterable = (),
+                               base: Construction = None, max_depth: int = 6,
+                               construction_mode=ConstructionMode.DEFAULT, use_bounds=True,
+                               target_lines: Iterable[Line] = ()) -> Optional[Construction]:
+    """
+    Find a shortest construction that contains every target point, a segment of every target length, and every target
+    line.
+    :param target_points: points to construct
+    :param target_lengths: exact lengths to construct, as expressions or strings
+    :param base: construction to start from. Defaults to the base construction.
+    :param max_depth: maximum number of steps to add to the base
+    :param construction_mode: which tools are permitted, when base is not given
+    :param use_bounds: Bool representing whether to prune branches using lower bounds
+    :param target_lines: lines to construct
+    :return: the construction, or None if there is none within max_depth steps
+    """
+    search = TargetedSearch(ConstructionTargets(target_points, target_lengths, target_lines), base, construction_mode,
+                            use_bounds)
+    return search.iterative_deepening(max_depth)
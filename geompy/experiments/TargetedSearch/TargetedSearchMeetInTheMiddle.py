@@ -0,0 +1,210 @@
+"""
+Meet-in-the-middle search for length targets.
+
+A segment of a given length often has endpoints that are constructed independently of each other: each endpoint only
+needs the base points and its own few steps. Instead of enumerating every construction of the full length, we enumerate
+the constructions of half the length once, remember the shortest construction of every point they produce, and index
+those points in a spatial hash. A target length is then found by looking up the pairs of indexed points at that
+distance, and joining the constructions of the two endpoints. Since both halves only depend on the shared base points,
+drawing the steps of one after the other is always a valid construction, whose length is the size of the union of their
+steps.
+
+The index is built once, and serves every target length (e.g. sqrt(n) for many n), so its cost is shared. Lengths that
+only appear at the intersections of the two halves' objects are not found this way; the search returns the shortest
+join it can verify exactly, which is an upper bound on the minimal construction length.
+"""
+from geompy import Point
+from geompy.cas import equals, simplify, sympify
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from .TargetedSearchCore import ConstructionTargets, FLOAT_TOLERANCE
+from .TargetedSearchBestFirst import BestFirstSearch, Heuristic
+
+import copy
+import math
+import time
+from typing import Iterator, Optional, Tuple
+
+
+class HalfConstructionRecord:
+    """The shortest construction of a point found while enumerating half constructions."""
+    __slots__ = ('point', 'coordinates', 'steps', 'step_keys')
+
+    def __init__(self, point: Point, coordinates: (float, float), steps: tuple):
+        self.point = point
+        self.coordinates = coordinates
+        self.steps = steps
+        self.step_keys = frozenset(step.key() for step in steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+
+class HalfConstructionIndex:
+    """
+    Every point constructible from a base within half_depth steps, along with its shortest construction, indexed in a
+    spatial hash: a grid of square cells, each listing the points inside it.
+    """
+
+    def __init__(self, base: Construction = None, half_depth: int = 2, construction_mode=ConstructionMode.DEFAULT,
+                 cell_size: float = 1.0):
+        """
+        :param base: construction to start from. Defaults to the base construction.
+        :param half_depth: maximum number of steps in each half
+        :param construction_mode: which tools are permitted, when base is not given
+        :param cell_size: side length of the cells of the spatial hash
+        """
+        self.base = base if base is not None else BaseConstruction(construction_mode=construction_mode)
+        self.half_depth = half_depth
+        self.cell_size = cell_size
+        self.records: {str: HalfConstructionRecord} = {}
+        self.grid: {(int, int): [str]} = {}
+        self.num_constructions = 0
+        self._enumerate()
+
+    def _cell(self, x: float, y: float) -> (int, int):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _record(self, point: Point, coordinates: (float, float), steps: tuple) -> None:
+        key = point.key()
+        record = self.records.get(key)
+        if record is None:
+            self.grid.setdefault(self._cell(*coordinates), []).append(key)
+        if record is None or len(steps) < len(record):
+            self.records[key] = HalfConstructionRecord(point, coordinates, steps)
+
+    def _enumerate(self) -> None:
+        """Breadth-first enumeration of the half constructions, deduplicated by fingerprint."""
+        search = BestFirstSearch(ConstructionTargets(), self.base, heuristic=Heuristic())
+        root = search.root()
+        for point in root.new_points:
+            self._record(point, root.coordinates[point.key()], ())
+        seen_fingerprints = {root.fingerprint}
+        frontier = [root]
+        for depth in range(1, self.half_depth + 1):
+            next_frontier = []
+            for node in frontier:
+                construction = node.get_construction()
+                for action in construction.actions:
+                    child = search.child(node, action)
+                    if child.fingerprint in seen_fingerprints:
+                        continue
+                    seen_fingerprints.add(child.fingerprint)
+                    self.num_constructions += 1
+                    steps = tuple(construction.steps[len(self.base):]) + (action,)
+                    for point in child.new_points:
+                        self._record(point, child.coordinates[point.key()], steps)
+                    if depth < self.half_depth:
+                        next_frontier.append(child)
+            frontier = next_frontier
+
+    def pairs_at_distance(self, distance: float, tolerance: float = FLOAT_TOLERANCE) -> Iterator[Tuple[str, str]]:
+        """
+        :param distance: distance between the points of each pair
+        :param tolerance: allowed difference from distance
+        :return: each unordered pair of keys of indexed points that are distance apart, within tolerance
+        """
+        reach = math.ceil(distance / self.cell_size) + 1
+        for key, record in self.records.items():
+            x0, y0 = record.coordinates
+            i0, j0 = self._cell(x0, y0)
+            for i in range(i0 - reach, i0 + reach + 1):
+                for j in range(j0 - reach, j0 + reach + 1):
+                    for other_key in self.grid.get((i, j), ()):
+                        if other_key <= key:
+                            continue
+                        x, y = self.records[other_key].coordinates
+                        if abs(math.hypot(x - x0, y - y0) - distance) < tolerance:
+                            yield key, other_key
+
+    def join(self, key1: str, key2: str) -> Construction:
+        """
+        :return: the base with the steps of the constructions of both points drawn, first one's then the other's
+        """
+        construction = copy.deepcopy(self.base)
+        for step in self.records[key1].steps + self.records[key2].steps:
+            construction.add_step_premade(step, interesting=True)
+        return construction
+
+
+class MeetInTheMiddleSearch:
+    """
+    Finds constructions of lengths by joining half constructions. The counters record how much work the last search
+    did.
+    """
+
+    def __init__(self, base: Construction = None, half_depth: int = 2, construction_mode=ConstructionMode.DEFAULT,
+                 cell_size: float = 1.0):
+        """
+        :param base: construction to start from. Defaults to the base construction.
+        :param half_depth: maximum number of steps in each half
+        :param construction_mode: which tools are permitted, when base is not given
+        :param cell_size: side length of the cells of the spatial hash
+        """
+        self.index = HalfConstructionIndex(base, half_depth, construction_mode, cell_size)
+        self.num_candidates = 0
+        self.num_verified = 0
+
+    def search(self, target_length) -> Optional[Construction]:
+        """
+        :param target_length: exact length to construct, as an expression or string
+        :return: the shortest join of two half constructions with a segment of target_length, or None if there is none
+        """
+        target_length = simplify(sympify(target_length))
+        records = self.index.records
+        candidates = sorted((len(records[key1].step_keys | records[key2].step_keys), key1, key2)
+                            for key1, key2 in self.index.pairs_at_distance(float(target_length)))
+        self.num_candidates = len(candidates)
+        self.num_verified = 0
+        for _, key1, key2 in candidates:
+            self.num_verified += 1
+            if equals(abs(records[key1].point - records[key2].point), target_length):
+                return self.index.join(key1, key2)
+        return None
+
+
+def compare_with_full_enumeration(target_lengths, base: Construction = None, half_depth: int = 2) -> dict:
+    """
+    Find constructions of several lengths by meet-in-the-middle, sharing one index, and by enumerating full
+    constructions breadth-first, stopping at the first one found. Full enumeration only goes as deep as the
+    meet-in-the-middle construction, and is skipped for lengths that meet-in-the-middle did not find, since it would
+    have to enumerate everything up to twice half_depth steps.
+    :param target_lengths: exact lengths to construct, as expressions or strings
+    :param base: construction to start from. Defaults to the base construction.
+    :param half_depth: maximum number of steps in each half
+    :return: dictionary of length: {'meet in the middle': {...}, 'full enumeration': {...}}, where each search reports
+    the 'length' of the construction it found (None if none), the number of 'constructions' it enumerated, and
+    'seconds'. 'index' holds the constructions and seconds taken to build the index, and 'speedup' the ratio of the
+    total time of full enumeration to that of meet-in-the-middle (including the index) over the lengths both found.
+    """
+    start_time = time.perf_counter()
+    meet_in_the_middle = MeetInTheMiddleSearch(base, half_depth)
+    report = {'index': {'constructions': meet_in_the_middle.index.num_constructions,
+                        'seconds': time.perf_counter() - start_time}}
+    meet_in_the_middle_seconds = report['index']['seconds']
+    full_enumeration_seconds = 0
+    for target_length in target_lengths:
+        start_time = time.perf_counter()
+        construction = meet_in_the_middle.search(target_length)
+        length_report = {'meet in the middle': {'length': len(construction) if construction is not None else None,
+                                                'constructions': meet_in_the_middle.num_verified,
+                                                'seconds': time.perf_counter() - start_time}}
+        if construction is not None:
+            meet_in_the_middle_seconds += length_report['meet in the middle']['seconds']
+            start_time = time.perf_counter()
+            full_enumeration = BestFirstSearch(ConstructionTargets(target_lengths=[target_length]), base,
+                                               heuristic=Heuristic())
+            construction = full_enumeration.search(max_depth=len(construction))
+            length_report['full enumeration'] = {'length': len(construction) if construction is not None else None,
+                                                 'constructions': full_enumeration.nodes_generated,
+                                                 'seconds': time.perf_counter() - start_time}
+            full_enumeration_seconds += length_report['full enumeration']['seconds']
+        report[target_length] = length_report
+    report['speedup'] = full_enumeration_seconds / meet_in_the_middle_seconds
+    return report
+
+
+if __name__ == '__main__':
+    comparison = compare_with_full_enumeration(('3', '4', '5', 'sqrt(7)', 'sqrt(13)', '2*sqrt(3)'), half_depth=3)
+    for name, result in comparison.items():
+        print(f'{name}: {result}')
@@ -0,0 +1,232 @@
+"""
+Persistent database of minimal constructions.
+
+Searches find the minimal construction length of many points and distances, but only keep the lengths, and only until
+the search ends. This database keeps, for every point and every distance between two points, the shortest construction
+found so far, as a step program that can be replayed on the base construction. Every record belongs to a base
+construction (identified by a fingerprint of its points and lines), since lengths from different bases are unrelated.
+
+Records can be looked up exactly, by the canonical key of the point or distance, or approximately, by the float value.
+Writes are upserts that only ever shorten a record, so several processes can write to the same database at once.
+"""
+from geompy import Point
+from geompy.cas import simplify, sympify
+from geompy.core.Line import Line
+from geompy.core.Circle import Circle
+from geompy.core.Construction import Construction
+from geompy.core.PrebuiltConstructions import BaseConstruction
+
+import copy
+from hashlib import blake2b
+import json
+import sqlite3
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# Database used when no path is given
+DEFAULT_DATABASE_PATH = 'minimal_constructions.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    base TEXT NOT NULL,
+    key TEXT NOT NULL,
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    length INTEGER NOT NULL,
+    program TEXT NOT NULL,
+    PRIMARY KEY (base, key)
+);
+CREATE INDEX IF NOT EXISTS points_by_approximation ON points (base, x, y);
+CREATE TABLE IF NOT EXISTS distances (
+    base TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value REAL NOT NULL,
+    length INTEGER NOT NULL,
+    program TEXT NOT NULL,
+    PRIMARY KEY (base, key)
+);
+CREATE INDEX IF NOT EXISTS distances_by_approximation ON distances (base, value);
+"""
+
+
+def base_fingerprint(base: Construction) -> str:
+    """
+    :param base: the construction that searches start from
+    :return: hex string identifying the points and lines of base
+    """
+    keys = sorted([point.key() for point in base.points] + [step.key() for step in base.lines | base.circles])
+    return blake2b('\n'.join(keys).encode(), digest_size=16).hexdigest()
+
+
+def distance_key(distance) -> str:
+    """:return: canonical string of a distance, like Point.key"""
+    return str(sympify(simplify(distance)))
+
+
+def step_program(construction: Construction, transform: Callable[[Point], Point] = None) -> str:
+    """
+    :param construction: construction to encode
+    :param transform: optional isometry of the plane that fixes the base construction (e.g. from
+    MinimalConstructionsSymmetry.SYMMETRY_GROUP). If given, the program of the image of construction is returned.
+    :return: json list of the construction's steps. Lines are given by two points, and circles by their center and
+    radius, with every coordinate as an exact expression.
+    """
+    transform = transform if transform is not None else (lambda point: point)
+    program = []
+    for step in construction.steps:
+        if isinstance(step, Line):
+            program.append({'line': [[str(sympify(point.x)), str(sympify(point.y))]
+                                     for point in (transform(step.point1), transform(step.point2))]})
+        elif isinstance(step, Circle):
+            center = transform(step.center)
+            program.append({'circle': [str(sympify(center.x)), str(sympify(center.y))],
+                            'radius': str(sympify(step.radius))})
+        else:
+            raise TypeError(f'Cannot encode step {step} of type {type(step)}.')
+    return json.dumps(program)
+
+
+def replay_program(program: str, base: Construction = None) -> Construction:
+    """
+    Rebuild a construction from its step program.
+    :param program: json string from step_program
+    :param base: the construction the program starts from. Defaults to the base construction. It is not modified.
+    :return: the construction
+    """
+    construction = copy.deepcopy(base) if base is not None else BaseConstruction()
+    for step in json.loads(program):
+        if 'line' in step:
+            (x1, y1), (x2, y2) = step['line']
+            construction.add_step_premade(Line(Point(x1, y1), Point(x2, y2)))
+        else:
+            x, y = step['circle']
+            construction.add_step_premade(Circle(Point(x, y), radius=step['radius']))
+    return construction
+
+
+class ConstructionDatabase:
+    """
+    SQLite database of the minimal constructions of points and distances from one base construction.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATABASE_PATH, base: Construction = None, timeout: float = 60.0):
+        """
+        :param path: database file. It is created if it does not exist.
+        :param base: the construction that the recorded constructions start from. Defaults to the base construction.
+        :param timeout: number of seconds to wait for other writers before giving up
+        """
+        self.path = path
+        self.base = base if base is not None else BaseConstruction()
+        self.base_id = base_fingerprint(self.base)
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        # Write-ahead logging lets readers continue while another process writes
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record_point(self, point: Point, construction: Construction, program: str = None) -> bool:
+        """
+        Record that construction constructs point, if it is shorter than the recorded one.
+        :param point: a point of construction
+        :param construction: construction built on this database's base
+        :param program: step program of construction, if it has already been computed
+        :return: true if the record was created or shortened
+        """
+        cursor = self.connection.execute(
+            'INSERT INTO points VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (base, key) DO UPDATE SET '
+            'length = excluded.length, program = excluded.program WHERE excluded.length < points.length',
+            (self.base_id, point.key(), float(point.x), float(point.y), len(construction),
+             program or step_program(construction)))
+        return cursor.rowcount > 0
+
+    def record_distance(self, point1: Point, point2: Point, construction: Construction, program: str = None) -> bool:
+        """
+        Record that construction constructs the distance between point1 and point2, if it is shorter than the recorded
+        one.
+        :return: true if the record was created or shortened
+        """
+        distance = abs(point2 - point1)
+        cursor = self.connection.execute(
+            'INSERT INTO distances VALUES (?, ?, ?, ?, ?) ON CONFLICT (base, key) DO UPDATE SET '
+            'length = excluded.length, program = excluded.program WHERE excluded.length < distances.length',
+            (self.base_id, distance_key(distance), float(distance), len(construction),
+             program or step_program(construction)))
+        return cursor.rowcount > 0
+
+    def record_construction(self, construction: Construction, new_points: Iterable[Point] = None,
+                            distances=True, transform: Callable[[Point], Point] = None) -> None:
+        """
+        Record the points of a construction, and the distances from them to every other point of the construction.
+        :param construction: construction built on this database's base
+        :param new_points: the points to record. Defaults to every point of the construction.
+        :param distances: Bool representing whether the distances should be recorded too
+        :param transform: optional isometry of the plane that fixes the base construction. If given, the image of the
+        construction (and of its points) is recorded instead. The distances are the same as the construction's own.
+        :return: None
+        """
+        program = step_program(construction, transform)
+        new_points = construction.points if new_points is None else new_points
+        for point in new_points:
+            self.record_point(transform(point) if transform is not None else point, construction, program)
+            if distances:
+                for other in construction.points:
+                    if other != point:
+                        self.record_distance(point, other, construction, program)
+
+    def get_point(self, point: Point) -> Optional[Tuple[int, str]]:
+        """
+        :return: the minimal construction length of point and its step program, or None if it has not been recorded
+        """
+        return self.connection.execute('SELECT length, program FROM points WHERE base = ? AND key = ?',
+                                        (self.base_id, point.key())).fetchone()
+
+    def get_distance(self, distance) -> Optional[Tuple[int, str]]:
+        """
+        :param distance: exact expression of a distance
+        :return: the minimal construction length of distance and its step program, or None if it has not been recorded
+        """
+        return self.connection.execute('SELECT length, program FROM distances WHERE base = ? AND key = ?',
+                                       (self.base_id, distance_key(distance))).fetchone()
+
+    def find_points_near(self, x: float, y: float, tolerance: float = 1e-9) -> List[Tuple[str, float, float, int, str]]:
+        """
+        :return: (key, x, y, length, program) of every recorded point within tolerance of (x, y) in each coordinate,
+        shortest first
+        """
+        return self.connection.execute(
+            'SELECT key, x, y, length, program FROM points WHERE base = ? AND x BETWEEN ? AND ? AND y BETWEEN ? AND ? '
+            'ORDER BY length', (self.base_id, x - tolerance, x + tolerance, y - tolerance, y + tolerance)).fetchall()
+
+    def find_distances_near(self, value: float, tolerance: float = 1e-9) -> List[Tuple[str, float, int, str]]:
+        """
+        :return: (key, value, length, program) of every recorded distance within tolerance of value, shortest first
+        """
+        return self.connection.execute(
+            'SELECT key, value, length, program FROM distances WHERE base = ? AND value BETWEEN ? AND ? '
+            'ORDER BY length', (self.base_id, value - tolerance, value + tolerance)).fetchall()
+
+    def minimal_lengths(self, table: str = 'points') -> List[Tuple[str, int]]:
+        """
+        :param table: 'points' or 'distances'
+        :return: (key, length) of every record of this base in the table, shortest first
+        """
+        if table not in ('points', 'distances'):
+            raise ValueError(f'There is no table {table}.')
+        return self.connection.execute(f'SELECT key, length FROM {table} WHERE base = ? ORDER BY length, key',
+                                       (self.base_id,)).fetchall()
+
+    def replay(self, program: str) -> Construction:
+        """:return: the construction encoded by program, built on this database's base"""
+        return replay_program(program, self.base)
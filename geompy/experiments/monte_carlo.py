@@ -0,0 +1,196 @@
+"""
+Reproducible parallel Monte Carlo search for constructions of sqrt(n).
+
+Each target is searched by several workers at once, spread over a pool of processes. Every worker draws its random
+constructions from its own stream of seeds, derived from the run's seed, the target, the worker and the depth, so a run
+can be repeated exactly, whatever order the processes happen to run in.
+
+Workers search depth by depth, like sqrt_finder.construct, each drawing its share of the samples at every depth. The
+result for a target is the construction found at the smallest depth, by the worker with the smallest index among those,
+so it does not depend on which worker finished first. A shared array holds the best (depth, worker) found so far for
+every target, and a worker stops as soon as it can no longer beat it. This cancels the redundant work without changing
+the result.
+
+Random steps occasionally hit degenerate geometry the CAS cannot handle. The depth is then retried from the start, with
+the next seed in the stream, so retries are as reproducible as everything else.
+"""
+from geompy.cas import sqrt, sympify
+from geompy.core.Construction import Construction
+from geompy.experiments.random_walk import RandomWalkSampler
+from geompy.experiments.sqrt_finder import num_random_constructions, sqrt_base_construction
+
+import math
+from multiprocessing import Array, Pool, cpu_count
+import random
+import time
+from typing import Dict, Optional
+
+from numpy.random import SeedSequence
+
+# Depth stored in the shared array for targets that have not been found
+NOT_FOUND = 2 ** 31 - 1
+
+# Workers check the shared array for cancellation every this many samples
+CANCELLATION_CHECK_INTERVAL = 16
+
+# Best (depth, worker index) of every target, set by initialize_monte_carlo_worker in each process of the pool
+best_found = None
+
+
+class MonteCarloResult:
+    """The outcome of one worker's search for one target."""
+    __slots__ = ('num_sqrt', 'worker_index', 'num_steps', 'construction', 'num_samples', 'num_retries', 'seconds',
+                 'cancelled')
+
+    def __init__(self, num_sqrt: int, worker_index: int, num_steps: Optional[int], construction: Optional[Construction],
+                 num_samples: int, num_retries: int, seconds: float, cancelled: bool):
+        self.num_sqrt = num_sqrt
+        self.worker_index = worker_index
+        self.num_steps = num_steps
+        self.construction = construction
+        self.num_samples = num_samples
+        self.num_retries = num_retries
+        self.seconds = seconds
+        self.cancelled = cancelled
+
+    @property
+    def found(self) -> bool:
+        return self.num_steps is not None
+
+
+def worker_rng(seed: int, num_sqrt: int, worker_index: int, depth: int, attempt: int) -> random.Random:
+    """
+    :return: random number generator for one attempt at one depth of one worker's search for sqrt(num_sqrt)
+    """
+    sequence = SeedSequence(seed, spawn_key=(num_sqrt, worker_index, depth, attempt))
+    return random.Random(int(sequence.generate_state(1)[0]))
+
+
+def initialize_monte_carlo_worker(shared_best_found: Array) -> None:
+    """Set up the shared array of the best (depth, worker index) of every target in this process."""
+    global best_found
+    best_found = shared_best_found
+
+
+def is_cancelled(target_index: int, depth: int, worker_index: int) -> bool:
+    """
+    :return: true if a construction of the target was found by a worker that this one can no longer beat
+    """
+    return (best_found[2 * target_index], best_found[2 * target_index + 1]) < (depth, worker_index)
+
+
+def report_found(target_index: int, depth: int, worker_index: int) -> None:
+    with best_found.get_lock():
+        if (depth, worker_index) < (best_found[2 * target_index], best_found[2 * target_index + 1]):
+            best_found[2 * target_index] = depth
+            best_found[2 * target_index + 1] = worker_index
+
+
+def search_target(job: tuple) -> MonteCarloResult:
+    """
+    One worker's share of the search for a target.
+    :param job: (num_sqrt, target index, worker index, number of workers, seed, base function, maximum depth, maximum
+    number of retries per depth)
+    :return: the construction of the smallest depth this worker found, if any
+    """
+    num_sqrt, target_index, worker_index, num_workers, seed, base_function, maximum_depth, max_retries = job
+    start_time = time.perf_counter()
+    base = base_function(num_sqrt)
+    length = sqrt(sympify(num_sqrt))
+    num_samples = num_retries = 0
+
+    def result(num_steps=None, construction=None, cancelled=False):
+        return MonteCarloResult(num_sqrt, worker_index, num_steps, construction, num_samples, num_retries,
+                                time.perf_counter() - start_time, cancelled)
+
+    depth = attempt = 0
+    while depth < maximum_depth:
+        sampler = RandomWalkSampler(base, depth, rng=worker_rng(seed, num_sqrt, worker_index, depth, attempt))
+        try:
+            for sample_index in range(math.ceil(num_random_constructions(depth) / num_workers)):
+                if sample_index % CANCELLATION_CHECK_INTERVAL == 0 and is_cancelled(target_index, depth, worker_index):
+                    return result(cancelled=True)
+                construction = sampler.sample()
+                num_samples += 1
+                if construction.find_length(length):
+                    report_found(target_index, depth, worker_index)
+                    return result(depth, construction)
+        # Degenerate random steps make the CAS raise these
+        except (ArithmeticError, TypeError, ValueError):
+            num_retries += 1
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            continue
+        depth += 1
+        attempt = 0
+    return result()
+
+
+def run_monte_carlo(nums_sqrt, base_function=sqrt_base_construction, seed: int = 0, num_workers: int = 4,
+                    num_processes: int = None, maximum_depth: int = 10, max_retries: int = 3,
+                    timings_path: str = None) -> Dict[int, MonteCarloResult]:
+    """
+    Search for constructions of sqrt(n) for several n, with num_workers workers per target.
+    :param nums_sqrt: numbers whose square roots to construct
+    :param base_function: function from n to the base construction for sqrt(n)
+    :param seed: seed of the run. Runs with the same seed and number of workers give the same results.
+    :param num_workers: number of workers searching each target. Each draws its share of the samples at each depth.
+    :param num_processes: number of processes to run the workers in. Defaults to the number of CPUs. With one process,
+    everything runs in this process.
+    :param maximum_depth: the search tries constructions of fewer steps than this
+    :param max_retries: number of times each depth may be retried when the CAS fails, before giving up
+    :param timings_path: if given, a CSV file to write a row of timings to as each target finishes: n, number of steps
+    (empty if not found), winning worker, samples drawn, retries, seconds spent by all workers, and seconds from the
+    start of the run until the target finished
+    :return: dictionary of n: the result for sqrt(n). Its samples, retries and seconds are the totals over all workers.
+    """
+    num_processes = num_processes or cpu_count()
+    nums_sqrt = list(nums_sqrt)
+    shared_best_found = Array('i', [NOT_FOUND, 0] * len(nums_sqrt))
+    jobs = [(num_sqrt, target_index, worker_index, num_workers, seed, base_function, maximum_depth, max_retries)
+            for target_index, num_sqrt in enumerate(nums_sqrt) for worker_index in range(num_workers)]
+
+    start_time = time.perf_counter()
+    results: Dict[int, MonteCarloResult] = {}
+    num_finished = {num_sqrt: 0 for num_sqrt in nums_sqrt}
+    timings = open(timings_path, 'w+') if timings_path else None
+    if timings is not None:
+        timings.write('n,num steps,worker,samples,retries,worker seconds,seconds\n')
+    initialize_monte_carlo_worker(shared_best_found)
+    pool = Pool(num_processes, initializer=initialize_monte_carlo_worker,
+                initargs=(shared_best_found,)) if num_processes > 1 else None
+    try:
+        worker_results = pool.imap_unordered(search_target, jobs) if pool is not None else map(search_target, jobs)
+        for worker_result in worker_results:
+            num_sqrt = worker_result.num_sqrt
+            best = results.get(num_sqrt)
+            if best is None:
+                best = results[num_sqrt] = MonteCarloResult(num_sqrt, None, None, None, 0, 0, 0.0, False)
+            if worker_result.found and (not best.found or (worker_result.num_steps, worker_result.worker_index) <
+                                        (best.num_steps, best.worker_index)):
+                best.num_steps = worker_result.num_steps
+                best.worker_index = worker_result.worker_index
+                best.construction = worker_result.construction
+            best.num_samples += worker_result.num_samples
+            best.num_retries += worker_result.num_retries
+            best.seconds += worker_result.seconds
+            num_finished[num_sqrt] += 1
+            if num_finished[num_sqrt] == num_workers and timings is not None:
+                timings.write(f'{num_sqrt},{"" if best.num_steps is None else best.num_steps},'
+                              f'{"" if best.worker_index is None else best.worker_index},{best.num_samples},'
+                              f'{best.num_retries},{best.seconds:.3f},{time.perf_counter() - start_time:.3f}\n')
+                timings.flush()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if timings is not None:
+            timings.close()
+    return {num_sqrt: results[num_sqrt] for num_sqrt in nums_sqrt}
+
+
+if __name__ == '__main__':
+    monte_carlo_results = run_monte_carlo(range(1, 100), timings_path='monte_carlo_timings.csv')
+    with open('num_steps.csv', 'w+') as csv:
+        for n, monte_carlo_result in monte_carlo_results.items():
+            csv.write(f'n for sqrt, {n}, num steps, {monte_carlo_result.num_steps}\n')
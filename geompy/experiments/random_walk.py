@@ -0,0 +1,71 @@
+"""
+Random walk sampling of constructions.
+
+Random searches (like sqrt_finder) draw many random constructions with the same number of steps from one base. Drawing
+each from scratch copies the base and adds every step again, although most of the cost is in the intersections each step
+computes. A random walk instead keeps the construction after every step of the last sample. The next sample backtracks
+to a random depth, and only draws the steps after it. Each step is still drawn uniformly at random given the steps
+before it, so each sample has the same distribution as one drawn from scratch, but consecutive samples share prefixes.
+"""
+from geompy.core.Construction import Construction
+
+import random
+import time
+from typing import Iterator
+
+
+class RandomWalkSampler:
+    """
+    Samples random constructions of num_steps steps from a base. The counters record the samples drawn, the steps added
+    to draw them, and the time it took.
+    """
+
+    def __init__(self, base: Construction, num_steps: int, rng: random.Random = None, interesting: bool = True):
+        """
+        :param base: construction to start every sample from
+        :param num_steps: number of random steps in each sample
+        :param rng: random number generator to draw the steps with. Defaults to the random module.
+        :param interesting: whether the points of the random steps are marked as interesting
+        """
+        self.base = base
+        self.num_steps = num_steps
+        self.rng = rng if rng is not None else random
+        self.interesting = interesting
+        # The construction after each step of the current walk, starting with the base
+        self._walk: [Construction] = [base]
+        self.num_samples = 0
+        self.num_steps_added = 0
+        self.seconds = 0.0
+
+    def sample(self) -> Construction:
+        """
+        :return: a random construction of num_steps steps. It is not reused by later samples, so it may be modified.
+        """
+        start_time = time.perf_counter()
+        if self.num_steps == 0:
+            construction = self.base.copy()
+        else:
+            # Keep the walk up to a random depth, and draw the rest of the steps again
+            del self._walk[self.rng.randrange(self.num_steps) + 1:]
+            while len(self._walk) <= self.num_steps:
+                construction = self._walk[-1].copy()
+                construction.add_random_construction(interesting=self.interesting, rng=self.rng)
+                self._walk.append(construction)
+                self.num_steps_added += 1
+            construction = self._walk[-1]
+        self.num_samples += 1
+        self.seconds += time.perf_counter() - start_time
+        return construction
+
+    def __iter__(self) -> Iterator[Construction]:
+        while True:
+            yield self.sample()
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.num_samples / self.seconds if self.seconds else 0.0
+
+    @property
+    def steps_per_sample(self) -> float:
+        """Average number of steps added per sample, which is less than num_steps because prefixes are shared."""
+        return self.num_steps_added / self.num_samples if self.num_samples else 0.0
@@ -1,9 +1,17 @@
 from geompy import Point
+from geompy.cas import sqrt, sympify
 from geompy.core.Construction import Construction
+from geompy.experiments.construction_database import ConstructionDatabase, base_fingerprint
+from geompy.experiments.random_walk import RandomWalkSampler
 import copy
-from decimal import Decimal
 import math
+import os
 from multiprocessing import Pool, cpu_count
+import random
+import sys
+from typing import Dict, Iterator, Tuple
+
+from numpy.random import SeedSequence
 
 
 def num_random_constructions(n):
@@ -147,31 +155,66 @@ with open('num_steps.csv', 'w+') as csv:
 constructions_dict = {}
 
 
-def construct(num_sqrt) -> (int, Construction):
-    maximum_depth = 10
-
+def sqrt_base_construction(num_sqrt) -> Construction:
+    """
+    :param num_sqrt: number whose square root to construct
+    :return: construction with the segments AB of length 1 and CA of length num_sqrt, along one line
+    """
     const = Construction()
     a = Point(0, 0, 'A')
     b = Point(1, 0, 'B')
     c = Point(-num_sqrt, 0, 'C')
     const.points = {a, b, c}
+    const.add_points_to_actions_update_queue({a, b, c})
     ab = const.add_line(a, b, counts_as_step=False)
     cb = const.add_line(c, b, counts_as_step=False)
+    return const
+
+
+def construct(num_sqrt, database_path: str = None,
+              save_directory: str = 'constructions_given_two_segments') -> (int, Construction):
+    """
+    Randomly search for a construction of a segment of length sqrt(num_sqrt), given segments of length 1 and num_sqrt.
+    :param num_sqrt: number whose square root to construct
+    :param database_path: if given, a construction recorded in this ConstructionDatabase is reused instead of searching,
+    and any construction found is recorded there
+    :param save_directory: if given, the steps of the construction found are written to a text file in this directory
+    :return: number of steps and the construction, or None, None if none was found
+    """
+    maximum_depth = 10
+
+    const = sqrt_base_construction(num_sqrt)
+
+    database = ConstructionDatabase(database_path, base=const) if database_path else None
+    if database is not None:
+        record = database.get_distance(sympify(f'sqrt({num_sqrt})'))
+        if record is not None:
+            num_steps, program = record
+            database.close()
+            return num_steps, database.replay(program)
 
     for num_steps in range(maximum_depth):
+        sampler = RandomWalkSampler(const, num_steps)
         for i in range(num_random_constructions(num_steps)):
             print(f'sqrt(n) {num_sqrt}\tSteps: {num_steps}\tConstruction: {i}')
-            const_copy = copy.deepcopy(const)
-            const_copy.add_random_construction(number_of_steps=num_steps)
+            const_copy = sampler.sample()
 
-            check = const_copy.check_lengths(Decimal.sqrt(Decimal(num_sqrt)))
+            check = const_copy.check_lengths(sqrt(sympify(num_sqrt)))
             if check:
                 print('FOUND ONE')
-                filename = f'constructions_given_two_segments/sqrt{num_sqrt}_construction_in_{num_steps}_steps'
-                const_copy.save_construction(filename, notes=check)
+                if save_directory:
+                    os.makedirs(save_directory, exist_ok=True)
+                    filename = os.path.join(save_directory, f'sqrt{num_sqrt}_construction_in_{num_steps}_steps.txt')
+                    with open(filename, 'a+') as file:
+                        file.write(f'{const_copy}\n\n')
                 #constructions_dict[num_to_take_sqrt] = (num_steps, const_copy)
                 print(const_copy)
+                if database is not None:
+                    database.record_construction(const_copy)
+                    database.close()
                 return num_steps, const_copy
+    if database is not None:
+        database.close()
     return None, None
 '''
 for num_to_take_sqrt in range(1, 100):
@@ -183,14 +226,155 @@ def construct_tuple(num_sqrt):
     return num_sqrt, construct(num_sqrt)
 
 
+def unit_segment_base_construction(num_sqrt=None) -> Construction:
+    """
+    :param num_sqrt: ignored, so that every target shares this base
+    :return: construction with only the segment AB of length 1
+    """
+    const = Construction()
+    a = Point(0, 0, 'A')
+    b = Point(1, 0, 'B')
+    const.points = {a, b}
+    const.add_points_to_actions_update_queue({a, b})
+    const.add_line(a, b, counts_as_step=False)
+    return const
+
+
+def sample_group(job: tuple) -> Dict[int, Construction]:
+    """
+    One worker's share of the samples at one depth of construct_group.
+    :param job: (base, numbers whose square roots are outstanding, number of steps, number of samples, seed)
+    :return: dictionary of n: the first sample that contains a segment of length sqrt(n)
+    """
+    base, nums_sqrt, num_steps, num_samples, seed = job
+    lengths = {num_sqrt: sqrt(sympify(num_sqrt)) for num_sqrt in nums_sqrt}
+    sampler = RandomWalkSampler(base, num_steps, rng=random.Random(seed))
+    found = {}
+    for _ in range(num_samples):
+        if len(found) == len(lengths):
+            break
+        const_copy = sampler.sample()
+        for num_sqrt, length in lengths.items():
+            if num_sqrt not in found and const_copy.find_length(length):
+                found[num_sqrt] = const_copy
+    return found
+
+
+def construct_group(base: Construction, nums_sqrt, maximum_depth: int = 10, pool: Pool = None, num_workers: int = 1,
+                    seed: int = 0) -> Iterator[Tuple[int, int, Construction]]:
+    """
+    Randomly search for constructions of segments of length sqrt(n) for several n at once, all from the same base. Every
+    random construction is checked against every outstanding target through its length index, and a target is dropped
+    as soon as it is found.
+    :param base: construction to start from
+    :param nums_sqrt: numbers whose square roots to construct
+    :param maximum_depth: the search tries constructions of fewer steps than this
+    :param pool: if given, the samples of each depth are split between num_workers workers in this pool, each with its
+    own seed. A target found by several workers gets the construction of the one with the smallest index.
+    :param num_workers: number of workers sharing each depth, if there is a pool
+    :param seed: seed of the workers' random number generators, if there is a pool. Without one, the random module is
+    used.
+    :return: generator of (n, number of steps, construction) for each target, as soon as it is found. Targets that are
+    not found are yielded last, as (n, None, None).
+    """
+    if pool is not None:
+        yield from construct_group_in_pool(base, nums_sqrt, maximum_depth, pool, num_workers, seed)
+        return
+    outstanding = {num_sqrt: sqrt(sympify(num_sqrt)) for num_sqrt in nums_sqrt}
+    for num_steps in range(maximum_depth):
+        sampler = RandomWalkSampler(base, num_steps)
+        for i in range(num_random_constructions(num_steps)):
+            if not outstanding:
+                return
+            const_copy = sampler.sample()
+            for num_sqrt, length in list(outstanding.items()):
+                if const_copy.find_length(length):
+                    del outstanding[num_sqrt]
+                    yield num_sqrt, num_steps, const_copy
+        print(f'Steps: {num_steps}\t{sampler.num_samples} samples at {sampler.samples_per_second:.1f} samples per '
+              f'second, adding {sampler.steps_per_sample:.2f} steps per sample')
+    for num_sqrt in outstanding:
+        yield num_sqrt, None, None
+
+
+def construct_group_in_pool(base: Construction, nums_sqrt, maximum_depth: int, pool: Pool, num_workers: int,
+                            seed: int) -> Iterator[Tuple[int, int, Construction]]:
+    """construct_group, with the samples of each depth split between workers in a pool"""
+    outstanding = list(nums_sqrt)
+    for num_steps in range(maximum_depth):
+        if not outstanding:
+            return
+        num_samples = math.ceil(num_random_constructions(num_steps) / num_workers)
+        jobs = [(base, outstanding, num_steps, num_samples,
+                 int(SeedSequence(seed, spawn_key=(num_steps, worker_index)).generate_state(1)[0]))
+                for worker_index in range(num_workers)]
+        # Results come in the order of the workers, and are yielded as they come, since all are of the same depth
+        found = set()
+        for worker_found in pool.imap(sample_group, jobs):
+            for num_sqrt, const_copy in worker_found.items():
+                if num_sqrt not in found:
+                    found.add(num_sqrt)
+                    yield num_sqrt, num_steps, const_copy
+        outstanding = [num_sqrt for num_sqrt in outstanding if num_sqrt not in found]
+    for num_sqrt in outstanding:
+        yield num_sqrt, None, None
+
+
+def construct_group_list(arguments) -> [Tuple[int, int, Construction]]:
+    return list(construct_group(*arguments))
+
+
+def construct_batch(nums_sqrt, base_function=sqrt_base_construction, maximum_depth: int = 10,
+                    num_processes: int = 1, seed: int = None) -> Iterator[Tuple[int, int, Construction]]:
+    """
+    Search for constructions of sqrt(n) for many n, once per base configuration rather than once per target. Targets
+    whose base constructions have the same fingerprint are searched together by construct_group.
+    :param nums_sqrt: numbers whose square roots to construct
+    :param base_function: function from n to the base construction for sqrt(n). With sqrt_base_construction, every
+    target has a base of its own, so nothing is shared: the targets are only searched in parallel, as separate
+    searches. With unit_segment_base_construction, all targets share one search.
+    :param maximum_depth: the search tries constructions of fewer steps than this
+    :param num_processes: number of processes to search with. If there are at least this many base configurations, they
+    are searched in different processes at once, and the results of each arrive when it is done. Otherwise, the
+    configurations are searched one at a time, with the samples of each depth split between the processes.
+    :param seed: seed of the random number generators when the samples are split between processes. Defaults to one
+    drawn from the random module.
+    :return: generator of (n, number of steps, construction) for each target, as soon as it is found. Targets that are
+    not found are yielded as (n, None, None).
+    """
+    groups: {str: (Construction, [int])} = {}
+    for num_sqrt in nums_sqrt:
+        base = base_function(num_sqrt)
+        groups.setdefault(base_fingerprint(base), (base, []))[1].append(num_sqrt)
+    arguments = [(base, group_nums_sqrt, maximum_depth) for base, group_nums_sqrt in groups.values()]
+    if num_processes > 1 and len(arguments) >= num_processes:
+        with Pool(num_processes) as pool:
+            for results in pool.imap_unordered(construct_group_list, arguments):
+                yield from results
+    elif num_processes > 1:
+        seed = seed if seed is not None else random.getrandbits(64)
+        with Pool(num_processes) as pool:
+            for group_index, group_arguments in enumerate(arguments):
+                yield from construct_group(*group_arguments, pool=pool, num_workers=num_processes,
+                                           seed=seed + group_index)
+    else:
+        for group_arguments in arguments:
+            yield from construct_group(*group_arguments)
+
+
 if __name__ == '__main__':
-    num_processes = cpu_count() * 2
+    # By default, each sqrt(n) is constructed from the segments 1 and n, as it always has been. Every target then has a
+    # base of its own, so construct_batch only searches the targets in parallel processes and writes each row as it
+    # arrives; no random construction is shared between targets. With --unit-segment, sqrt(n) is constructed from the
+    # unit segment alone instead, which is a different table: all targets share one search, with its samples split
+    # between the processes.
     total_numbers_to_sqrt = 100
-    with Pool(num_processes) as pool:
-        m = pool.map(construct_tuple, range(1, total_numbers_to_sqrt))
-        constructions_dict = dict(m)
-
-    sorted_constructions_dict = dict(sorted(constructions_dict.items()))
-    with open('num_steps.csv', 'w+') as csv:
-        for n, tup in sorted_constructions_dict.items():
-            csv.write(f'n for sqrt, {n}, num steps, {tup[0]}\n')
+    if '--unit-segment' in sys.argv[1:]:
+        base_function, filename = unit_segment_base_construction, 'num_steps_unit_segment.csv'
+    else:
+        base_function, filename = sqrt_base_construction, 'num_steps.csv'
+    with open(filename, 'w+') as csv:
+        for n, num_steps, _ in construct_batch(range(1, total_numbers_to_sqrt), base_function,
+                                               num_processes=cpu_count()):
+            csv.write(f'n for sqrt, {n}, num steps, {num_steps}\n')
+            csv.flush()
@@ -2,17 +2,26 @@ from typing import Union
 
 from gym import Env, spaces
 from geompy.core.Point import Point
-from geompy.core.Line import Line
-from geompy.core.Circle import Circle
-from geompy.core.Construction import Construction
-from geompy.core.PrebuiltConstructions import RandomConstruction
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.gym_environments.ConstructionRaster import ConstructionRaster
+from geompy.gym_environments.DesiredTarget import DesiredTarget
+from geompy.gym_environments.TargetCurriculum import TargetCurriculum
 import numpy as np
 
 
 class ConstructionEnvironment(Env):
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, boundary_radius: int = None, resolution: int = None):
+    def __init__(self, boundary_radius: int = None, resolution: int = None, length: int = 4,
+                 curriculum: TargetCurriculum = None, construction_mode: ConstructionMode = ConstructionMode.DEFAULT):
+        """
+        :param boundary_radius: how far from the origin in point space the observations reach
+        :param resolution: number of pixels across the observations
+        :param length: number of steps of the desired constructions
+        :param curriculum: optional archive of pregenerated desired constructions to sample from at reset, instead of
+        drawing a RandomConstruction. Its boundary radius and resolution must match the environment's.
+        :param construction_mode: construction mode of the desired constructions
+        """
         super(ConstructionEnvironment, self).__init__()
         # Define Action space
         self.resolution = resolution if resolution is not None else 32
@@ -30,10 +39,19 @@ class ConstructionEnvironment(Env):
         self.construction.add_point(Point(0, 0, "A"), interesting=False)
         self.construction.add_point(Point(1, 0, "B"), interesting=False)
 
+        # Observations are drawn into this buffer, the current construction in layers 0-2 and the desired one in 3-5.
+        # The rasters only draw what was added since the last observation, so the desired construction is only drawn
+        # after a reset.
+        self.observation = np.zeros((6, self.resolution, self.resolution), dtype=np.int16)
+        self._current_raster = ConstructionRaster(self.boundary_radius, self.resolution, out=self.observation[:3])
+
         # Just to emphasize, this construction could be any construction instance.
-        # For now, we will initialize it as a random construction (a subclass)
-        self.length = 4
-        self.desired_construction: Construction = RandomConstruction(length=self.length)
+        # For now, we will initialize it as a random construction (a subclass), or a target from the curriculum
+        self.length = length
+        self._desired = DesiredTarget(self.boundary_radius, self.resolution, length, curriculum, construction_mode,
+                                      out=self.observation[3:])
+        self._desired.new()
+        self._action_mask = None
 
     def step(self, action):
         """
@@ -46,13 +64,23 @@ class ConstructionEnvironment(Env):
 
         # Perform the desired action on the construction
         self.construction.perform_action(action, self.boundary_radius, self.resolution)
+        self._action_mask = None
 
         # Make sure we show the agent both the current board and the desired points
-        new_missing, current_observation, desired_observation = self._current_missing_points()
-        observation = np.concatenate((current_observation, desired_observation))
+        new_missing, _, _ = self._current_missing_points()
+        observation = self.observation.copy()
+
+        reward, done = self.step_reward(old_missing, new_missing)
+        return observation, reward, done
 
-        # Calculate reward
-        # Simple reward scheme is simply .5 points every time the agent finds a desired point and 1 point when done
+    @staticmethod
+    def step_reward(old_missing: int, new_missing: int) -> (float, bool):
+        """
+        Simple reward scheme is simply .5 points every time the agent finds a desired point and 1 point when done
+        :param old_missing: number of desired points missing before the step
+        :param new_missing: number of desired points missing after the step
+        :return: the reward (float), and whether all the desired points are found (bool)
+        """
         # TODO: More complex reward scheme that favors shorter constructions
         reward: float = 0
         done = False  # Have we found all the points?
@@ -60,8 +88,7 @@ class ConstructionEnvironment(Env):
             reward += 1
             done = True
         reward += .5 * (old_missing - new_missing)  # Half point for every new point found
-
-        return observation, reward, done
+        return reward, done
 
     def reset(self):
         # Reset the construction
@@ -73,97 +100,81 @@ class ConstructionEnvironment(Env):
         self.construction.add_point(Point(1, 0, "B"), interesting=False)
 
         # Just to emphasize, this construction could be any construction instance.
-        # For now, we will initialize it as a random construction (a subclass)
-        self.desired_construction: Construction = RandomConstruction(length=self.length)
+        # For now, we will initialize it as a random construction (a subclass), or a target from the curriculum
+        self._desired.new()
+        self._action_mask = None
 
         # Make sure we show the agent both the current board and the desired points
-        _, current_observation, desired_observation = self._current_missing_points()
-        observation = np.concatenate((current_observation, desired_observation))
+        self._current_missing_points()
+        observation = self.observation.copy()
         return observation
 
+    @property
+    def desired_construction(self) -> Construction:
+        """The construction whose points are desired. See DesiredTarget.construction for curriculum targets."""
+        return self._desired.construction
+
+    @desired_construction.setter
+    def desired_construction(self, construction: Construction) -> None:
+        self._desired.construction = construction
+
     def render(self, mode='human'):
         self.construction.plain_text(self.boundary_radius, self.resolution)
         self.desired_construction.plain_text(self.boundary_radius, self.resolution)
 
     def _current_missing_points(self) -> (int, np.array, np.array):
         """
-        Count how many points in self.desired_construction are missing in self.construction
+        Count how many points in self.desired_construction are missing in self.construction. Points are compared
+        exactly, by their keys, so points in the same pixel are told apart. Only the points added since the last count
+        are looked at.
         :return: int representing the number of missing points
-        :return: np.array representing the current observations
-        :return: np.array representing the desired observations
+        :return: np.array representing the current observations (a view of self.observation)
+        :return: np.array representing the desired observations (a view of self.observation)
         """
         # Make sure we show the agent both the current board and the desired points
-        current_observation = self.construction.numpy(self.boundary_radius, self.resolution)
-        desired_observation = self.desired_construction.numpy(self.boundary_radius, self.resolution, interesting=True)
-        # observation = np.concatenate((current_observation, desired_observation))
-
-        # Take the desired points (binary) and subtract current points.
-        # Then get rid of any negatives (meaning there were extra points).
-        # If there are any 1's left, then we haven't found that pixel.
-        difference_matrix = desired_observation[0] - current_observation[0]
-        difference_matrix[difference_matrix < 0] = 0
-        return np.count_nonzero(difference_matrix), current_observation, desired_observation
+        current_observation = self._current_raster.update(self.construction)
+        missing = self._desired.update(self.construction)
+        return missing, current_observation, self._desired.layers
 
     @staticmethod
     def _point_to_image_space(point: Union[Point, np.array], boundary_radius: int, resolution: int) -> np.array:
         origin = np.array([resolution / 2, resolution / 2])
         if type(point) is Point:
             point = point.numpy()
-        return (point * resolution / (2 * boundary_radius) + origin).round().astype(np.uint16)
+        # Signed, so points left of or below the image do not wrap around to large pixels
+        return (point * resolution / (2 * boundary_radius) + origin).round().astype(np.int64)
 
     @staticmethod
     def _points_to_action_number(point1: np.array, point2: np.array, is_line: bool, boundary_radius: int, resolution: int):
         # If either of the points do not exist, return 0 action
         if point1 is None or point2 is None:
             return 0
-        # Otherwise, convert to image (pixel) space coordinates
+        # Otherwise, convert to image (pixel) space coordinates, and encode them the way Construction decodes them
         point1 = ConstructionEnvironment._point_to_image_space(point1, boundary_radius, resolution)
         point2 = ConstructionEnvironment._point_to_image_space(point2, boundary_radius, resolution)
+        return Construction._action_number(point1, point2, is_line, resolution)
 
-
-        # Start with action=0. We will encode the actions as an integer.
-        action = 0
-        action += point2[1] * resolution**4
-        action += point2[0] * resolution**3
-        action += point1[1] * resolution**2
-        action += point1[0] * resolution
-        action = int(action)
-
-        # We define the last bit to be whether or not the action is drawing a line.
-        # True = line, False = circle
-        action = action << 1
-        if is_line:
-            action += 1
-
-        return action
+    def action_mask(self) -> np.array:
+        """
+        Boolean mask of the actions that draw a new line or circle. It is cached until the next step or reset.
+        Returns:
+            A boolean array of shape (number_of_actions,).
+        """
+        if self._action_mask is None:
+            self._action_mask = self.construction.action_mask(self.boundary_radius, self.resolution)
+        return self._action_mask
 
     def legal_actions(self):
         """
         Should return the legal actions at each turn, if it is not available, it can return
         the whole action space. At each turn, the game have to be able to handle one of returned actions.
 
-        For complex game where calculating legal moves is too long, the idea is to define the legal actions
-        equal to the action space but to return a negative reward if the action is illegal.
+        Many action numbers perform the same step, since every pixel maps to its nearest point, so this returns one
+        action number for each legal step. Use action_mask for all of them.
         Returns:
             An array of integers, subset of the action space.
         """
-        legal_moves: {int} = set()  # List of integers showing legal moves
-        for point1 in self.construction.points:
-            for point2 in self.construction.points:
-                if point1 is not point2:
-                    # TODO: This may slow down training if the network thinks line(A,B) != line(B,A), but legal
-                    #  actions thinks they are the same
-                    if Line(point1, point2) not in self.construction.lines:
-                        legal_moves.add(self._points_to_action_number(point1, point2, True,
-                                                                      self.boundary_radius, self.resolution))
-                    if Circle(center=point1, point2=point2) not in self.construction.circles:
-                        legal_moves.add(self._points_to_action_number(point1, point2, False,
-                                                                      self.boundary_radius, self.resolution))
-                    if Circle(center=point2, point2=point1) not in self.construction.circles:
-                        legal_moves.add(self._points_to_action_number(point2, point1, False,
-                                                                      self.boundary_radius, self.resolution))
-
-        return list(legal_moves)
+        return self.construction.legal_action_numbers(self.boundary_radius, self.resolution).tolist()
 
     def action_to_string(self, action_number):
         """
@@ -0,0 +1,67 @@
+"""
+Raster of a construction that is kept up to date incrementally.
+
+Constructions only grow: a step adds a line or circle and its intersection points, and never removes anything. Drawing
+is additive, so a raster can be brought up to date by drawing only what was added since it was last drawn, instead of
+drawing the whole construction again. ConstructionRaster remembers what it has drawn, and redraws from scratch only if
+the construction was replaced, or something it had drawn was removed.
+"""
+from geompy.core.Construction import Construction
+
+import numpy as np
+
+
+class ConstructionRaster:
+    """The array Construction.numpy would return for the last construction given to update, drawn incrementally."""
+
+    def __init__(self, boundary_radius: int, resolution: int, interesting: bool = False, out: np.array = None):
+        """
+        :param boundary_radius: how far from the origin in point space the raster reaches
+        :param resolution: number of pixels across the raster
+        :param interesting: if true, only draw the interesting points, lines and circles
+        :param out: optional array of shape (3, resolution, resolution) to draw into, instead of allocating a new one
+        """
+        self.boundary_radius = boundary_radius
+        self.resolution = resolution
+        self.interesting = interesting
+        self.layers = out if out is not None else np.zeros((3, resolution, resolution), dtype=np.int16)
+        self.construction: Construction = None
+        # The sets of the construction that were drawn, and copies of what they held
+        self._sources = (None, None, None)
+        self._drawn = (set(), set(), set())
+
+    def _object_sets(self, construction: Construction) -> (set, set, set):
+        if self.interesting:
+            return construction.interesting_points, construction.interesting_lines, construction.interesting_circles
+        return construction.points, construction.lines, construction.circles
+
+    def redraw(self, construction: Construction) -> np.array:
+        """
+        Draw a construction from scratch.
+        :return: the layers
+        """
+        sources = self._object_sets(construction)
+        construction.numpy(self.boundary_radius, self.resolution, interesting=self.interesting, out=self.layers)
+        self.construction = construction
+        self._sources = sources
+        self._drawn = tuple(set(source) for source in sources)
+        return self.layers
+
+    def update(self, construction: Construction) -> np.array:
+        """
+        Bring the raster up to date with construction, drawing only what was added since the last update.
+        :return: the layers
+        """
+        sources = self._object_sets(construction)
+        if construction is not self.construction or any(source is not old for source, old in zip(sources,
+                                                                                                 self._sources)):
+            return self.redraw(construction)
+        if all(len(source) == len(drawn) for source, drawn in zip(sources, self._drawn)):
+            return self.layers  # Nothing was added
+        added = tuple(source - drawn for source, drawn in zip(sources, self._drawn))
+        if any(len(drawn) + len(new) != len(source) for source, drawn, new in zip(sources, self._drawn, added)):
+            return self.redraw(construction)  # Something that was drawn is gone
+        construction.draw(self.boundary_radius, self.resolution, self.layers, *added)
+        for drawn, new in zip(self._drawn, added):
+            drawn.update(new)
+        return self.layers
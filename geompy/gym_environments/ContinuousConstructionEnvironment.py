@@ -4,15 +4,26 @@ from gym import Env, spaces
 from geompy.core.Point import Point
 from geompy.core.Line import Line
 from geompy.core.Circle import Circle
-from geompy.core.Construction import Construction
-from geompy.core.PrebuiltConstructions import RandomConstruction
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.gym_environments.ConstructionRaster import ConstructionRaster
+from geompy.gym_environments.DesiredTarget import DesiredTarget
+from geompy.gym_environments.TargetCurriculum import TargetCurriculum
 import numpy as np
 
 
 class ConstructionEnvironment(Env):
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, boundary_radius: int = None, resolution: int = None, length=4):
+    def __init__(self, boundary_radius: int = None, resolution: int = None, length=4,
+                 curriculum: TargetCurriculum = None, construction_mode: ConstructionMode = ConstructionMode.DEFAULT):
+        """
+        :param boundary_radius: how far from the origin in point space the observations reach
+        :param resolution: number of pixels across the observations
+        :param length: number of steps of the desired constructions
+        :param curriculum: optional archive of pregenerated desired constructions to sample from at reset, instead of
+        drawing a RandomConstruction. Its boundary radius and resolution must match the environment's.
+        :param construction_mode: construction mode of the desired constructions
+        """
         super(ConstructionEnvironment, self).__init__()
         # Define Action space
         self.resolution = resolution if resolution is not None else 8
@@ -32,10 +43,16 @@ class ConstructionEnvironment(Env):
         self.construction.add_point(Point(0, 0, "A"), interesting=False)
         self.construction.add_point(Point(1, 0, "B"), interesting=False)
 
+        # Same observation layout as the discrete ConstructionEnvironment, drawn incrementally into one buffer
+        self.observation = np.zeros((6, self.resolution, self.resolution), dtype=np.int16)
+        self._current_raster = ConstructionRaster(self.boundary_radius, self.resolution, out=self.observation[:3])
+
         # Just to emphasize, this construction could be any construction instance.
-        # For now, we will initialize it as a random construction (a subclass)
+        # For now, we will initialize it as a random construction (a subclass), or a target from the curriculum
         self.length = length
-        self.desired_construction: Construction = RandomConstruction(length=self.length)
+        self._desired = DesiredTarget(self.boundary_radius, self.resolution, length, curriculum, construction_mode,
+                                      out=self.observation[3:])
+        self._desired.new()
 
     def step(self, action):
         """
@@ -50,8 +67,8 @@ class ConstructionEnvironment(Env):
         self.construction.perform_action_continuous(action, self.boundary_radius)
 
         # Make sure we show the agent both the current board and the desired points
-        new_missing, current_observation, desired_observation = self._current_missing_points()
-        observation = np.concatenate((current_observation, desired_observation))
+        new_missing, _, _ = self._current_missing_points()
+        observation = self.observation.copy()
 
         # Calculate reward
         # Simple reward scheme is simply .5 points every time the agent finds a desired point and 1 point when done
@@ -75,36 +92,40 @@ class ConstructionEnvironment(Env):
         self.construction.add_point(Point(1, 0, "B"), interesting=False)
 
         # Just to emphasize, this construction could be any construction instance.
-        # For now, we will initialize it as a random construction (a subclass)
-        self.desired_construction: Construction = RandomConstruction(length=self.length)
+        # For now, we will initialize it as a random construction (a subclass), or a target from the curriculum
+        self._desired.new()
 
         # Make sure we show the agent both the current board and the desired points
-        _, current_observation, desired_observation = self._current_missing_points()
-        observation = np.concatenate((current_observation, desired_observation))
+        self._current_missing_points()
+        observation = self.observation.copy()
         return observation
 
+    @property
+    def desired_construction(self) -> Construction:
+        """The construction whose points are desired. See DesiredTarget.construction for curriculum targets."""
+        return self._desired.construction
+
+    @desired_construction.setter
+    def desired_construction(self, construction: Construction) -> None:
+        self._desired.construction = construction
+
     def render(self, mode='human'):
         self.construction.plain_text(self.boundary_radius, self.resolution)
         self.desired_construction.plain_text(self.boundary_radius, self.resolution)
 
     def _current_missing_points(self) -> (int, np.array, np.array):
         """
-        Count how many points in self.desired_construction are missing in self.construction
+        Count how many points in self.desired_construction are missing in self.construction. Points are compared
+        exactly, by their keys, so points in the same pixel are told apart. Only the points added since the last count
+        are looked at.
         :return: int representing the number of missing points
-        :return: np.array representing the current observations
-        :return: np.array representing the desired observations
+        :return: np.array representing the current observations (a view of self.observation)
+        :return: np.array representing the desired observations (a view of self.observation)
         """
         # Make sure we show the agent both the current board and the desired points
-        current_observation = self.construction.numpy(self.boundary_radius, self.resolution)
-        desired_observation = self.desired_construction.numpy(self.boundary_radius, self.resolution, interesting=True)
-        # observation = np.concatenate((current_observation, desired_observation))
-
-        # Take the desired points (binary) and subtract current points.
-        # Then get rid of any negatives (meaning there were extra points).
-        # If there are any 1's left, then we haven't found that pixel.
-        difference_matrix = desired_observation[0] - current_observation[0]
-        difference_matrix[difference_matrix < 0] = 0
-        return np.count_nonzero(difference_matrix), current_observation, desired_observation
+        current_observation = self._current_raster.update(self.construction)
+        missing = self._desired.update(self.construction)
+        return missing, current_observation, self._desired.layers
 
     @staticmethod
     def _point_to_image_space(point: Union[Point, np.array], boundary_radius: int, resolution: int) -> np.array:
@@ -0,0 +1,96 @@
+"""
+The desired construction of an episode, drawn and counted incrementally.
+
+The desired construction of an environment is either a RandomConstruction, or a target sampled from a TargetCurriculum,
+whose raster and point keys were computed ahead of time. DesiredTarget hides the difference from the environments: it
+draws the desired layers of the observation (with a ConstructionRaster, or by copying the stored raster), counts the
+desired points missing from a construction (with a TargetPoints), and only builds the construction of a curriculum
+target if it is asked for.
+"""
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.PrebuiltConstructions import RandomConstruction
+from geompy.gym_environments.ConstructionRaster import ConstructionRaster
+from geompy.gym_environments.TargetCurriculum import CurriculumTarget, TargetCurriculum
+from geompy.gym_environments.TargetPoints import TargetPoints
+
+import random
+
+import numpy as np
+
+
+class DesiredTarget:
+    """The desired construction of an environment, its raster, and the desired points missing from a construction."""
+
+    def __init__(self, boundary_radius: int, resolution: int, length: int, curriculum: TargetCurriculum = None,
+                 construction_mode: ConstructionMode = ConstructionMode.DEFAULT, out: np.array = None):
+        """
+        :param boundary_radius: how far from the origin in point space the raster reaches
+        :param resolution: number of pixels across the raster
+        :param length: number of steps of the desired constructions
+        :param curriculum: optional archive of pregenerated desired constructions to sample from, instead of drawing
+        RandomConstructions. Its boundary radius and resolution must match.
+        :param construction_mode: construction mode of the desired constructions
+        :param out: optional array of shape (3, resolution, resolution) to draw into, instead of allocating a new one
+        """
+        if curriculum is not None:
+            curriculum.check_compatible(boundary_radius, resolution)
+        self.length = length
+        self.curriculum = curriculum
+        self.construction_mode = construction_mode
+        self.raster = ConstructionRaster(boundary_radius, resolution, interesting=True, out=out)
+        # Target sampled from the curriculum, whose construction is only built if it is asked for
+        self.target: CurriculumTarget = None
+        self._construction: Construction = None
+        self.target_points: TargetPoints = None
+        # The desired construction (or curriculum target) that the layers and target_points were made from
+        self._source = None
+
+    @property
+    def layers(self) -> np.array:
+        return self.raster.layers
+
+    @property
+    def construction(self) -> Construction:
+        """
+        The desired construction. The construction of a curriculum target is rebuilt from its point keys, so it only
+        holds the interesting points, and not the lines and circles drawn in the target's raster.
+        """
+        if self._construction is None and self.target is not None:
+            self._construction = self.target.construction()
+        return self._construction
+
+    @construction.setter
+    def construction(self, construction: Construction) -> None:
+        self._construction = construction
+        self.target = None
+
+    def new(self, rng: random.Random = None) -> None:
+        """
+        Choose the desired construction of a new episode: a RandomConstruction, or a target from the curriculum.
+        :param rng: random number generator to choose with. Defaults to the random module.
+        """
+        if self.curriculum is None:
+            self.construction = RandomConstruction(self.length, construction_mode=self.construction_mode, rng=rng)
+        else:
+            self.construction = None
+            self.target = self.curriculum.sample(self.length, self.construction_mode, rng=rng)
+
+    def update(self, construction: Construction) -> int:
+        """
+        Bring the layers up to date with the desired construction, and count the desired points missing from
+        construction, looking only at the points added since the last update.
+        :return: the number of missing points
+        """
+        if self.target is not None:
+            # The raster and point keys of a curriculum target are stored in the curriculum
+            if self._source is not self.target:
+                self.layers[:] = self.target.raster
+                self.raster.construction = None  # Its layers were overwritten
+                self.target_points = TargetPoints.from_keys(self.target.keys)
+                self._source = self.target
+        else:
+            self.raster.update(self._construction)
+            if self._source is not self._construction:
+                self.target_points = TargetPoints(self._construction.interesting_points)
+                self._source = self._construction
+        return self.target_points.update(construction)
@@ -0,0 +1,290 @@
+"""
+Monte Carlo Tree Search (UCT) planner for the construction environments.
+
+The states of the tree are Constructions, and its actions are the steps in each construction's incremental action set.
+Rewards follow ConstructionEnvironment.step_reward: half a point for every desired point found, and one more when all of
+them are found. Points are matched exactly, by their keys, rather than by pixels.
+
+Each node owns its construction, cloned from its parent's with Construction.copy(), which shares the (immutable) points,
+lines and circles, and carries over the parent's action set, so a child only computes the actions of its new points.
+Rollouts clone the leaf's construction once, add random steps to the clone, and throw it away, so the tree is never
+modified by a rollout and nothing needs to be undone.
+
+The tree is reused between moves: advancing to a child keeps its subtree and statistics. Simulations can also be spread
+over processes by root parallelization: each process grows its own tree from the root, with its own seed, and the
+visits and returns of the root's children are summed over the trees.
+"""
+from geompy import Point
+from geompy.core.Construction import Construction
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from .ConstructionEnvironment import ConstructionEnvironment
+
+import math
+from multiprocessing import Pool
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from numpy.random import SeedSequence
+
+
+class MCTSNode:
+    """A construction in the search tree, and the statistics of the simulations that passed through it."""
+    __slots__ = ('parent', 'action', 'construction', 'depth', 'missing', 'reward', 'done', 'children',
+                 'untried_actions', 'visits', 'total_return')
+
+    def __init__(self, parent: Optional['MCTSNode'], action, construction: Construction, depth: int,
+                 missing: frozenset, reward: float, done: bool):
+        """
+        :param parent: node this one was expanded from. None for the root.
+        :param action: step that leads from the parent to this node
+        :param construction: the construction, which belongs to this node
+        :param depth: number of steps added to the base of the search
+        :param missing: keys of the target points not yet constructed
+        :param reward: reward of the step from the parent
+        :param done: true if every target point is constructed
+        """
+        self.parent = parent
+        self.action = action
+        self.construction = construction
+        self.depth = depth
+        self.missing = missing
+        self.reward = reward
+        self.done = done
+        self.children: Dict[str, MCTSNode] = {}
+        # Actions not yet expanded, in random order. Computed on the first expansion.
+        self.untried_actions: Optional[list] = None
+        self.visits = 0
+        # Sum of the (discounted) returns of the simulations through this node, starting with its own reward
+        self.total_return = 0.0
+
+    @property
+    def mean_return(self) -> float:
+        return self.total_return / self.visits if self.visits else 0.0
+
+
+class MonteCarloTreeSearch:
+    """
+    UCT search for a construction of some target points. Use search and best_action to choose the next step, and
+    advance to take it, or plan to do both until the targets are constructed.
+    """
+
+    def __init__(self, target_points: Iterable[Point], base: Construction = None, max_steps: int = 6,
+                 rollout_steps: int = None, exploration: float = math.sqrt(2), discount: float = .95,
+                 seed: int = None):
+        """
+        :param target_points: points to construct
+        :param base: construction to start from. Defaults to the base construction.
+        :param max_steps: maximum number of steps to add to the base
+        :param rollout_steps: maximum number of random steps in each rollout. Defaults to max_steps.
+        :param exploration: weight of the exploration term of UCT
+        :param discount: factor applied to the rewards of each later step, so shorter constructions are preferred
+        :param seed: seed of the random choices of the search. Unseeded by default.
+        """
+        self.target_points = list(target_points)
+        self.max_steps = max_steps
+        self.rollout_steps = rollout_steps if rollout_steps is not None else max_steps
+        self.exploration = exploration
+        self.discount = discount
+        self.seed = seed
+        self.rng = random.Random(seed)
+        base = base if base is not None else BaseConstruction()
+        missing = frozenset(point.key() for point in self.target_points) - \
+            frozenset(point.key() for point in base.points)
+        self.root = MCTSNode(None, None, base.copy(), 0, missing, 0.0, not missing)
+        self.num_simulations = 0
+
+    @classmethod
+    def from_environment(cls, environment: ConstructionEnvironment, **kwargs) -> 'MonteCarloTreeSearch':
+        """
+        :param environment: environment whose desired points to construct, from its current construction
+        :param kwargs: other arguments of the search
+        """
+        return cls(environment.desired_construction.interesting_points, environment.construction, **kwargs)
+
+    def is_terminal(self, node: MCTSNode) -> bool:
+        return node.done or node.depth >= self.max_steps
+
+    def transition(self, missing: frozenset, construction: Construction,
+                   points_before: set) -> (frozenset, float, bool):
+        """
+        :param missing: keys of the target points missing before the step
+        :param construction: construction after the step
+        :param points_before: points of the construction before the step
+        :return: the keys of the target points missing after the step, and the reward and done of the step
+        """
+        new_missing = missing - {point.key() for point in construction.points - points_before}
+        reward, done = ConstructionEnvironment.step_reward(len(missing), len(new_missing))
+        return new_missing, reward, done
+
+    def expand(self, node: MCTSNode, action) -> MCTSNode:
+        """
+        :return: the child of node reached by action, which is added to the tree
+        """
+        construction = node.construction.copy()
+        construction.add_step_premade(action, interesting=True)
+        missing, reward, done = self.transition(node.missing, construction, node.construction.points)
+        child = MCTSNode(node, action, construction, node.depth + 1, missing, reward, done)
+        node.children[action.key()] = child
+        return child
+
+    def next_untried_action(self, node: MCTSNode):
+        """
+        :return: an action of node that has no child yet, or None if every action has one
+        """
+        if node.untried_actions is None:
+            node.untried_actions = sorted(node.construction.actions, key=lambda action: action.key())
+            self.rng.shuffle(node.untried_actions)
+        while node.untried_actions:
+            action = node.untried_actions.pop()
+            if action.key() not in node.children:
+                return action
+        return None
+
+    def select(self, node: MCTSNode) -> MCTSNode:
+        """
+        :return: the child of node with the largest upper confidence bound
+        """
+        log_visits = math.log(node.visits)
+        return max(node.children.values(), key=lambda child: child.mean_return +
+                   self.exploration * math.sqrt(log_visits / child.visits))
+
+    def rollout(self, node: MCTSNode) -> float:
+        """
+        :return: the discounted return of random steps from node, on a clone of its construction
+        """
+        if self.is_terminal(node):
+            return 0.0
+        construction = node.construction.copy()
+        missing = node.missing
+        total_return, scale = 0.0, 1.0
+        for _ in range(min(self.rollout_steps, self.max_steps - node.depth)):
+            points_before = set(construction.points)
+            construction.add_random_construction(interesting=True, rng=self.rng)
+            missing, reward, done = self.transition(missing, construction, points_before)
+            total_return += scale * reward
+            scale *= self.discount
+            if done:
+                break
+        return total_return
+
+    def simulate(self) -> None:
+        """Select a leaf, expand it, roll out from the new node, and back up the return."""
+        node = self.root
+        action = None
+        while not self.is_terminal(node):
+            action = self.next_untried_action(node)
+            if action is not None or not node.children:
+                break
+            node = self.select(node)
+        if action is not None and not self.is_terminal(node):
+            node = self.expand(node, action)
+        value = node.reward + self.discount * self.rollout(node)
+        while True:
+            node.visits += 1
+            node.total_return += value
+            node = node.parent
+            if node is None:
+                break
+            value = node.reward + self.discount * value
+        self.num_simulations += 1
+
+    def search(self, num_simulations: int, num_processes: int = 1) -> None:
+        """
+        Run simulations from the root.
+        :param num_simulations: total number of simulations
+        :param num_processes: number of processes to split the simulations over, each growing its own tree. Only the
+        statistics of the root's children are merged into this tree.
+        """
+        if num_processes <= 1:
+            for _ in range(num_simulations):
+                self.simulate()
+            return
+        jobs = [(self.target_points, self.root.construction, self.max_steps - self.root.depth, self.rollout_steps,
+                 self.exploration, self.discount, self.process_seed(process_index),
+                 num_simulations // num_processes + (process_index < num_simulations % num_processes))
+                for process_index in range(num_processes)]
+        with Pool(num_processes) as pool:
+            for statistics in pool.map(root_statistics, jobs):
+                self.merge(statistics)
+
+    def process_seed(self, process_index: int) -> int:
+        """
+        :return: seed for one process of a root-parallel search from the current root
+        """
+        entropy = self.seed if self.seed is not None else self.rng.getrandbits(64)
+        return int(SeedSequence(entropy, spawn_key=(self.root.depth, process_index)).generate_state(1)[0])
+
+    def merge(self, statistics: List[Tuple[object, int, float]]) -> None:
+        """
+        Add the statistics of the root's children from another tree to this one.
+        :param statistics: (action, visits, total return) of each child of the other tree's root
+        """
+        for action, visits, total_return in statistics:
+            child = self.root.children.get(action.key())
+            if child is None:
+                child = self.expand(self.root, action)
+            child.visits += visits
+            child.total_return += total_return
+            self.root.visits += visits
+            self.root.total_return += self.root.reward * visits + self.discount * total_return
+            self.num_simulations += visits
+
+    def best_action(self):
+        """
+        :return: the most visited action of the root (the one with the larger mean return among equals)
+        """
+        return max(self.root.children.values(), key=lambda child: (child.visits, child.mean_return)).action
+
+    def advance(self, action) -> MCTSNode:
+        """
+        Take a step, keeping the subtree of the resulting node for the next search.
+        :param action: step to take from the root
+        :return: the new root
+        """
+        child = self.root.children.get(action.key())
+        if child is None:
+            child = self.expand(self.root, action)
+        child.parent = None
+        self.root = child
+        return child
+
+    def plan(self, simulations_per_step: int, num_processes: int = 1) -> (Construction, float):
+        """
+        Search and advance until the targets are constructed or max_steps steps were taken.
+        :param simulations_per_step: number of simulations before each step
+        :param num_processes: number of processes to split the simulations over
+        :return: the final construction, and the total (undiscounted) reward of the steps taken
+        """
+        total_reward = 0.0
+        while not self.is_terminal(self.root):
+            self.search(simulations_per_step, num_processes)
+            self.advance(self.best_action())
+            total_reward += self.root.reward
+        return self.root.construction, total_reward
+
+
+def root_statistics(job: tuple) -> List[Tuple[object, int, float]]:
+    """
+    Grow a tree in this process, for a root-parallel search.
+    :param job: (target points, root construction, max steps, rollout steps, exploration, discount, seed, number of
+    simulations)
+    :return: (action, visits, total return) of each child of the root
+    """
+    target_points, construction, max_steps, rollout_steps, exploration, discount, seed, num_simulations = job
+    search = MonteCarloTreeSearch(target_points, construction, max_steps, rollout_steps, exploration, discount, seed)
+    search.search(num_simulations)
+    return [(child.action, child.visits, child.total_return) for child in search.root.children.values()]
+
+
+if __name__ == '__main__':
+    import time
+    from geompy.core.PrebuiltConstructions import RandomConstruction
+
+    random.seed(0)
+    for length in range(1, 4):
+        desired_construction = RandomConstruction(length)
+        start_time = time.perf_counter()
+        mcts = MonteCarloTreeSearch(desired_construction.interesting_points, max_steps=length + 1, seed=0)
+        final_construction, final_reward = mcts.plan(simulations_per_step=50)
+        print(f'Target of length {length}: {len(final_construction)} steps, reward {final_reward}, '
+              f'{mcts.num_simulations} simulations in {time.perf_counter() - start_time:.1f}s')
@@ -0,0 +1,227 @@
+"""
+Vector environment that steps construction environments in subprocesses.
+
+The geometry of each step is pure Python, so VectorConstructionEnvironment can only use one core. This environment
+spreads the environments over worker processes instead. It works with ConstructionEnvironment and with the continuous
+ConstructionEnvironment: anything with reset() returning an observation, and step(action) returning the observation,
+reward and done first.
+
+The workers write their observations straight into one array in shared memory, so observations are never pickled. Only
+the actions and the rewards and dones go through the pipes. step sends the actions to every worker before waiting for
+any of them, so the workers step their environments at the same time.
+"""
+from multiprocessing import get_context, resource_tracker, shared_memory
+import os
+import random
+from typing import Callable, List, Sequence
+
+import numpy as np
+from numpy.random import SeedSequence
+
+
+def worker(pipe, environment_functions: List[Callable], indices: List[int], seed: int) -> None:
+    """
+    Build and step some of the environments, until told to close.
+    :param pipe: connection to the vector environment
+    :param environment_functions: functions building each environment of this worker
+    :param indices: positions of this worker's environments in the vector environment
+    :param seed: seed of the random module, from which the environments draw their random desired constructions
+    """
+    random.seed(seed)
+    memory = observations = None
+    try:
+        environments = [function() for function in environment_functions]
+        first_observations = [environment.reset() for environment in environments]
+        pipe.send((first_observations[0].shape, first_observations[0].dtype.str))
+        # The vector environment allocates the shared memory once it knows the shape of the observations
+        memory_name, shape, dtype = pipe.recv()
+        memory = shared_memory.SharedMemory(name=memory_name)
+        observations = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        observations[indices] = first_observations
+        pipe.send(None)
+        while True:
+            command, data = pipe.recv()
+            if command == 'reset':
+                for index, environment in zip(indices, environments):
+                    observations[index] = environment.reset()
+                pipe.send(None)
+            elif command == 'step':
+                results = []
+                for index, environment, action in zip(indices, environments, data):
+                    observation, reward, done = environment.step(action)[:3]
+                    if done:
+                        observation = environment.reset()
+                    observations[index] = observation
+                    results.append((reward, done))
+                pipe.send(results)
+            elif command == 'close':
+                break
+    except Exception as exception:
+        pipe.send(exception)
+    finally:
+        if memory is not None:
+            observations = None
+            memory.close()
+        pipe.close()
+
+
+class SubprocessVectorEnvironment:
+    metadata = {'render.modes': []}
+
+    def __init__(self, environment_functions: Sequence[Callable], num_processes: int = None, seed: int = None,
+                 copy: bool = True, context: str = None):
+        """
+        The environments are reset when the workers start, so step can be called before reset.
+        :param environment_functions: functions building each environment, e.g. functools.partial(
+        ConstructionEnvironment, resolution=16). They must be picklable unless the context is fork.
+        :param num_processes: number of worker processes, each stepping an equal share of the environments. Defaults to
+        one per core, and at most one per environment.
+        :param seed: seed of the workers' random modules. Unseeded by default.
+        :param copy: if true, step and reset return a copy of the observations. Otherwise they return the shared array
+        itself, which the next step overwrites.
+        :param context: multiprocessing start method. Defaults to the platform's default.
+        """
+        self.num_envs = len(environment_functions)
+        num_processes = num_processes if num_processes is not None else os.cpu_count()
+        self.num_processes = max(1, min(num_processes, self.num_envs))
+        self.copy = copy
+        self.closed = False
+        entropy = seed if seed is not None else SeedSequence().entropy
+        multiprocessing_context = get_context(context)
+        # Start the resource tracker before the workers, so they share it instead of each starting one that would
+        # unlink the shared memory when the worker exits
+        resource_tracker.ensure_running()
+
+        self.pipes = []
+        self.processes = []
+        self.indices: List[List[int]] = []
+        for process_index in range(self.num_processes):
+            indices = list(range(process_index, self.num_envs, self.num_processes))
+            process_seed = int(SeedSequence(entropy, spawn_key=(process_index,)).generate_state(1)[0])
+            parent_pipe, child_pipe = multiprocessing_context.Pipe()
+            process = multiprocessing_context.Process(
+                target=worker, args=(child_pipe, [environment_functions[index] for index in indices], indices,
+                                     process_seed), daemon=True)
+            process.start()
+            child_pipe.close()
+            self.pipes.append(parent_pipe)
+            self.processes.append(process)
+            self.indices.append(indices)
+
+        self.memory = None
+        try:
+            observation_shape, dtype = self._receive_all()[0]
+            shape = (self.num_envs, *observation_shape)
+            self.memory = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            self.observations = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf)
+            for pipe in self.pipes:
+                pipe.send((self.memory.name, shape, dtype))
+            self._receive_all()
+        except Exception:
+            self.close()
+            raise
+        self.rewards = np.zeros(self.num_envs, dtype=np.float32)
+        self.dones = np.zeros(self.num_envs, dtype=bool)
+
+    def _receive_all(self) -> list:
+        """
+        :return: the reply of every worker
+        :raises: the first exception raised in a worker
+        """
+        replies = [pipe.recv() for pipe in self.pipes]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def _result(self, *arrays):
+        return tuple(array.copy() for array in arrays) if self.copy else arrays
+
+    def reset(self) -> np.array:
+        """
+        Reset every environment.
+        :return: the observations, with shape (num_envs, *observation shape)
+        """
+        for pipe in self.pipes:
+            pipe.send(('reset', None))
+        self._receive_all()
+        return self._result(self.observations)[0]
+
+    def step_async(self, actions) -> None:
+        """
+        Send one action to each environment, without waiting for the steps.
+        :param actions: sequence of num_envs actions
+        """
+        for pipe, indices in zip(self.pipes, self.indices):
+            pipe.send(('step', [actions[index] for index in indices]))
+
+    def step_wait(self) -> (np.array, np.array, np.array):
+        """
+        Wait for the steps sent by step_async. Environments that are done are reset, so their observation is the first
+        one of the next episode.
+        :return: the observations (num_envs, *observation shape), rewards (num_envs,) and dones (num_envs,)
+        """
+        for indices, results in zip(self.indices, self._receive_all()):
+            for index, (reward, done) in zip(indices, results):
+                self.rewards[index] = reward
+                self.dones[index] = done
+        return self._result(self.observations, self.rewards, self.dones)
+
+    def step(self, actions) -> (np.array, np.array, np.array):
+        """
+        Apply one action to each environment.
+        :param actions: sequence of num_envs actions
+        :return: the observations (num_envs, *observation shape), rewards (num_envs,) and dones (num_envs,)
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory."""
+        if self.closed:
+            return
+        self.closed = True
+        for pipe, process in zip(self.pipes, self.processes):
+            if process.is_alive():
+                try:
+                    pipe.send(('close', None))
+                except (BrokenPipeError, EOFError):
+                    pass
+        for pipe, process in zip(self.pipes, self.processes):
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            pipe.close()
+        if self.memory is not None:
+            self.observations = None
+            try:
+                self.memory.close()
+            except BufferError:
+                pass  # Arrays returned with copy=False still use the memory, which is freed with them
+            self.memory.unlink()
+
+    def __enter__(self) -> 'SubprocessVectorEnvironment':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __del__(self):
+        if hasattr(self, 'closed'):
+            self.close()
+
+
+if __name__ == '__main__':
+    import functools
+    import time
+    from geompy.gym_environments.ConstructionEnvironment import ConstructionEnvironment
+
+    num_envs, num_steps = 8, 5
+    actions = np.random.default_rng(0).integers(32**4 * 2, size=(num_steps, num_envs))
+    for processes in sorted({1, os.cpu_count()}):
+        with SubprocessVectorEnvironment([functools.partial(ConstructionEnvironment)] * num_envs, processes,
+                                         seed=0) as vector_environment:
+            start_time = time.perf_counter()
+            for step_actions in actions:
+                vector_environment.step(step_actions)
+            print(f'{processes} processes: {num_envs * num_steps / (time.perf_counter() - start_time):.1f} steps/s')
@@ -0,0 +1,202 @@
+"""
+Curriculum of desired constructions, generated ahead of time and stored on disk.
+
+Drawing a RandomConstruction at every reset runs the whole exact arithmetic pipeline, which can cost more than a short
+episode. TargetCurriculum.generate draws many random targets in parallel, grouped by length and construction mode, and
+stores what the environments need from each: the raster of its interesting objects and the keys of its interesting
+points. Sampling a target then only reads from memory-mapped arrays.
+
+An archive is a directory holding:
+    index.json: the boundary radius and resolution of the rasters, and the range of targets in each group
+    rasters.npy: int16 array of shape (number of targets, 3, resolution, resolution), as Construction.numpy with
+        interesting=True
+    target_offsets.npy: the keys of target i are keys target_offsets[i] up to target_offsets[i + 1]
+    key_offsets.npy: key j is the utf-8 text in keys.bin from byte key_offsets[j] up to key_offsets[j + 1]
+    keys.bin: every key, concatenated
+"""
+from geompy.core.Construction import Construction, ConstructionMode
+from geompy.core.Point import Point
+from geompy.core.PrebuiltConstructions import RandomConstruction
+
+import json
+from multiprocessing import Pool
+import os
+import random
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+import numpy as np
+from numpy.random import SeedSequence
+
+# Number of targets each job of generate draws
+CHUNK_SIZE = 64
+
+
+class CurriculumTarget:
+    """One target of a curriculum. Its construction is only rebuilt if it is asked for."""
+    __slots__ = ('curriculum', 'index', 'length', 'construction_mode')
+
+    def __init__(self, curriculum: 'TargetCurriculum', index: int, length: int, construction_mode: ConstructionMode):
+        self.curriculum = curriculum
+        self.index = index
+        self.length = length
+        self.construction_mode = construction_mode
+
+    @property
+    def raster(self) -> np.array:
+        """(3, resolution, resolution) raster of the target's interesting points, lines and circles"""
+        return self.curriculum.rasters[self.index]
+
+    @property
+    def keys(self) -> FrozenSet[str]:
+        """keys of the target's interesting points"""
+        return self.curriculum.keys(self.index)
+
+    def construction(self) -> Construction:
+        """
+        :return: a construction whose interesting points are the target's. The steps that built them are not stored.
+        """
+        construction = Construction(name=f'CurriculumTarget_{self.index}', construction_mode=self.construction_mode)
+        for key in sorted(self.keys):
+            construction.add_point(Point.from_key(key), interesting=True)
+        return construction
+
+
+class TargetCurriculum:
+    """A curriculum archive, opened for sampling."""
+
+    def __init__(self, path: str):
+        """
+        :param path: directory of the archive, written by TargetCurriculum.generate
+        """
+        self.path = path
+        with open(os.path.join(path, 'index.json')) as file:
+            index = json.load(file)
+        self.boundary_radius = index['boundary_radius']
+        self.resolution = index['resolution']
+        self.groups: Dict[Tuple[int, ConstructionMode], Tuple[int, int]] = {
+            (group['length'], ConstructionMode[group['construction_mode']]): (group['start'], group['stop'])
+            for group in index['groups']}
+        self.rasters = np.load(os.path.join(path, 'rasters.npy'), mmap_mode='r')
+        self._target_offsets = np.load(os.path.join(path, 'target_offsets.npy'), mmap_mode='r')
+        self._key_offsets = np.load(os.path.join(path, 'key_offsets.npy'), mmap_mode='r')
+        key_bytes_path = os.path.join(path, 'keys.bin')
+        # A memory map cannot be empty
+        self._key_bytes = np.memmap(key_bytes_path, dtype=np.uint8, mode='r') \
+            if os.path.getsize(key_bytes_path) else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.rasters)
+
+    def __getstate__(self):
+        # Memory maps would be pickled with all their data, so reopen the archive instead
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+    def check_compatible(self, boundary_radius: int, resolution: int) -> None:
+        """
+        :raises ValueError: if the rasters of the archive do not have this boundary radius and resolution
+        """
+        if (self.boundary_radius, self.resolution) != (boundary_radius, resolution):
+            raise ValueError(f'The curriculum has boundary radius {self.boundary_radius} and resolution '
+                             f'{self.resolution}, but the environment has {boundary_radius} and {resolution}')
+
+    def keys(self, index: int) -> FrozenSet[str]:
+        """
+        :return: keys of the interesting points of target index
+        """
+        start, stop = self._target_offsets[index], self._target_offsets[index + 1]
+        return frozenset(bytes(self._key_bytes[self._key_offsets[key]:self._key_offsets[key + 1]]).decode()
+                         for key in range(start, stop))
+
+    def sample(self, length: int, construction_mode: ConstructionMode = ConstructionMode.DEFAULT,
+               rng: random.Random = None) -> CurriculumTarget:
+        """
+        :param length: number of steps of the target
+        :param construction_mode: construction mode of the target
+        :param rng: random number generator to choose with. Defaults to the random module.
+        :return: a target chosen uniformly from the group
+        :raises KeyError: if the archive has no targets of this length and mode
+        """
+        start, stop = self.groups[(length, construction_mode)]
+        rng = rng if rng is not None else random
+        return CurriculumTarget(self, rng.randrange(start, stop), length, construction_mode)
+
+    @staticmethod
+    def generate(path: str, lengths: Iterable[int], num_targets: int, boundary_radius: int = 2, resolution: int = 32,
+                 construction_modes: Iterable[ConstructionMode] = (ConstructionMode.DEFAULT,), seed: int = 0,
+                 num_processes: int = None) -> 'TargetCurriculum':
+        """
+        Draw random targets and write them to an archive. Each chunk of targets has its own seed, so the archive does
+        not depend on the number of processes, or on how they are started.
+        :param path: directory to write the archive to. It is created if needed.
+        :param lengths: number of steps of the targets in each group
+        :param num_targets: number of targets in each group
+        :param boundary_radius: how far from the origin in point space the rasters reach
+        :param resolution: number of pixels across the rasters
+        :param construction_modes: construction modes of the groups. There is a group for each length and mode.
+        :param seed: seed of the random targets
+        :param num_processes: number of processes drawing targets. Defaults to one per core.
+        :return: the archive, opened
+        """
+        lengths = list(lengths)
+        groups = [(length, mode) for mode in construction_modes for length in lengths]
+        jobs = [(length, mode, min(CHUNK_SIZE, num_targets - start), boundary_radius, resolution,
+                 int(SeedSequence(seed, spawn_key=(length, mode.value, start)).generate_state(1)[0]))
+                for length, mode in groups for start in range(0, num_targets, CHUNK_SIZE)]
+
+        os.makedirs(path, exist_ok=True)
+        rasters = np.lib.format.open_memmap(os.path.join(path, 'rasters.npy'), mode='w+', dtype=np.int16,
+                                            shape=(len(groups) * num_targets, 3, resolution, resolution))
+        target_offsets, key_offsets, key_bytes = [0], [0], bytearray()
+        index = 0
+        with Pool(num_processes) as pool:
+            # Results come in the order of the jobs, so each group is contiguous
+            for chunk in pool.imap(generate_targets, jobs):
+                for raster, keys in chunk:
+                    rasters[index] = raster
+                    for key in keys:
+                        key_bytes += key.encode()
+                        key_offsets.append(len(key_bytes))
+                    target_offsets.append(len(key_offsets) - 1)
+                    index += 1
+        rasters.flush()
+        del rasters
+
+        np.save(os.path.join(path, 'target_offsets.npy'), np.array(target_offsets, dtype=np.int64))
+        np.save(os.path.join(path, 'key_offsets.npy'), np.array(key_offsets, dtype=np.int64))
+        with open(os.path.join(path, 'keys.bin'), 'wb') as file:
+            file.write(key_bytes)
+        with open(os.path.join(path, 'index.json'), 'w') as file:
+            json.dump({'boundary_radius': boundary_radius, 'resolution': resolution,
+                       'groups': [{'length': length, 'construction_mode': mode.name, 'start': group_index * num_targets,
+                                   'stop': (group_index + 1) * num_targets}
+                                  for group_index, (length, mode) in enumerate(groups)]}, file, indent=2)
+        return TargetCurriculum(path)
+
+
+def generate_targets(job: tuple) -> List[Tuple[np.array, List[str]]]:
+    """
+    Draw some targets, for TargetCurriculum.generate.
+    :param job: (length, construction mode, number of targets, boundary radius, resolution, seed)
+    :return: the raster and sorted point keys of each target
+    """
+    length, construction_mode, num_targets, boundary_radius, resolution, seed = job
+    rng = random.Random(seed)
+    targets = []
+    for _ in range(num_targets):
+        construction = RandomConstruction(length, construction_mode=construction_mode, rng=rng)
+        targets.append((construction.numpy(boundary_radius, resolution, interesting=True),
+                        sorted({point.key() for point in construction.interesting_points})))
+    return targets
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    start_time = time.perf_counter()
+    curriculum = TargetCurriculum.generate(sys.argv[1] if len(sys.argv) > 1 else 'target_curriculum',
+                                           lengths=range(1, 5), num_targets=256)
+    print(f'Generated {len(curriculum)} targets in {time.perf_counter() - start_time:.1f}s')
@@ -0,0 +1,65 @@
+"""
+Exact, incremental accounting of the desired points missing from a construction.
+
+Counting missing points by comparing point layers pixel by pixel cannot tell apart points in the same pixel, and depends
+on the resolution. TargetPoints instead compares the canonical keys of the points (Point.key). Like ConstructionRaster,
+it remembers which points of the construction it has seen, so an update only computes the keys of the points added
+since the last one.
+"""
+from geompy.core.Construction import Construction
+from geompy.core.Point import Point
+
+from typing import Iterable
+
+
+class TargetPoints:
+    """The keys of some target points, and which of them are missing from the last construction given to update."""
+
+    def __init__(self, target_points: Iterable[Point]):
+        """
+        :param target_points: the points to find. Points with the same key count once.
+        """
+        self.keys = frozenset(point.key() for point in target_points)
+        self.missing = set(self.keys)
+        self.construction: Construction = None
+        # The point set of the construction that was seen, and a copy of what it held
+        self._source: {Point} = None
+        self._seen: {Point} = set()
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str]) -> 'TargetPoints':
+        """
+        :param keys: keys of the points to find, e.g. from a TargetCurriculum
+        """
+        target_points = cls(())
+        target_points.keys = frozenset(keys)
+        target_points.missing = set(target_points.keys)
+        return target_points
+
+    def recount(self, construction: Construction) -> int:
+        """
+        Find the missing points of a construction from scratch.
+        :return: the number of missing points
+        """
+        self.construction = construction
+        self._source = construction.points
+        self._seen = set(construction.points)
+        self.missing = set(self.keys) - {point.key() for point in self._seen}
+        return len(self.missing)
+
+    def update(self, construction: Construction) -> int:
+        """
+        Bring the missing points up to date with construction, looking only at the points added since the last update.
+        :return: the number of missing points
+        """
+        if construction is not self.construction or construction.points is not self._source:
+            return self.recount(construction)
+        if len(construction.points) == len(self._seen):
+            return len(self.missing)  # No points were added
+        added = construction.points - self._seen
+        if len(self._seen) + len(added) != len(construction.points):
+            return self.recount(construction)  # A point that was seen is gone
+        self._seen.update(added)
+        if self.missing:
+            self.missing.difference_update(point.key() for point in added)
+        return len(self.missing)
@@ -0,0 +1,133 @@
+"""
+Vectorized batch of construction environments.
+
+VectorConstructionEnvironment holds num_envs pairs of constructions (the current one, and the desired one) and steps all
+of them with one array of actions, like num_envs ConstructionEnvironments. Observations, rewards and dones are returned
+as stacked arrays, and environments that are done are reset automatically.
+
+All rasterization is done in place, into arrays allocated once, by a ConstructionRaster per construction. The desired
+construction of an environment does not change during an episode, so it is only rasterized when the environment is
+reset, and each step only draws what it added to the current construction. Missing points are counted exactly, by
+their keys, with a DesiredTarget per environment that only looks at the points each step adds.
+"""
+from gym import spaces
+from geompy.core.Point import Point
+from geompy.core.Construction import Construction, ConstructionMode
+from .ConstructionEnvironment import ConstructionEnvironment
+from .ConstructionRaster import ConstructionRaster
+from .DesiredTarget import DesiredTarget
+from .TargetCurriculum import CurriculumTarget, TargetCurriculum
+
+import random
+import numpy as np
+
+
+class VectorConstructionEnvironment:
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, num_envs: int, boundary_radius: int = None, resolution: int = None, length: int = 4,
+                 seed: int = None, copy: bool = True, curriculum: TargetCurriculum = None,
+                 construction_mode: ConstructionMode = ConstructionMode.DEFAULT):
+        """
+        :param num_envs: number of environments
+        :param boundary_radius: how far from the origin in point space the observations reach
+        :param resolution: number of pixels across the observations
+        :param length: number of random steps in each desired construction
+        :param seed: seed of the random desired constructions. Unseeded by default.
+        :param copy: if true, step and reset return copies of the arrays. Otherwise they return the arrays themselves,
+        which the next step overwrites.
+        :param curriculum: optional archive of pregenerated desired constructions to sample from, instead of drawing
+        RandomConstructions. Its boundary radius and resolution must match the environments'.
+        :param construction_mode: construction mode of the desired constructions
+        """
+        self.num_envs = num_envs
+        self.resolution = resolution if resolution is not None else 32
+        self.boundary_radius = boundary_radius if boundary_radius is not None else 2
+        self.length = length
+        self.copy = copy
+        self.rng = random.Random(seed)
+
+        # Define the action and observation spaces, of one environment and of the batch
+        self.number_of_actions = self.resolution**4 * 2  # Same encoding as ConstructionEnvironment
+        self.single_action_space = spaces.Discrete(self.number_of_actions)
+        self.action_space = spaces.MultiDiscrete(np.full(num_envs, self.number_of_actions))
+        self.single_observation_space = spaces.Box(low=0, high=np.iinfo(np.int16).max,
+                                                   shape=(6, self.resolution, self.resolution), dtype=np.int16)
+        self.observation_space = spaces.Box(low=0, high=np.iinfo(np.int16).max,
+                                            shape=(num_envs, 6, self.resolution, self.resolution), dtype=np.int16)
+
+        # Preallocated outputs. Layers 0-2 of each observation are the current construction, 3-5 the desired one.
+        self.observations = np.zeros((num_envs, 6, self.resolution, self.resolution), dtype=np.int16)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        # Number of desired points missing from each current construction
+        self.missing = np.zeros(num_envs, dtype=np.int64)
+
+        # Every episode starts from a copy of this construction
+        self._initial_construction = Construction()
+        self._initial_construction.add_point(Point(0, 0, "A"), interesting=False)
+        self._initial_construction.add_point(Point(1, 0, "B"), interesting=False)
+        self.constructions: [Construction] = [None] * num_envs
+        self._rasters = [ConstructionRaster(self.boundary_radius, self.resolution, out=self.observations[index, :3])
+                         for index in range(num_envs)]
+        self._desired = [DesiredTarget(self.boundary_radius, self.resolution, length, curriculum, construction_mode,
+                                       out=self.observations[index, 3:]) for index in range(num_envs)]
+
+    @property
+    def desired_constructions(self) -> [Construction]:
+        """The desired construction of each environment. See DesiredTarget.construction for curriculum targets."""
+        return [desired.construction for desired in self._desired]
+
+    @property
+    def targets(self) -> [CurriculumTarget]:
+        """The curriculum target of each environment, or None for environments without one"""
+        return [desired.target for desired in self._desired]
+
+    def _reset_env(self, index: int) -> None:
+        """Start a new episode in one environment, and rasterize its desired construction."""
+        self.constructions[index] = self._initial_construction.copy()
+        self._desired[index].new(rng=self.rng)
+        self._observe(index)
+
+    def _observe(self, index: int) -> int:
+        """
+        Rasterize the current construction of one environment, and count the desired points it is missing, like
+        ConstructionEnvironment._current_missing_points.
+        :return: the number of missing points
+        """
+        self._rasters[index].update(self.constructions[index])
+        self.missing[index] = self._desired[index].update(self.constructions[index])
+        return self.missing[index]
+
+    def _result(self, *arrays):
+        return tuple(array.copy() for array in arrays) if self.copy else arrays
+
+    def reset(self) -> np.array:
+        """
+        Start a new episode in every environment.
+        :return: the observations, with shape (num_envs, 6, resolution, resolution)
+        """
+        for index in range(self.num_envs):
+            self._reset_env(index)
+        return self._result(self.observations)[0]
+
+    def step(self, actions) -> (np.array, np.array, np.array):
+        """
+        Apply one action to each environment. Environments that are done are reset, so their observation is the first
+        one of the next episode.
+        :param actions: array of num_envs integer actions, encoded as in ConstructionEnvironment
+        :return: the observations (num_envs, 6, resolution, resolution), rewards (num_envs,) and dones (num_envs,)
+        """
+        for index, action in enumerate(actions):
+            old_missing = self.missing[index]
+            self.constructions[index].perform_action(action, self.boundary_radius, self.resolution)
+            new_missing = self._observe(index)
+            self.rewards[index], self.dones[index] = ConstructionEnvironment.step_reward(old_missing, new_missing)
+            if self.dones[index]:
+                self._reset_env(index)
+        return self._result(self.observations, self.rewards, self.dones)
+
+    def render(self, mode='human'):
+        for construction, desired_construction in zip(self.constructions, self.desired_constructions):
+            construction.plain_text(self.boundary_radius, self.resolution)
+            desired_construction.plain_text(self.boundary_radius, self.resolution)
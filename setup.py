@@ -9,6 +9,8 @@ setup(
     author_email='AndrewSansom@my.unt.edu',
     license='MIT',
     packages=['geompy'],
+    # multiprocessing.shared_memory (SubprocessVectorEnvironment) is new in Python 3.8
+    python_requires='>=3.8',
     install_requires=[
         'sympy',
         'numpy',
@@ -127,3 +127,9 @@ class TestCircle(GeometryTestCase):
     def test_simplify(self):
         # self.fail()
         pass
+
+    def test_key(self):
+        # Circles are keyed by their center and radius, not by the second point
+        self.assertEqual(self.circle_from_point.key(), self.circle_from_radius.key())
+        self.assertEqual(Circle(self.point1, point2=Point(0, 1)).key(), self.circle_from_point.key())
+        self.assertNotEqual(Circle(self.point2, point2=self.point1).key(), self.circle_from_point.key())
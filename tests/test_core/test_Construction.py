@@ -5,11 +5,15 @@ from .test_constants import GeometryTestCase
 from geompy.core.Construction import Construction
 from geompy.core.Point import Point
 from geompy.core.Line import Line
+from geompy.core.Circle import Circle
 from geompy.core.PrebuiltConstructions import BaseConstruction
 from geompy.core.Angle import Angle
-from geompy.cas import sympify
+from geompy.cas import equals, sympify
 
 from copy import deepcopy
+from decimal import Decimal
+
+import numpy as np
 
 
 class TestConstruction(GeometryTestCase):
@@ -96,6 +100,7 @@ class TestConstruction(GeometryTestCase):
         self.assertEqual(construction.update_intersections_with_object(line1), set())
         self.assertEqual(construction.update_intersections_with_object(line2), set())
         self.assertEqual(construction.update_intersections_with_object(line3), set())
+        self.assertEqual(set(), Construction.find_intersections_line_line(line1, line2))
 
     def test_intersection_line_line_intersecting(self):
         # two parallel lines should not give any intersections
@@ -126,6 +131,7 @@ class TestConstruction(GeometryTestCase):
 
         self.assertEqual(construction.update_intersections_with_object(line), set())
         self.assertEqual(construction.update_intersections_with_object(circle), set())
+        self.assertEqual(set(), Construction.find_intersections_line_circle(line, circle))
 
     def test_intersection_circle_line_tangent(self):
         construction = self.construction1
@@ -339,12 +345,114 @@ class TestConstruction(GeometryTestCase):
         # There are only two present lengths, so the length of the dictionary should be 2
         self.assertEqual(2, len(construction.get_present_lengths()))
 
+    def test_find_length(self):
+        construction = BaseConstruction()
+        self.assertEqual(1, len(construction.find_length(1)))
+        self.assertEqual([], construction.find_length(sympify('sqrt(2)')))
+        # Points added after a query are indexed by the next one
+        construction.add_point(Point(0, 1))
+        construction.add_point(Point(1, 1))
+        self.assertEqual(4, len(construction.find_length(1)))
+        self.assertEqual(2, len(construction.find_length(sympify('sqrt(2)'))))
+        for point1, point2 in construction.find_length(sympify('sqrt(2)')):
+            self.assertTrue(equals(abs(point2 - point1), sympify('sqrt(2)')))
+        # Lengths whose keys differ are still found by their value
+        self.assertEqual(2, len(construction.find_length(sympify('sqrt(3 - 2*sqrt(2)) + 1'))))
+        # Replacing the points rebuilds the index
+        construction.points = {Point(0, 0), Point(2, 0)}
+        self.assertEqual([], construction.find_length(1))
+        self.assertEqual(1, len(construction.find_length(2)))
+
+    def test_find_length_with_different_keys(self):
+        construction = BaseConstruction()
+        # Both pairs are sqrt(2 + sqrt(3)) apart, but their squared lengths expand to different keys
+        construction.points = {Point(0, 0), Point('sqrt(2)/2 + sqrt(6)/2', 0), Point(0, 2),
+                               Point(1, '2 + sqrt(1 + sqrt(3))')}
+        for length in (sympify('sqrt(2 + sqrt(3))'), sympify('sqrt(2)/2 + sqrt(6)/2')):
+            self.assertEqual(2, len(construction.find_length(length)))
+        self.assertEqual(2, len(construction.copy().find_length(sympify('sqrt(2 + sqrt(3))'))))
+
+    def test_find_length_inexact(self):
+        construction = BaseConstruction()
+        self.assertRaises(TypeError, construction.find_length, Decimal(1))
+        self.assertRaises(TypeError, construction.check_lengths, Decimal(2).sqrt())
+        self.assertRaises(TypeError, construction.find_length, 1.0)
+
+    def test_copy(self):
+        construction = BaseConstruction()
+        construction.add_circle(Point(0, 0), Point(1, 0))
+        self.assertEqual(1, len(construction.find_length(1)))
+        construction_copy = construction.copy()
+        self.assertEqual(construction, construction_copy)
+        # Adding a step to the copy does not change the original
+        construction_copy.add_circle(Point(1, 0), Point(0, 0))
+        self.assertEqual(1, len(construction))
+        self.assertEqual(2, len(construction_copy))
+        self.assertEqual(2, len(construction.points))
+        self.assertEqual(4, len(construction_copy.points))
+        self.assertEqual(1, len(construction.find_length(1)))
+        self.assertEqual(5, len(construction_copy.find_length(1)))
+        self.assertNotIn(Circle(Point(1, 0), point2=Point(0, 0)), construction.steps_set)
+
+    def test_find_length_matches_every_pair(self):
+        construction = BaseConstruction()
+        construction.add_step_premade(Circle(Point(0, 0), point2=Point(1, 0)))
+        construction.add_step_premade(Circle(Point(1, 0), point2=Point(0, 0)))
+        construction.add_step_premade(Line(Point(0, 0), Point(1, 0)))
+        points = list(construction.points)
+        for index, point1 in enumerate(points):
+            for point2 in points[index + 1:]:
+                self.assertIn({point1.key(), point2.key()},
+                              [{witness1.key(), witness2.key()}
+                               for witness1, witness2 in construction.find_length(abs(point2 - point1))])
+
     def test_add_random_construction(self):
         for i in range(5):
             construction = BaseConstruction()
             construction.add_random_construction(i)
             self.assertEqual(i, len(construction))
 
+    def test_numpy_out(self):
+        construction = BaseConstruction()
+        construction.add_point(Point(10, 10))  # Off the screen, which must not hide the other points
+        out = np.full((3, 8, 8), 7, dtype=np.int16)
+        self.assertIs(out, construction.numpy(2, 8, out=out))
+        np.testing.assert_array_equal(construction.numpy(2, 8), out)
+        self.assertEqual(2, out[0].sum())
+
+    def test_action_number(self):
+        construction = BaseConstruction()
+        a, b = sorted(construction.points, key=lambda point: point.key())
+        for is_line in (True, False):
+            action = Construction._action_number(construction._point_to_image_space(a, 2, 8),
+                                                 construction._point_to_image_space(b, 2, 8), is_line, 8)
+            self.assertLess(action, 8**4 * 2)
+            self.assertEqual((is_line, a, b), construction._interpret_action(action, 2, 8))
+
+    def test_action_mask(self):
+        construction = BaseConstruction()
+        construction.add_circle(*construction.points)
+        construction.add_line(*construction.points)
+        mask = construction.action_mask(2, 4)
+        self.assertEqual((4**4 * 2,), mask.shape)
+        steps = set()
+        for action in range(4**4 * 2):
+            is_line, point1, point2 = construction._interpret_action(action, 2, 4)
+            if is_line:
+                valid = Line(point1, point2) not in construction.lines
+            else:
+                valid = Circle(point1, point2=point2) not in construction.circles
+            self.assertEqual(valid, mask[action])
+            if valid:
+                steps.add((is_line, frozenset((point1, point2)) if is_line else (point1, point2)))
+        legal_actions = construction.legal_action_numbers(2, 4)
+        legal_steps = set()
+        for action in legal_actions:
+            is_line, point1, point2 = construction._interpret_action(action, 2, 4)
+            legal_steps.add((is_line, frozenset((point1, point2)) if is_line else (point1, point2)))
+        self.assertEqual(steps, legal_steps)
+        self.assertEqual(len(steps), len(legal_actions))
+
     def test_update_valid_actions_no_force(self):
         construction = BaseConstruction()
         a, b = construction.points
@@ -59,6 +59,16 @@ class TestFastPoint(TestPoint):
         self.assertIn(repr(self.point1_int.x), rep)
         self.assertIn(repr(self.point1_int.y), rep)
 
+    def test_from_key(self):
+        # Fast point keys are rounded, so only the keys round trip exactly
+        for point in (self.point1_int, Point('1/2', '-sqrt(3)/2'), Point('sqrt(2 + sqrt(3))/2', '-3/7')):
+            other = Point.from_key(point.key(), name='P')
+            self.assertEqual(point.key(), other.key())
+            self.assertTrue(np.allclose(point.array, other.array, atol=1e-3))
+            self.assertEqual('P', other.name)
+        with self.assertRaises(ValueError):
+            Point.from_key('1')
+
     def test_equals(self):
         # We only need to test each against the first, because equality is transitive
         # Points with different names but equivalent coordinates are still equivalent.
@@ -249,3 +249,9 @@ class TestLine(GeometryTestCase):
     def test_simplify(self):
         # self.fail()
         pass
+
+    def test_key(self):
+        # Lines are keyed by their equation, not by their generating points
+        self.assertEqual(Line(Point(0, 0), Point(1, 1)).key(), Line(Point(2, 2), Point(-1, -1)).key())
+        self.assertEqual(Line(Point(1, 0), Point(1, 1)).key(), Line(Point(1, 5), Point(1, -3)).key())
+        self.assertNotEqual(self.line1.key(), Line(Point(0, 0), Point(1, 1)).key())
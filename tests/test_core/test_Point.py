@@ -2,6 +2,7 @@ from .test_constants import GeometryTestCase, coordinates
 from geompy.core import Point
 import numpy as np
 from symengine import sympify, nan
+import sympy
 
 
 class TestPoint(GeometryTestCase):
@@ -118,3 +119,19 @@ class TestPoint(GeometryTestCase):
         # Iterative over each point
         for point in points:
             self.assertPickle(point)
+
+    def test_key(self):
+        # Equal points share a key, regardless of name or whether the coordinates are sympy or symengine expressions.
+        for other in (self.point1_sympy_int, self.point1_sympy_expr, self.point1_name):
+            self.assertEqual(self.point1_int.key(), other.key())
+        self.assertEqual(Point(sympy.sqrt(3) / 2, 0).key(), Point('sqrt(3)/2', 0).key())
+        self.assertNotEqual(Point(2, 3).key(), Point(3, 2).key())
+
+    def test_from_key(self):
+        for point in (self.point1_int, Point('1/2', '-sqrt(3)/2'), Point('sqrt(2 + sqrt(3))/2', '-3/7')):
+            other = Point.from_key(point.key(), name='P')
+            self.assertEqual(point, other)
+            self.assertEqual(point.key(), other.key())
+            self.assertEqual('P', other.name)
+        with self.assertRaises(ValueError):
+            Point.from_key('1')
@@ -0,0 +1,17 @@
+from collections import Counter
+
+from geompy.experiments.MinimalConstructions.MinimalConstructionsSymmetry import construction_fingerprint
+
+
+def minimal_lengths_by_key(point_minimal_construction_dict):
+    """The same point may appear under several representations, so compare points by their keys."""
+    lengths = {}
+    for point, length in point_minimal_construction_dict.items():
+        lengths[point.key()] = min(length, lengths.get(point.key(), length))
+    return lengths
+
+
+def unique_counts(constructions):
+    """Count the unique constructions of each length by fingerprint, since hashes depend on the representation."""
+    return dict(Counter(len(construction) for construction in
+                        {construction_fingerprint(construction): construction for construction in constructions}.values()))
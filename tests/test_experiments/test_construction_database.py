@@ -0,0 +1,93 @@
+from unittest import TestCase
+from queue import Queue
+import os
+import tempfile
+
+from geompy import Point
+from geompy.cas import sympify
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.construction_database import ConstructionDatabase, step_program, replay_program
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import run_bfs_in_series
+from geompy.experiments.MinimalConstructions.MinimalConstructionsParallel_local import run_bfs_in_parallel_locally
+from geompy.experiments.MinimalConstructions.MinimalConstructionsSymmetry import construction_fingerprint
+
+
+class ConstructionDatabaseTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'constructions.sqlite3')
+        self.a = Point(0, 0)
+        self.b = Point(1, 0)
+        self.construction = BaseConstruction()
+        self.construction.add_circle(self.a, self.b)
+        self.construction.add_circle(self.b, self.a)
+        self.construction.add_line(self.a, self.b)
+
+    def test_step_program(self):
+        replayed = replay_program(step_program(self.construction))
+        self.assertEqual(construction_fingerprint(self.construction), construction_fingerprint(replayed))
+        self.assertSetEqual({point.key() for point in self.construction.points},
+                            {point.key() for point in replayed.points})
+
+    def test_upsert(self):
+        top = Point('1/2', 'sqrt(3)/2')
+        with ConstructionDatabase(self.path) as database:
+            self.assertTrue(database.record_point(top, self.construction))
+            self.assertEqual(3, database.get_point(top)[0])
+            # Longer constructions do not replace shorter ones
+            longer = replay_program(step_program(self.construction))
+            longer.add_line(self.a, top)
+            self.assertFalse(database.record_point(top, longer))
+            self.assertEqual(3, database.get_point(top)[0])
+            # Shorter ones do
+            shorter = BaseConstruction()
+            shorter.add_circle(self.a, self.b)
+            shorter.add_circle(self.b, self.a)
+            self.assertTrue(database.record_point(top, shorter))
+            length, program = database.get_point(top)
+            self.assertEqual(2, length)
+            self.assertIn(top, database.replay(program).points)
+
+        # Records are kept, and separated by base
+        with ConstructionDatabase(self.path) as database:
+            self.assertEqual(2, database.get_point(top)[0])
+        other_base = BaseConstruction()
+        other_base.add_line(self.a, self.b, counts_as_step=False)
+        with ConstructionDatabase(self.path, base=other_base) as database:
+            self.assertIsNone(database.get_point(top))
+
+    def test_queries(self):
+        with ConstructionDatabase(self.path) as database:
+            database.record_construction(self.construction)
+            self.assertEqual(3, database.get_distance(sympify('sqrt(3)'))[0])
+            self.assertIsNone(database.get_distance(sympify('sqrt(5)')))
+            self.assertEqual(1, len(database.find_points_near(0.5, 0.8660254037844386)))
+            self.assertEqual(4, len(database.find_points_near(0.5, 0, tolerance=1)))
+            self.assertEqual('sqrt(3)', database.find_distances_near(1.7320508, 1e-6)[0][0])
+            self.assertRaises(ValueError, database.minimal_lengths, 'lines')
+
+    def test_searches(self):
+        series_path = os.path.join(self.directory.name, 'series.sqlite3')
+        parallel_path = os.path.join(self.directory.name, 'parallel.sqlite3')
+        run_bfs_in_series(Queue(), {}, {}, 2, report=False, database_path=series_path)
+        run_bfs_in_parallel_locally(2, num_processes=2, report=False, database_path=parallel_path)
+        with ConstructionDatabase(series_path) as series, ConstructionDatabase(parallel_path) as parallel:
+            self.assertListEqual(series.minimal_lengths(), parallel.minimal_lengths())
+            self.assertListEqual(series.minimal_lengths('distances'), parallel.minimal_lengths('distances'))
+            self.assertEqual(2, series.get_distance(sympify('sqrt(3)'))[0])
+
+    def test_reduce_symmetry(self):
+        path = os.path.join(self.directory.name, 'full.sqlite3')
+        reduced_path = os.path.join(self.directory.name, 'reduced.sqlite3')
+        run_bfs_in_series(Queue(), {}, {}, 2, report=False, database_path=path)
+        run_bfs_in_series(Queue(), {}, {}, 2, report=False, reduce_symmetry=True, database_path=reduced_path)
+        with ConstructionDatabase(path) as full, ConstructionDatabase(reduced_path) as reduced:
+            self.assertListEqual(full.minimal_lengths(), reduced.minimal_lengths())
+            self.assertListEqual(full.minimal_lengths('distances'), reduced.minimal_lengths('distances'))
+            # The programs of the images construct the images
+            for key, length in reduced.minimal_lengths():
+                point = Point.from_key(key)
+                replayed = reduced.replay(reduced.get_point(point)[1])
+                self.assertEqual(length, len(replayed))
+                self.assertIn(key, {other.key() for other in replayed.points})
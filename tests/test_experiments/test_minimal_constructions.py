@@ -1,6 +1,10 @@
 from unittest import TestCase
+from queue import Queue
+from geompy import Point
 from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import (find_all_constructions_of_length,
-                                                                              count_unique_constructions)
+                                                                              count_unique_constructions,
+                                                                              run_bfs_in_series,
+                                                                              stream_unique_construction_counts)
 
 
 class MinimalConstructionsTestCase(TestCase):
@@ -32,3 +36,17 @@ class MinimalConstructionsTestCase(TestCase):
         self.assertConstructionCountsCorrect(verbose)
         self.assertConstructionCountsCorrect(report_verbose)
         self.assertConstructionCountsCorrect(no_report_no_verbose)
+
+    def test_stream_unique_construction_counts(self):
+        counts = list(stream_unique_construction_counts(3))
+        # Counts are emitted in order of length
+        self.assertListEqual([0, 1, 2, 3], [length for length, _, _ in counts])
+        self.assertDictEqual({0: 1, 1: 3, 2: 3, 3: 16}, {length: num for length, num, _ in counts})
+
+        # The newly reached points match the minimal construction lengths found by the breadth-first search.
+        point_minimal_dict = {}
+        run_bfs_in_series(Queue(), {}, point_minimal_dict, 3, report=False)
+        base_points = {Point(0, 0), Point(1, 0)}
+        for length, _, num_new_points in counts[1:]:
+            self.assertEqual(num_new_points, len([point for point, minimal_length in point_minimal_dict.items()
+                                                  if minimal_length == length and point not in base_points]))
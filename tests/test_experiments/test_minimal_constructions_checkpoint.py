@@ -0,0 +1,115 @@
+from unittest import TestCase
+from queue import Queue
+import os
+import tempfile
+
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCheckpoint import SearchCheckpoint, VISITED_LOG_NAME
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import run_bfs_in_series
+from geompy.experiments.MinimalConstructions.MinimalConstructionsParallel_local import run_bfs_in_parallel_locally
+from geompy.experiments.MinimalConstructions.MinimalConstructionsParallel_server import Coordinator
+from geompy.experiments.MinimalConstructions.MinimalConstructionsParallel_client import expand_item
+
+from .test_constants import minimal_lengths_by_key, unique_counts
+
+
+class InterruptedQueue(Queue):
+    """Queue that raises after a given number of gets, as if the search had been killed."""
+
+    def __init__(self, num_gets):
+        super().__init__()
+        self.num_gets = num_gets
+
+    def get(self, *args, **kwargs):
+        if not self.num_gets:
+            raise KeyboardInterrupt
+        self.num_gets -= 1
+        return super().get(*args, **kwargs)
+
+
+class SearchCheckpointTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_save_and_load(self):
+        checkpoint = SearchCheckpoint(self.directory.name)
+        self.assertFalse(checkpoint.exists())
+        self.assertIsNone(checkpoint.load())
+        checkpoint.save(['a', 'b'], [b'1', b'2'], {'count': 2})
+        checkpoint.save(['c'], [b'3'], {'count': 3})
+
+        checkpoint = SearchCheckpoint(self.directory.name)
+        self.assertTrue(checkpoint.exists())
+        self.assertEqual((['c'], [b'1', b'2', b'3'], {'count': 3}), checkpoint.load())
+        self.assertEqual(3, checkpoint.num_visited_saved)
+
+    def test_load_earlier_generation(self):
+        checkpoint = SearchCheckpoint(self.directory.name)
+        checkpoint.save(['a'], [b'1'], {}, generation=1)
+        checkpoint.save(['b'], [b'2'], {}, generation=2)
+        self.assertEqual((['a'], [b'1'], {}), checkpoint.load(generation=1))
+        # The later generation is discarded
+        checkpoint.save(['c'], [b'3'], {}, generation=2)
+        self.assertEqual((['c'], [b'1', b'3'], {}), SearchCheckpoint(self.directory.name).load())
+        self.assertRaises(ValueError, checkpoint.load, 5)
+
+    def test_torn_save(self):
+        checkpoint = SearchCheckpoint(self.directory.name)
+        checkpoint.save(['a'], [b'1'], {})
+        # A save that crashed after writing to the visited log, but before committing
+        with open(os.path.join(self.directory.name, VISITED_LOG_NAME), 'ab') as visited_log:
+            visited_log.write(b'garbage')
+        self.assertEqual((['a'], [b'1'], {}), SearchCheckpoint(self.directory.name).load())
+
+
+class ResumeSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.constructions_dict = {}
+        self.point_minimal_dict = {}
+        run_bfs_in_series(Queue(), self.constructions_dict, self.point_minimal_dict, 2, report=False)
+
+    def test_resume_series(self):
+        with self.assertRaises(KeyboardInterrupt):
+            run_bfs_in_series(InterruptedQueue(3), {}, {}, 2, report=False, checkpoint_directory=self.directory.name,
+                              checkpoint_interval=0)
+        constructions_dict = {}
+        point_minimal_dict = {}
+        run_bfs_in_series(Queue(), constructions_dict, point_minimal_dict, 2, report=False,
+                          checkpoint_directory=self.directory.name)
+        self.assertDictEqual(unique_counts(self.constructions_dict), unique_counts(constructions_dict))
+        self.assertDictEqual(minimal_lengths_by_key(self.point_minimal_dict),
+                             minimal_lengths_by_key(point_minimal_dict))
+
+    def test_resume_parallel_locally(self):
+        run_bfs_in_parallel_locally(1, num_processes=2, report=False, checkpoint_directory=self.directory.name)
+        # Resuming with a deeper search only expands the new depth
+        point_minimal_dict, unique_constructions = run_bfs_in_parallel_locally(
+            2, num_processes=2, report=False, checkpoint_directory=self.directory.name)
+        self.assertDictEqual({0: 1, 1: 3, 2: 3, 3: 16}, unique_constructions)
+        self.assertDictEqual(minimal_lengths_by_key(self.point_minimal_dict),
+                             minimal_lengths_by_key(point_minimal_dict))
+
+    def test_resume_coordinator(self):
+        coordinator = Coordinator(2, checkpoint_directory=self.directory.name)
+        while not coordinator.is_finished():
+            lease_id, items = coordinator.lease(2)
+            children, point_updates = [], {}
+            expand_item(items[0], 2, False, set(), children, point_updates)
+            coordinator.submit(lease_id, 1, children, point_updates)
+            if coordinator.get_progress()['expanded'] == 3:
+                # Stop in the middle of a lease
+                coordinator.save_checkpoint()
+                break
+
+        coordinator = Coordinator(2, checkpoint_directory=self.directory.name)
+        while not coordinator.is_finished():
+            lease_id, items = coordinator.lease()
+            children, point_updates = [], {}
+            for item in items:
+                expand_item(item, 2, False, set(), children, point_updates)
+            coordinator.submit(lease_id, len(items), children, point_updates)
+        self.assertDictEqual({0: 1, 1: 3, 2: 3, 3: 16}, coordinator.get_unique_constructions())
+        self.assertDictEqual(minimal_lengths_by_key(self.point_minimal_dict),
+                             minimal_lengths_by_key(coordinator.get_point_minimal()))
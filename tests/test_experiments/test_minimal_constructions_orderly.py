@@ -0,0 +1,34 @@
+from unittest import TestCase
+from queue import Queue
+from collections import Counter
+
+from geompy.core.Construction import ConstructionMode
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import run_bfs_in_series
+from geompy.experiments.MinimalConstructions.MinimalConstructionsOrderly import generate_constructions_orderly
+from geompy.experiments.MinimalConstructions.MinimalConstructionsSymmetry import construction_fingerprint
+
+
+class MinimalConstructionsOrderlyTestCase(TestCase):
+    def test_counts(self):
+        lengths = Counter(len(construction) for construction, _, _ in generate_constructions_orderly(3))
+        self.assertDictEqual({0: 1, 1: 3, 2: 3, 3: 16}, dict(lengths))
+
+    def test_each_construction_generated_once(self):
+        fingerprints = [construction_fingerprint(construction)
+                        for construction, _, _ in generate_constructions_orderly(3)]
+        self.assertEqual(len(fingerprints), len(set(fingerprints)))
+
+    def test_same_constructions_as_breadth_first_search(self):
+        constructions_dict = {}
+        run_bfs_in_series(Queue(), constructions_dict, {}, 2, report=False)
+        breadth_first = {construction_fingerprint(construction) for construction in constructions_dict}
+        orderly = {construction_fingerprint(construction) for construction, _, _ in generate_constructions_orderly(3)}
+        self.assertSetEqual(breadth_first, orderly)
+
+    def test_construction_mode(self):
+        for construction, new_object, _ in generate_constructions_orderly(3, ConstructionMode.LINES_ONLY):
+            self.assertFalse(construction.circles)
+        # From two points, only one line can be drawn
+        lengths = Counter(len(construction) for construction, _, _ in
+                          generate_constructions_orderly(3, ConstructionMode.LINES_ONLY))
+        self.assertDictEqual({0: 1, 1: 1}, dict(lengths))
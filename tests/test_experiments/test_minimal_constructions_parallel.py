@@ -0,0 +1,94 @@
+from unittest import TestCase
+from queue import Queue
+import threading
+import time
+
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import run_bfs_in_series
+from geompy.experiments.MinimalConstructions.MinimalConstructionsParallel_server import (Coordinator,
+                                                                                         make_server_manager)
+from geompy.experiments.MinimalConstructions.MinimalConstructionsParallel_client import (expand_item,
+                                                                                         run_client)
+
+from .test_constants import minimal_lengths_by_key
+
+
+class CoordinatorTestCase(TestCase):
+    def expand_lease(self, coordinator, lease_id, items, num_done=None):
+        children, point_updates = [], {}
+        for item in items[:num_done]:
+            expand_item(item, coordinator.max_search_depth, False, set(), children, point_updates)
+        return coordinator.submit(lease_id, len(items[:num_done]), children, point_updates)
+
+    def test_lease_and_submit(self):
+        coordinator = Coordinator(1)
+        lease_id, items = coordinator.lease()
+        self.assertEqual(1, len(items))
+        # Nothing else can be leased until the base construction has been expanded
+        self.assertEqual((-1, []), coordinator.lease(timeout=0))
+        self.assertFalse(coordinator.is_finished())
+        self.assertEqual(1, self.expand_lease(coordinator, lease_id, items))
+        self.assertDictEqual({0: 1, 1: 3}, coordinator.get_unique_constructions())
+
+        lease_id, items = coordinator.lease(2)
+        self.assertEqual(2, len(items))
+        self.expand_lease(coordinator, lease_id, items)
+        lease_id, items = coordinator.lease(2)
+        self.assertEqual(1, len(items))
+        self.expand_lease(coordinator, lease_id, items)
+        self.assertTrue(coordinator.is_finished())
+        self.assertIsNone(coordinator.lease())
+        self.assertDictEqual({0: 1, 1: 3, 2: 3}, coordinator.get_unique_constructions())
+
+    def test_steal(self):
+        coordinator = Coordinator(1)
+        lease_id, items = coordinator.lease()
+        self.expand_lease(coordinator, lease_id, items)
+        lease_id, items = coordinator.lease()
+        self.assertEqual(3, len(items))
+        last_item = items[-1]
+        # An idle client waits for work
+        leases = []
+        idle_client = threading.Thread(target=lambda: leases.append(coordinator.lease(timeout=60)))
+        idle_client.start()
+        while not coordinator.num_waiting:
+            time.sleep(0.01)
+        # After the first item, the last item is given to the idle client
+        self.assertEqual(2, self.expand_lease(coordinator, lease_id, items, num_done=1))
+        idle_client.join()
+        stolen_lease_id, stolen_items = leases[0]
+        self.assertEqual(1, len(stolen_items))
+        self.assertIs(last_item, stolen_items[0])
+
+    def test_progress(self):
+        coordinator = Coordinator(1)
+        lease_id, items = coordinator.lease()
+        progress = coordinator.get_progress()
+        self.assertEqual(0, progress['expanded'])
+        self.assertEqual(1, progress['outstanding'])
+        self.assertEqual(1, progress['leases'])
+        self.expand_lease(coordinator, lease_id, items)
+        progress = coordinator.get_progress()
+        self.assertEqual(1, progress['expanded'])
+        self.assertEqual(3, progress['frontier'])
+        self.assertEqual(3, progress['outstanding'])
+        self.assertDictEqual({0: 1, 1: 3}, progress['unique_constructions'])
+        self.assertFalse(coordinator.wait_until_finished(timeout=0))
+
+
+class DistributedSearchTestCase(TestCase):
+    def test_several_clients(self):
+        manager = make_server_manager(0, b'test', 2)
+        try:
+            coordinator = manager.get_coordinator()
+            processes = run_client('localhost', manager.address[1], b'test', num_processes=3)
+            self.assertTrue(coordinator.wait_until_finished(300))
+            for process in processes:
+                process.join(timeout=60)
+
+            point_minimal_dict = {}
+            run_bfs_in_series(Queue(), {}, point_minimal_dict, 2, report=False)
+            self.assertDictEqual({0: 1, 1: 3, 2: 3, 3: 16}, coordinator.get_unique_constructions())
+            self.assertDictEqual(minimal_lengths_by_key(point_minimal_dict),
+                                 minimal_lengths_by_key(coordinator.get_point_minimal()))
+        finally:
+            manager.shutdown()
@@ -0,0 +1,33 @@
+from unittest import TestCase
+from queue import Queue
+
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import run_bfs_in_series
+from geompy.experiments.MinimalConstructions.MinimalConstructionsParallel_local import (run_bfs_in_parallel_locally,
+                                                                                        fingerprint_owner)
+
+from .test_constants import minimal_lengths_by_key, unique_counts
+
+
+class MinimalConstructionsParallelLocalTestCase(TestCase):
+    def setUp(self) -> None:
+        self.constructions_dict = {}
+        self.point_minimal_dict = {}
+        run_bfs_in_series(Queue(), self.constructions_dict, self.point_minimal_dict, 2, report=False)
+
+    def test_fingerprint_owner(self):
+        fingerprint = bytes(range(16))
+        self.assertEqual(0, fingerprint_owner(fingerprint, 1))
+        self.assertIn(fingerprint_owner(fingerprint, 3), range(3))
+
+    def test_same_results_as_series(self):
+        point_minimal_dict, unique_constructions = run_bfs_in_parallel_locally(2, num_processes=3, report=False)
+        self.assertDictEqual(unique_counts(self.constructions_dict), unique_constructions)
+        self.assertDictEqual(minimal_lengths_by_key(self.point_minimal_dict),
+                             minimal_lengths_by_key(point_minimal_dict))
+
+    def test_reduce_symmetry(self):
+        point_minimal_dict, unique_constructions = run_bfs_in_parallel_locally(2, num_processes=2, report=False,
+                                                                               reduce_symmetry=True)
+        self.assertDictEqual({0: 1, 1: 3, 2: 3, 3: 16}, unique_constructions)
+        self.assertDictEqual(minimal_lengths_by_key(self.point_minimal_dict),
+                             minimal_lengths_by_key(point_minimal_dict))
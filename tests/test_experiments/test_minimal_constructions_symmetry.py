@@ -0,0 +1,61 @@
+from unittest import TestCase
+from queue import Queue
+
+from geompy import Point
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import (run_bfs_in_series,
+                                                                              count_unique_constructions)
+from geompy.experiments.MinimalConstructions.MinimalConstructionsSymmetry import (symmetric_points,
+                                                                                  symmetry_orbit,
+                                                                                  construction_fingerprint)
+
+
+class MinimalConstructionsSymmetryTestCase(TestCase):
+    def setUp(self) -> None:
+        self.construction = BaseConstruction()
+        self.a = Point(0, 0)
+        self.b = Point(1, 0)
+
+    def test_symmetric_points(self):
+        self.assertSetEqual({self.a, self.b}, symmetric_points(self.a))
+        self.assertSetEqual({Point('1/2', 'sqrt(3)/2'), Point('1/2', '-sqrt(3)/2')},
+                            symmetric_points(Point('1/2', 'sqrt(3)/2')))
+        self.assertEqual(4, len(symmetric_points(Point(2, 3))))
+
+    def test_fingerprint_conjugate_constructions(self):
+        construction1 = BaseConstruction()
+        construction1.add_circle(self.a, self.b)
+        construction1.add_circle(self.b, self.a)
+        construction2 = BaseConstruction()
+        construction2.add_circle(self.b, self.a)
+        construction2.add_circle(self.a, self.b)
+        self.assertEqual(construction_fingerprint(construction1), construction_fingerprint(construction2))
+
+    def test_symmetry_orbit(self):
+        circle_a = BaseConstruction()
+        circle_a.add_circle(self.a, self.b)
+        circle_b = BaseConstruction()
+        circle_b.add_circle(self.b, self.a)
+        line_ab = BaseConstruction()
+        line_ab.add_line(self.a, self.b)
+
+        self.assertNotEqual(construction_fingerprint(circle_a), construction_fingerprint(circle_b))
+        self.assertEqual(symmetry_orbit(circle_a), symmetry_orbit(circle_b))
+        self.assertEqual(2, symmetry_orbit(circle_a)[1])
+        self.assertEqual(1, symmetry_orbit(line_ab)[1])
+
+    def test_symmetry_reduced_search_counts(self):
+        constructions_dict = {}
+        point_minimal_dict = {}
+        run_bfs_in_series(Queue(), constructions_dict, point_minimal_dict, 2, report=False)
+        reduced_constructions_dict = {}
+        reduced_point_minimal_dict = {}
+        run_bfs_in_series(Queue(), reduced_constructions_dict, reduced_point_minimal_dict, 2, report=False,
+                          reduce_symmetry=True)
+
+        # Only one representative of each orbit is kept, but the weighted counts include the whole orbit.
+        self.assertLess(len(reduced_constructions_dict), len(constructions_dict))
+        self.assertDictEqual({0: 1, 1: 3, 2: 3, 3: 16},
+                             count_unique_constructions(reduced_constructions_dict.keys(),
+                                                        weights=reduced_constructions_dict))
+        self.assertDictEqual(point_minimal_dict, reduced_point_minimal_dict)
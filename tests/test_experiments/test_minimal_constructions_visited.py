@@ -0,0 +1,89 @@
+from unittest import TestCase
+from queue import Queue
+from hashlib import blake2b
+import os
+import tempfile
+
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import run_bfs_in_series
+from geompy.experiments.MinimalConstructions.MinimalConstructionsVisited import (DiskVisitedSet, BloomVisitedSet,
+                                                                                 benchmark_lookups)
+
+
+class DiskVisitedSetTestCase(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'visited.bin')
+        self.fingerprints = [bytes([number % 256, number // 256]) + bytes(14) for number in range(1, 100)]
+
+    def test_add_and_contains(self):
+        with DiskVisitedSet(self.path, initial_capacity=4, cache_size=8) as visited_set:
+            for fingerprint in self.fingerprints:
+                self.assertNotIn(fingerprint, visited_set)
+                self.assertTrue(visited_set.add(fingerprint))
+                self.assertFalse(visited_set.add(fingerprint))
+            # The table grew past its initial capacity
+            self.assertGreaterEqual(visited_set.capacity, 2 * len(self.fingerprints))
+            self.assertEqual(len(self.fingerprints), len(visited_set))
+            for fingerprint in self.fingerprints:
+                self.assertIn(fingerprint, visited_set)
+            self.assertNotIn(b'\xff' * 16, visited_set)
+            self.assertRaises(ValueError, visited_set.add, bytes(16))
+
+    def test_persistence(self):
+        with DiskVisitedSet(self.path, initial_capacity=4) as visited_set:
+            for fingerprint in self.fingerprints:
+                visited_set.add(fingerprint)
+        with DiskVisitedSet(self.path) as visited_set:
+            self.assertEqual(len(self.fingerprints), len(visited_set))
+            self.assertIn(self.fingerprints[50], visited_set)
+        self.assertRaises(ValueError, DiskVisitedSet, self.path, fingerprint_size=8)
+
+    def test_benchmark(self):
+        with DiskVisitedSet(self.path, initial_capacity=4) as visited_set:
+            results = benchmark_lookups({'set': set(), 'dict': {}, 'disk': visited_set}, 200, 100)
+        self.assertSetEqual({'set', 'dict', 'disk'}, set(results))
+        # Every set agrees on which lookups are members
+        self.assertEqual(1, len({result['found'] for result in results.values()}))
+
+    def test_breadth_first_search(self):
+        point_minimal_dict = {}
+        run_bfs_in_series(Queue(), {}, point_minimal_dict, 2, report=False)
+        with DiskVisitedSet(self.path, initial_capacity=4) as visited_set:
+            constructions_dict = {}
+            disk_point_minimal_dict = {}
+            run_bfs_in_series(Queue(), constructions_dict, disk_point_minimal_dict, 2, report=False,
+                              visited_set=visited_set)
+            # Only the base construction is kept in memory
+            self.assertEqual(1, len(constructions_dict))
+            self.assertEqual(1 + 3 + 3 + 16, len(visited_set))
+        self.assertSetEqual({point.key() for point in point_minimal_dict},
+                            {point.key() for point in disk_point_minimal_dict})
+
+
+class BloomVisitedSetTestCase(TestCase):
+    def setUp(self) -> None:
+        self.fingerprints = [blake2b(number.to_bytes(8, 'little'), digest_size=16).digest() for number in range(4000)]
+
+    def test_no_false_negatives(self):
+        visited_set = BloomVisitedSet(len(self.fingerprints))
+        for fingerprint in self.fingerprints:
+            visited_set.add(fingerprint)
+        for fingerprint in self.fingerprints:
+            self.assertIn(fingerprint, visited_set)
+        # Under 10 bits per fingerprint at a 1% false-positive rate
+        self.assertLess(len(visited_set.bits) * 8, 10 * len(self.fingerprints))
+        self.assertRaises(ValueError, BloomVisitedSet, 10, 0)
+
+    def test_expected_missed(self):
+        visited_set = BloomVisitedSet(len(self.fingerprints), false_positive_rate=0.05)
+        num_missed = sum(not visited_set.add(fingerprint) for fingerprint in self.fingerprints)
+        self.assertEqual(len(self.fingerprints) - num_missed, len(visited_set))
+        self.assertGreater(num_missed, 0)
+        self.assertAlmostEqual(num_missed, visited_set.expected_missed, delta=max(10.0, num_missed / 2))
+
+    def test_breadth_first_search(self):
+        visited_set = BloomVisitedSet(100, false_positive_rate=1e-6)
+        run_bfs_in_series(Queue(), {}, {}, 2, report=False, visited_set=visited_set)
+        self.assertEqual(1 + 3 + 3 + 16, len(visited_set))
+        self.assertLess(visited_set.expected_missed, 1e-3)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+
+from geompy.cas import sqrt
+from geompy.experiments.monte_carlo import run_monte_carlo, worker_rng
+
+
+def summary(results):
+    return {num_sqrt: (result.num_steps, result.worker_index,
+                       None if result.construction is None else [step.key() for step in result.construction.steps])
+            for num_sqrt, result in results.items()}
+
+
+class MonteCarloTestCase(TestCase):
+    def test_worker_rng(self):
+        self.assertEqual(worker_rng(0, 2, 1, 3, 0).random(), worker_rng(0, 2, 1, 3, 0).random())
+        streams = {worker_rng(*key).random() for key in ((0, 2, 1, 3, 0), (1, 2, 1, 3, 0), (0, 3, 1, 3, 0),
+                                                         (0, 2, 0, 3, 0), (0, 2, 1, 2, 0), (0, 2, 1, 3, 1))}
+        self.assertEqual(6, len(streams))
+
+    def test_reproducible(self):
+        with tempfile.TemporaryDirectory() as directory:
+            timings_path = os.path.join(directory, 'timings.csv')
+            results = run_monte_carlo([1, 4, 3, 2], seed=5, num_workers=3, num_processes=2, maximum_depth=3,
+                                      timings_path=timings_path)
+            with open(timings_path) as timings_file:
+                rows = list(csv.DictReader(timings_file))
+        self.assertEqual(0, results[1].num_steps)
+        self.assertEqual(1, results[4].num_steps)
+        self.assertEqual(2, results[3].num_steps)
+        self.assertFalse(results[2].found)
+        for num_sqrt in (1, 4, 3):
+            self.assertTrue(results[num_sqrt].construction.find_length(sqrt(num_sqrt)))
+        self.assertCountEqual(['1', '4', '3', '2'], [row['n'] for row in rows])
+        self.assertEqual('', [row for row in rows if row['n'] == '2'][0]['num steps'])
+
+        # The same seed gives the same constructions, however many processes run the workers
+        self.assertEqual(summary(results), summary(run_monte_carlo([1, 4, 3, 2], seed=5, num_workers=3,
+                                                                   num_processes=1, maximum_depth=3)))
+
+    def test_reproducible_across_hash_seeds(self):
+        # Sets of points iterate in an order that depends on the hash seed, which differs between interpreters
+        script = ('from geompy.experiments.monte_carlo import run_monte_carlo\n'
+                  'results = run_monte_carlo([1, 4, 3], seed=5, num_workers=2, num_processes=1, maximum_depth=3)\n'
+                  'print([(num_sqrt, result.num_steps, result.worker_index, [step.key() for step in '
+                  'result.construction.steps]) for num_sqrt, result in results.items()])')
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        outputs = {subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True, cwd=root,
+                                  env=dict(os.environ, PYTHONHASHSEED=hash_seed)).stdout
+                   for hash_seed in ('1', '4')}
+        self.assertEqual(1, len(outputs))
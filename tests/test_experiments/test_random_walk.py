@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+import random
+
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.random_walk import RandomWalkSampler
+
+
+class RandomWalkSamplerTestCase(TestCase):
+    def test_sample(self):
+        base = BaseConstruction()
+        sampler = RandomWalkSampler(base, 3, rng=random.Random(0))
+        samples = [sampler.sample() for _ in range(10)]
+        for construction in samples:
+            self.assertEqual(3, len(construction))
+            self.assertEqual(0, len(base))
+        # Every sample is a new construction, but consecutive samples share prefixes
+        self.assertEqual(10, len({id(construction) for construction in samples}))
+        self.assertEqual(10, sampler.num_samples)
+        self.assertLess(sampler.num_steps_added, 30)
+        self.assertLess(sampler.steps_per_sample, 3)
+        self.assertGreater(sampler.samples_per_second, 0)
+
+    def test_seeded(self):
+        def steps(seed):
+            sampler = RandomWalkSampler(BaseConstruction(), 2, rng=random.Random(seed))
+            return [[step.key() for step in sampler.sample().steps] for _ in range(5)]
+        self.assertEqual(steps(1), steps(1))
+
+    def test_no_steps(self):
+        base = BaseConstruction()
+        sampler = RandomWalkSampler(base, 0)
+        construction = sampler.sample()
+        self.assertIsNot(base, construction)
+        self.assertEqual(0, len(construction))
+        self.assertEqual(0, sampler.num_steps_added)
@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+import os
+import random
+import tempfile
+
+from geompy.cas import sqrt
+from geompy.experiments.sqrt_finder import construct, construct_batch, unit_segment_base_construction
+
+
+class ConstructBatchTestCase(TestCase):
+    def assertValidResults(self, nums_sqrt, results):
+        self.assertCountEqual(nums_sqrt, [num_sqrt for num_sqrt, _, _ in results])
+        for num_sqrt, num_steps, construction in results:
+            if num_steps is not None:
+                self.assertEqual(num_steps, len(construction))
+                self.assertTrue(construction.find_length(sqrt(num_sqrt)))
+
+    def test_shared_base(self):
+        random.seed(0)
+        nums_sqrt = [1, 3, 4, 2]
+        results = list(construct_batch(nums_sqrt, unit_segment_base_construction, maximum_depth=3))
+        self.assertValidResults(nums_sqrt, results)
+        # Targets arrive as they are found, so the shortest constructions come first, and those not found come last
+        self.assertEqual((1, 0), results[0][:2])
+        found = [num_steps for _, num_steps, _ in results if num_steps is not None]
+        self.assertEqual(sorted(found), found)
+        self.assertEqual((2, None, None), results[-1])
+
+    def test_separate_bases(self):
+        random.seed(0)
+        for num_processes in (1, 2):
+            results = list(construct_batch([1, 4], maximum_depth=2, num_processes=num_processes))
+            self.assertValidResults([1, 4], results)
+            self.assertIn((1, 0), [result[:2] for result in results])
+
+    def test_split_samples(self):
+        nums_sqrt = [1, 3, 4, 2]
+        results = list(construct_batch(nums_sqrt, unit_segment_base_construction, maximum_depth=3, num_processes=2,
+                                       seed=7))
+        self.assertValidResults(nums_sqrt, results)
+        found = [num_steps for _, num_steps, _ in results if num_steps is not None]
+        self.assertEqual(sorted(found), found)
+        # The samples of each depth are split between seeded workers, so the results are reproducible
+        again = list(construct_batch(nums_sqrt, unit_segment_base_construction, maximum_depth=3, num_processes=2,
+                                     seed=7))
+        self.assertEqual([(num_sqrt, num_steps, None if construction is None else
+                           sorted(step.key() for step in construction.steps))
+                          for num_sqrt, num_steps, construction in results],
+                         [(num_sqrt, num_steps, None if construction is None else
+                           sorted(step.key() for step in construction.steps))
+                          for num_sqrt, num_steps, construction in again])
+
+
+class ConstructTestCase(TestCase):
+    def test_construct(self):
+        random.seed(0)
+        with tempfile.TemporaryDirectory() as directory:
+            num_steps, construction = construct(4, save_directory=directory)
+            self.assertEqual(num_steps, len(construction))
+            self.assertTrue(construction.find_length(sqrt(4)))
+            self.assertEqual([f'sqrt4_construction_in_{num_steps}_steps.txt'], os.listdir(directory))
@@ -0,0 +1,71 @@
+from unittest import TestCase
+from queue import Queue
+
+from geompy import Point
+from geompy.core.Line import Line
+from geompy.core.Construction import ConstructionMode
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.MinimalConstructions.MinimalConstructionsCore import run_bfs_in_series
+from geompy.experiments.TargetedSearch.TargetedSearchCore import ConstructionTargets, TargetedSearch, \
+    find_shortest_construction, sqrt_nesting_depth, INFINITY
+
+
+class SqrtNestingDepthTestCase(TestCase):
+    def test_sqrt_nesting_depth(self):
+        self.assertEqual(0, sqrt_nesting_depth('1/2'))
+        self.assertEqual(1, sqrt_nesting_depth('sqrt(3)/2'))
+        self.assertEqual(2, sqrt_nesting_depth('sqrt(2 + sqrt(3))'))
+        self.assertEqual(2, sqrt_nesting_depth('2**(1/4)'))
+        self.assertEqual(INFINITY, sqrt_nesting_depth('2**(1/3)'))
+
+
+class TargetedSearchTestCase(TestCase):
+    def test_find_point(self):
+        target = Point('1/2', 'sqrt(3)/2')
+        construction = find_shortest_construction(target_points=[target])
+        self.assertEqual(2, len(construction))
+        self.assertIn(target.key(), {point.key() for point in construction.points})
+
+    def test_find_lengths(self):
+        self.assertEqual(2, len(find_shortest_construction(target_lengths=['sqrt(3)'])))
+        self.assertEqual(2, len(find_shortest_construction(target_lengths=['2'])))
+        self.assertEqual(0, len(find_shortest_construction(target_lengths=['1'])))
+
+    def test_find_line(self):
+        target = Line(Point('1/2', 0), Point('1/2', 1))
+        construction = find_shortest_construction(target_lines=[target])
+        self.assertEqual(3, len(construction))
+        self.assertIn(target, construction.lines)
+
+    def test_agrees_with_breadth_first_search(self):
+        point_minimal_dict = {}
+        run_bfs_in_series(Queue(), {}, point_minimal_dict, 2, report=False)
+        # The same point may be in the dictionary several times, in different representations, and the search records
+        # base points again when a step passes through them
+        base_keys = {point.key() for point in BaseConstruction().points}
+        minimal_points = {}
+        for point, length in point_minimal_dict.items():
+            if point.key() not in base_keys and length < minimal_points.get(point.key(), (None, length + 1))[1]:
+                minimal_points[point.key()] = (point, length)
+        for point, length in minimal_points.values():
+            construction = find_shortest_construction(target_points=[point], max_depth=length)
+            self.assertEqual(length, len(construction), point)
+
+    def test_not_constructible(self):
+        search = TargetedSearch(ConstructionTargets(target_lengths=['2**(1/3)']))
+        self.assertIsNone(search.iterative_deepening(3))
+        self.assertEqual(0, search.nodes_expanded)
+
+    def test_lines_only(self):
+        search = TargetedSearch(ConstructionTargets([Point('1/2', 'sqrt(3)/2')]),
+                                construction_mode=ConstructionMode.LINES_ONLY)
+        self.assertIsNone(search.iterative_deepening(3))
+        self.assertEqual(0, search.nodes_expanded)
+
+    def test_bounds_prune(self):
+        targets = ConstructionTargets([Point('sqrt(2 + sqrt(2 + sqrt(2)))', 0)])
+        bounded, unbounded = TargetedSearch(targets), TargetedSearch(targets, use_bounds=False)
+        self.assertEqual(3, bounded.lower_bound(bounded.root()))
+        self.assertIsNone(bounded.iterative_deepening(2))
+        self.assertIsNone(unbounded.iterative_deepening(2))
+        self.assertLess(bounded.nodes_expanded, unbounded.nodes_expanded)
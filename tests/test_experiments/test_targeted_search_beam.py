@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from geompy import Point
+from geompy.experiments.TargetedSearch.TargetedSearchCore import ConstructionTargets
+from geompy.experiments.TargetedSearch.TargetedSearchBestFirst import euclid_targets
+from geompy.experiments.TargetedSearch.TargetedSearchBeam import BeamSearch, find_sqrt_construction, \
+    initialize_beam_worker, score_children
+
+
+class BeamSearchTestCase(TestCase):
+    def test_find_point(self):
+        target = Point('1/2', 'sqrt(3)/2')
+        for num_processes in (1, 2):
+            construction = BeamSearch(ConstructionTargets([target]), beam_width=5,
+                                      num_processes=num_processes).search(3)
+            self.assertEqual(2, len(construction))
+            self.assertIn(target.key(), {point.key() for point in construction.points})
+
+    def test_euclid_midpoint(self):
+        base, targets = euclid_targets()['EuclidI10']
+        search = BeamSearch(targets, base, beam_width=5, max_children_per_parent=2, num_processes=1)
+        construction = search.search(4)
+        self.assertIn(targets.point_keys[0], {point.key() for point in construction.points})
+        self.assertLessEqual(search.nodes_expanded, 1 + 5 * 3)
+
+    def test_sqrt(self):
+        construction = find_sqrt_construction(3, beam_width=10, max_depth=3, num_processes=1)
+        self.assertTrue(any(abs(float(abs(point1 - point2)) - 3 ** .5) < 1e-9
+                            for point1 in construction.points for point2 in construction.points))
+
+    def test_diversity(self):
+        targets = ConstructionTargets([Point('1/2', 'sqrt(3)/2')])
+        search = BeamSearch(targets, beam_width=4, max_children_per_parent=2, num_processes=1)
+        initialize_beam_worker(targets, search.base, search.heuristic)
+        # Two copies of the base, which has three children: a line and two circles
+        scored_children = [score_children(search.base), score_children(search.base)]
+        seen = set()
+        selected = search.select(scored_children, seen)
+        # The first copy may only contribute two children, and the second copy's duplicates of them are filtered out
+        self.assertEqual([0, 0, 1], [parent_index for parent_index, _ in selected])
+        self.assertEqual(3, len(seen))
@@ -0,0 +1,55 @@
+from unittest import TestCase
+import copy
+import random
+
+from geompy import Point
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.experiments.TargetedSearch.TargetedSearchCore import ConstructionTargets
+from geompy.experiments.TargetedSearch.TargetedSearchBestFirst import BestFirstSearch, Heuristic, MaxHeuristic, \
+    NearestPointHeuristic, NestingHeuristic, benchmark_against_breadth_first, euclid_targets, \
+    find_construction_best_first, step_intersections
+
+
+class BestFirstSearchTestCase(TestCase):
+    def test_step_intersections(self):
+        construction = BaseConstruction()
+        construction.add_random_construction(3, rng=random.Random(0))
+        for action in list(construction.actions)[:10]:
+            expected = copy.deepcopy(construction)
+            expected.add_step_premade(action)
+            self.assertSetEqual({point.key() for point in expected.points},
+                                {point.key() for point in construction.points | step_intersections(construction,
+                                                                                                   action)})
+
+    def test_find_point(self):
+        target = Point('1/2', 'sqrt(3)/2')
+        for heuristic in (Heuristic(), NestingHeuristic(), NearestPointHeuristic()):
+            construction = find_construction_best_first(target_points=[target], heuristic=heuristic)
+            self.assertEqual(2, len(construction))
+            self.assertIn(target.key(), {point.key() for point in construction.points})
+
+    def test_find_length(self):
+        self.assertEqual(2, len(find_construction_best_first(target_lengths=['sqrt(3)'])))
+
+    def test_unreachable(self):
+        search = BestFirstSearch(ConstructionTargets(target_lengths=['2**(1/3)']))
+        self.assertIsNone(search.search(max_depth=3))
+        self.assertEqual(1, search.nodes_expanded)
+        search = BestFirstSearch(ConstructionTargets([Point(7, 7)]), heuristic=Heuristic())
+        self.assertIsNone(search.search(max_expansions=5))
+        self.assertEqual(5, search.nodes_expanded)
+
+    def test_euclid_macros(self):
+        targets = euclid_targets()
+        base, construction_targets = targets['EuclidI31']
+        construction = BestFirstSearch(construction_targets, base, heuristic=NearestPointHeuristic()).search(4)
+        self.assertEqual(3, len(construction))
+        self.assertIn(construction_targets.lines[0], construction.lines)
+
+        results = benchmark_against_breadth_first(
+            {'nesting+nearest': (MaxHeuristic(NestingHeuristic(), NearestPointHeuristic()), 1.0)},
+            {'EuclidI10': targets['EuclidI10']}, max_depth=4)
+        self.assertEqual({'breadth-first', 'nesting+nearest'}, set(results['EuclidI10']))
+        for result in results['EuclidI10'].values():
+            self.assertEqual(3, result['length'])
+            self.assertLessEqual(result['expanded'], result['generated'])
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from geompy.cas import equals, sympify
+from geompy.experiments.TargetedSearch.TargetedSearchMeetInTheMiddle import HalfConstructionIndex, \
+    MeetInTheMiddleSearch, compare_with_full_enumeration
+
+
+def has_length(construction, length) -> bool:
+    return any(abs(float(abs(point1 - point2)) - float(length)) < 1e-9 and equals(abs(point1 - point2), length)
+               for point1 in construction.points for point2 in construction.points)
+
+
+class MeetInTheMiddleTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.search = MeetInTheMiddleSearch(half_depth=3)
+
+    def test_index(self):
+        index = self.search.index
+        # 3 unique constructions of each of lengths 1 and 2, and 16 of length 3
+        self.assertEqual(22, index.num_constructions)
+        for key, record in index.records.items():
+            self.assertEqual(key, record.point.key())
+            self.assertLessEqual(len(record), 3)
+            self.assertIn(key, index.grid[index._cell(*record.coordinates)])
+
+    def test_pairs_at_distance(self):
+        index = self.search.index
+        pairs = set(index.pairs_at_distance(1.0))
+        self.assertIn(tuple(sorted(('(0, 0)', '(1, 0)'))), pairs)
+        for key1, key2 in pairs:
+            self.assertLess(key1, key2)
+        # The spatial hash finds the same pairs as comparing every pair
+        records = list(index.records.values())
+        expected = {tuple(sorted((record1.point.key(), record2.point.key())))
+                    for record1 in records for record2 in records
+                    if abs(float(abs(record1.point - record2.point)) - 1) < 1e-9 and record1 is not record2}
+        self.assertSetEqual(expected, pairs)
+
+    def test_search(self):
+        for length, expected_length in (('3', 3), ('4', 3), ('sqrt(7)', 4), ('sqrt(13)', 4)):
+            construction = self.search.search(length)
+            self.assertEqual(expected_length, len(construction), length)
+            self.assertTrue(has_length(construction, sympify(length)), length)
+        self.assertIsNone(self.search.search('2**(1/3)'))
+
+    def test_compare_with_full_enumeration(self):
+        report = compare_with_full_enumeration(('3', '2**(1/3)'), half_depth=2)
+        self.assertEqual(3, report['3']['meet in the middle']['length'])
+        self.assertEqual(3, report['3']['full enumeration']['length'])
+        self.assertIsNone(report['2**(1/3)']['meet in the middle']['length'])
+        self.assertNotIn('full enumeration', report['2**(1/3)'])
+        self.assertGreater(report['speedup'], 0)
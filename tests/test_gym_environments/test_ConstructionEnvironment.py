@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+import numpy as np
+
+from geompy.gym_environments.ConstructionEnvironment import ConstructionEnvironment
+
+
+class TestConstructionEnvironment(TestCase):
+    def setUp(self) -> None:
+        self.environment = ConstructionEnvironment(resolution=8)
+        self.environment.reset()
+
+    def test_points_to_action_number(self):
+        for point1 in self.environment.construction.points:
+            for point2 in self.environment.construction.points - {point1}:
+                for is_line in (True, False):
+                    action = self.environment._points_to_action_number(point1, point2, is_line, 2, 8)
+                    self.assertEqual((is_line, point1, point2),
+                                     self.environment.construction._interpret_action(action, 2, 8))
+
+    def test_action_mask(self):
+        mask = self.environment.action_mask()
+        self.assertEqual((self.environment.number_of_actions,), mask.shape)
+        self.assertIs(mask, self.environment.action_mask())
+        legal_actions = self.environment.legal_actions()
+        # Two points give a line and two circles
+        self.assertEqual(3, len(legal_actions))
+        self.assertTrue(all(mask[legal_actions]))
+
+        self.environment.step(legal_actions[0])
+        new_mask = self.environment.action_mask()
+        self.assertIsNot(mask, new_mask)
+        self.assertFalse(new_mask[legal_actions[0]])
+
+    def test_observation(self):
+        observation = self.environment.reset()
+        for action in self.environment.legal_actions()[:2]:
+            expected = np.concatenate((
+                self.environment.construction.numpy(2, 8),
+                self.environment.desired_construction.numpy(2, 8, interesting=True)))
+            np.testing.assert_array_equal(expected, observation)
+            observation, _, _ = self.environment.step(action)
+        self.assertIsNot(self.environment.observation, observation)
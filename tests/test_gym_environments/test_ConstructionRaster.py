@@ -0,0 +1,36 @@
+from unittest import TestCase
+import random
+
+import numpy as np
+
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.gym_environments.ConstructionRaster import ConstructionRaster
+
+
+class TestConstructionRaster(TestCase):
+    def test_update(self):
+        rng = random.Random(0)
+        for interesting in (False, True):
+            construction = BaseConstruction()
+            raster = ConstructionRaster(2, 16, interesting=interesting)
+            for _ in range(4):
+                layers = raster.update(construction)
+                np.testing.assert_array_equal(construction.numpy(2, 16, interesting=interesting), layers)
+                construction.add_random_construction(rng=rng)
+
+    def test_redraw(self):
+        construction = BaseConstruction()
+        construction.add_random_construction(2, rng=random.Random(0))
+        out = np.zeros((3, 16, 16), dtype=np.int16)
+        raster = ConstructionRaster(2, 16, out=out)
+        self.assertIs(out, raster.update(construction))
+
+        # A different construction is drawn from scratch
+        other = BaseConstruction()
+        raster.update(other)
+        np.testing.assert_array_equal(other.numpy(2, 16), out)
+
+        # So is one whose points were replaced
+        other.points = {next(iter(other.points))}
+        raster.update(other)
+        np.testing.assert_array_equal(other.numpy(2, 16), out)
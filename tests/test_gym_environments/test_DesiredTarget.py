@@ -0,0 +1,33 @@
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from geompy import Point
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.gym_environments.DesiredTarget import DesiredTarget
+
+
+class TestDesiredTarget(TestCase):
+    def test_random_construction(self):
+        desired = DesiredTarget(2, 16, 2)
+        desired.new(rng=random.Random(0))
+        construction = BaseConstruction()
+        missing = len({point.key() for point in desired.construction.interesting_points} -
+                      {point.key() for point in construction.points})
+        self.assertEqual(missing, desired.update(construction))
+        np.testing.assert_array_equal(desired.construction.numpy(2, 16, interesting=True), desired.layers)
+        self.assertIsNone(desired.target)
+
+    def test_set_construction(self):
+        layers = np.zeros((3, 16, 16), dtype=np.int16)
+        desired = DesiredTarget(2, 16, 2, out=layers)
+        desired.new(rng=random.Random(0))
+        desired.update(BaseConstruction())
+        # Setting the construction replaces the target, layers and points
+        other = BaseConstruction()
+        other.add_point(Point(0, 1), interesting=True)
+        desired.construction = other
+        self.assertEqual(1, desired.update(BaseConstruction()))
+        self.assertIs(layers, desired.layers)
+        np.testing.assert_array_equal(other.numpy(2, 16, interesting=True), layers)
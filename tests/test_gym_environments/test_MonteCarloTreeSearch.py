@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from geompy import Point
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.gym_environments.ConstructionEnvironment import ConstructionEnvironment
+from geompy.gym_environments.MonteCarloTreeSearch import MonteCarloTreeSearch
+
+
+class TestMonteCarloTreeSearch(TestCase):
+    def setUp(self) -> None:
+        self.target = Point('1/2', 'sqrt(3)/2')
+
+    def test_step_reward(self):
+        self.assertEqual((.5, False), ConstructionEnvironment.step_reward(2, 1))
+        self.assertEqual((1.5, True), ConstructionEnvironment.step_reward(1, 0))
+        self.assertEqual((0, False), ConstructionEnvironment.step_reward(1, 1))
+
+    def test_plan(self):
+        search = MonteCarloTreeSearch([self.target], max_steps=3, seed=0)
+        construction, reward = search.plan(simulations_per_step=20)
+        self.assertEqual(2, len(construction))
+        self.assertEqual(1.5, reward)
+        self.assertIn(self.target.key(), {point.key() for point in construction.points})
+
+    def test_tree_reuse(self):
+        base = BaseConstruction()
+        search = MonteCarloTreeSearch([self.target], base, max_steps=3, seed=0)
+        search.search(30)
+        self.assertEqual(30, search.root.visits)
+        action = search.best_action()
+        child_visits = search.root.children[action.key()].visits
+        root = search.advance(action)
+        self.assertIsNone(root.parent)
+        self.assertEqual(child_visits, root.visits)
+        self.assertEqual(1, len(root.construction))
+        # The search works on copies of the base
+        self.assertEqual(0, len(base))
+        self.assertEqual(2, len(base.points))
+
+    def test_root_parallel(self):
+        search = MonteCarloTreeSearch([self.target], max_steps=3, seed=0)
+        search.search(21, num_processes=2)
+        self.assertEqual(21, search.num_simulations)
+        self.assertEqual(21, sum(child.visits for child in search.root.children.values()))
+        construction, reward = search.plan(simulations_per_step=20, num_processes=2)
+        self.assertEqual(2, len(construction))
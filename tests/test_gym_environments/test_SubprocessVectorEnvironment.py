@@ -0,0 +1,47 @@
+from unittest import TestCase
+import functools
+
+import numpy as np
+
+from geompy.gym_environments import ContinuousConstructionEnvironment
+from geompy.gym_environments.ConstructionEnvironment import ConstructionEnvironment
+from geompy.gym_environments.SubprocessVectorEnvironment import SubprocessVectorEnvironment
+
+
+class TestSubprocessVectorEnvironment(TestCase):
+    def test_step(self):
+        functions = [functools.partial(ConstructionEnvironment, resolution=8)] * 3
+        with SubprocessVectorEnvironment(functions, num_processes=2, seed=0) as vector_environment:
+            self.assertEqual(2, vector_environment.num_processes)
+            observations = vector_environment.reset()
+            self.assertEqual((3, 6, 8, 8), observations.shape)
+            # The starting construction is the same in every environment
+            np.testing.assert_array_equal(observations[0, :3], observations[1, :3])
+            self.assertEqual(2, observations[0, 0].sum())
+            observations, rewards, dones = vector_environment.step([1, 1, 1])
+            self.assertEqual((3, 6, 8, 8), observations.shape)
+            self.assertEqual((3,), rewards.shape)
+            self.assertEqual((3,), dones.shape)
+
+    def test_seed(self):
+        functions = [functools.partial(ContinuousConstructionEnvironment.ConstructionEnvironment, length=1)] * 2
+        actions = np.zeros((2, 5))
+        results = []
+        for _ in range(2):
+            with SubprocessVectorEnvironment(functions, num_processes=2, seed=0) as vector_environment:
+                results.append((vector_environment.reset(), *vector_environment.step(actions)))
+        for first, second in zip(*results):
+            np.testing.assert_array_equal(first, second)
+
+    def test_shared_observations(self):
+        functions = [functools.partial(ContinuousConstructionEnvironment.ConstructionEnvironment, length=1)] * 2
+        vector_environment = SubprocessVectorEnvironment(functions, num_processes=1, copy=False)
+        observations = vector_environment.reset()
+        self.assertIs(vector_environment.observations, observations)
+        vector_environment.close()
+        self.assertTrue(vector_environment.closed)
+        self.assertFalse(any(process.is_alive() for process in vector_environment.processes))
+
+    def test_worker_error(self):
+        with self.assertRaises(TypeError):
+            SubprocessVectorEnvironment([functools.partial(ConstructionEnvironment, unknown_argument=1)])
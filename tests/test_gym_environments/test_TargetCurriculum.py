@@ -0,0 +1,95 @@
+import pickle
+import random
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from geompy.core.Construction import ConstructionMode
+from geompy.gym_environments.ConstructionEnvironment import ConstructionEnvironment
+from geompy.gym_environments.TargetCurriculum import TargetCurriculum, generate_targets
+from geompy.gym_environments.VectorConstructionEnvironment import VectorConstructionEnvironment
+
+
+class TestTargetCurriculum(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.curriculum = TargetCurriculum.generate(cls.directory.name, lengths=[1, 2], num_targets=3,
+                                                   resolution=8, num_processes=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_generate(self):
+        self.assertEqual(6, len(self.curriculum))
+        self.assertEqual({(1, ConstructionMode.DEFAULT): (0, 3), (2, ConstructionMode.DEFAULT): (3, 6)},
+                         self.curriculum.groups)
+        # The rebuilt constructions only hold the interesting points, which the archive draws in its point layer
+        for target in (self.curriculum.sample(2, rng=random.Random(seed)) for seed in range(10)):
+            construction = target.construction()
+            np.testing.assert_array_equal(construction.numpy(2, 8, interesting=True)[0], target.raster[0])
+            self.assertEqual(target.keys, {point.key() for point in construction.interesting_points})
+
+    def test_deterministic(self):
+        (raster, keys), = generate_targets((1, ConstructionMode.DEFAULT, 1, 2, 8, 0))
+        (other_raster, other_keys), = generate_targets((1, ConstructionMode.DEFAULT, 1, 2, 8, 0))
+        np.testing.assert_array_equal(raster, other_raster)
+        self.assertEqual(keys, other_keys)
+        with tempfile.TemporaryDirectory() as directory:
+            other = TargetCurriculum.generate(directory, lengths=[1, 2], num_targets=3, resolution=8, num_processes=1)
+            np.testing.assert_array_equal(self.curriculum.rasters, other.rasters)
+            self.assertEqual([self.curriculum.keys(i) for i in range(6)], [other.keys(i) for i in range(6)])
+
+    def test_pickle(self):
+        curriculum = pickle.loads(pickle.dumps(self.curriculum))
+        np.testing.assert_array_equal(self.curriculum.rasters, curriculum.rasters)
+        self.assertEqual(self.curriculum.keys(4), curriculum.keys(4))
+
+    def test_sample(self):
+        target = self.curriculum.sample(1, rng=random.Random(0))
+        self.assertIn(target.index, range(3))
+        with self.assertRaises(KeyError):
+            self.curriculum.sample(3)
+
+    def test_environment(self):
+        env = ConstructionEnvironment(boundary_radius=2, resolution=8, length=2, curriculum=self.curriculum)
+        observation = env.reset()
+        target = env._desired.target
+        np.testing.assert_array_equal(target.raster, observation[3:])
+        self.assertEqual(len(target.keys - {point.key() for point in env.construction.points}),
+                         env._current_missing_points()[0])
+        # The desired construction is rebuilt from the keys
+        self.assertEqual(target.keys, {point.key() for point in env.desired_construction.interesting_points})
+        action = env.legal_actions()[0]
+        observation, _, _ = env.step(action)
+        np.testing.assert_array_equal(target.raster, observation[3:])
+        np.testing.assert_array_equal(env.construction.numpy(2, 8), observation[:3])
+
+    def test_vector_environment(self):
+        env = VectorConstructionEnvironment(2, boundary_radius=2, resolution=8, length=1, seed=0,
+                                            curriculum=self.curriculum)
+        observations = env.reset()
+        for index, target in enumerate(env.targets):
+            np.testing.assert_array_equal(target.raster, observations[index, 3:])
+        for target, desired_construction in zip(env.targets, env.desired_constructions):
+            self.assertEqual(target.keys, {point.key() for point in desired_construction.interesting_points})
+
+    def test_mismatched_resolution(self):
+        self.curriculum.check_compatible(2, 8)
+        with self.assertRaises(ValueError):
+            self.curriculum.check_compatible(3, 8)
+        with self.assertRaises(ValueError):
+            ConstructionEnvironment(boundary_radius=2, resolution=16, curriculum=self.curriculum)
+
+    def test_construction_mode(self):
+        with tempfile.TemporaryDirectory() as directory:
+            curriculum = TargetCurriculum.generate(directory, lengths=[1], num_targets=2, resolution=8, num_processes=1,
+                                                   construction_modes=[ConstructionMode.DEFAULT,
+                                                                       ConstructionMode.CIRCLES_ONLY])
+            env = ConstructionEnvironment(boundary_radius=2, resolution=8, length=1, curriculum=curriculum,
+                                          construction_mode=ConstructionMode.CIRCLES_ONLY)
+            env.reset()
+            self.assertEqual(ConstructionMode.CIRCLES_ONLY, env._desired.target.construction_mode)
+            self.assertIn(env._desired.target.index, range(2, 4))
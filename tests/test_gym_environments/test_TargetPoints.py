@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from geompy import Point
+from geompy.core.PrebuiltConstructions import BaseConstruction
+from geompy.gym_environments.TargetPoints import TargetPoints
+
+
+class TestTargetPoints(TestCase):
+    def test_update(self):
+        construction = BaseConstruction()
+        a, b = sorted(construction.points, key=lambda point: point.key())
+        target_points = TargetPoints([Point('1/2', 'sqrt(3)/2'), Point('1/2', '-sqrt(3)/2'), Point(1, 0)])
+        self.assertEqual(2, target_points.update(construction))
+        construction.add_circle(a, b)
+        self.assertEqual(2, target_points.update(construction))
+        construction.add_circle(b, a)
+        self.assertEqual(0, target_points.update(construction))
+        self.assertEqual(set(), target_points.missing)
+
+    def test_points_in_one_pixel(self):
+        construction = BaseConstruction()
+        # Both targets are in the pixel of the origin at any practical resolution, but only one is constructed
+        target_points = TargetPoints([Point(0, 0), Point('1/1000000', 0)])
+        self.assertEqual(1, target_points.update(construction))
+
+    def test_recount(self):
+        construction = BaseConstruction()
+        target_points = TargetPoints([Point(0, 0), Point(1, 0)])
+        self.assertEqual(0, target_points.update(construction))
+        other = BaseConstruction()
+        other.points = {Point(0, 0)}
+        self.assertEqual(1, target_points.update(other))
+        # So are points removed in place
+        construction.points.clear()
+        self.assertEqual(2, target_points.update(construction))
@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+import numpy as np
+
+from geompy.gym_environments.ConstructionEnvironment import ConstructionEnvironment
+from geompy.gym_environments.VectorConstructionEnvironment import VectorConstructionEnvironment
+
+
+class TestVectorConstructionEnvironment(TestCase):
+    def setUp(self) -> None:
+        self.vector = VectorConstructionEnvironment(3, resolution=16, length=2, seed=0)
+
+    def assert_observations(self, observations):
+        for index in range(self.vector.num_envs):
+            expected = np.concatenate((
+                self.vector.constructions[index].numpy(self.vector.boundary_radius, self.vector.resolution),
+                self.vector.desired_constructions[index].numpy(self.vector.boundary_radius, self.vector.resolution,
+                                                               interesting=True)))
+            np.testing.assert_array_equal(expected, observations[index])
+
+    def test_reset(self):
+        observations = self.vector.reset()
+        self.assertEqual((3, 6, 16, 16), observations.shape)
+        self.assertTrue(self.vector.observation_space.contains(observations))
+        self.assert_observations(observations)
+
+    def test_step_matches_environment(self):
+        self.vector.reset()
+        rng = np.random.default_rng(0)
+        for _ in range(3):
+            environments = []
+            for index in range(self.vector.num_envs):
+                environment = ConstructionEnvironment(self.vector.boundary_radius, self.vector.resolution)
+                # Construction.copy shares the points; a deep copy can re-create them with other hashes, so that new
+                # intersections equal to them are added again
+                environment.construction = self.vector.constructions[index].copy()
+                environment.desired_construction = self.vector.desired_constructions[index]
+                environments.append(environment)
+            actions = rng.integers(self.vector.number_of_actions, size=self.vector.num_envs)
+            observations, rewards, dones = self.vector.step(actions)
+            for index, (environment, action) in enumerate(zip(environments, actions)):
+                observation, reward, done = environment.step(action)
+                self.assertEqual(reward, rewards[index])
+                self.assertEqual(done, dones[index])
+                if not done:
+                    np.testing.assert_array_equal(observation, observations[index])
+            self.assert_observations(observations)
+
+    def test_autoreset(self):
+        # Desired constructions without steps have no points to find, so every environment is done after one step
+        vector = VectorConstructionEnvironment(2, resolution=16, length=0, seed=0)
+        vector.reset()
+        old_constructions = list(vector.constructions)
+        observations, rewards, dones = vector.step([1, 1])
+        np.testing.assert_array_equal([1, 1], rewards)
+        np.testing.assert_array_equal([True, True], dones)
+        for old_construction, construction in zip(old_constructions, vector.constructions):
+            self.assertIsNot(old_construction, construction)
+            self.assertEqual(0, len(construction))
+
+    def test_copy(self):
+        vector = VectorConstructionEnvironment(2, resolution=16, length=1, seed=0, copy=False)
+        observations = vector.reset()
+        self.assertIs(vector.observations, observations)
+        self.assertIsNot(self.vector.reset(), self.vector.observations)